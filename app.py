@@ -15,21 +15,35 @@ from ui.tabs_sessions import SessionsTab
 from ui.tabs_dashboard import DashboardTab
 from ui.tabs_settings import SettingsTab
 from core.logger import logger
+from core.executor import EXECUTOR
+from core import metrics
+from db.dao import start_stats_reconciler, stop_stats_reconciler
 
 
 class App(tk.Tk):
     def __init__(self):
         logger.info("App.__init__ starting")
         super().__init__()
+        metrics.start_from_config()
         self.title("AI Meeting Assistant — Dashboard")
         self.geometry("1200x720")
         self.configure(bg=PRIMARY_BG)
         self.minsize(1024, 640)
 
         apply_dark_style(self)
+        # Callback của task nền (DB/GPT/ASR) chạy trên luồng Tk qua dispatcher này
+        EXECUTOR.install(self)
         self._build_layout()
+        start_stats_reconciler()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         logger.info("App.__init__ finished")
 
+    def _on_close(self):
+        logger.info("App closing")
+        stop_stats_reconciler()
+        EXECUTOR.shutdown()
+        self.destroy()
+
     def _build_layout(self):
         logger.debug("App._build_layout: configuring grid and sidebar")
         # Grid: 0 = sidebar (fixed ~240px), 1 = main
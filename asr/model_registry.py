@@ -0,0 +1,202 @@
+# ------------------------------
+# file: meeting_assistant/asr/model_registry.py
+# ------------------------------
+"""Process-wide cache of faster-whisper models.
+
+Models are keyed by (model_size, device, compute_type), loaded lazily (or in a
+background thread via preload()) and shared by every WhisperWorker. Models not
+used for `idle_ttl_sec` are evicted by a janitor thread to free RAM.
+
+    key = MODEL_REGISTRY.key_for("medium")
+    MODEL_REGISTRY.preload(key, on_ready=lambda key, err: ...)
+    with MODEL_REGISTRY.use(key) as model:
+        model.transcribe(...)
+"""
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from core.logger import logger
+
+ModelKey = Tuple[str, str, str]
+
+# Model không dùng quá thời gian này (giây) sẽ bị giải phóng
+IDLE_TTL_SEC = 900
+_JANITOR_INTERVAL_SEC = 60
+
+_device_cache: Optional[str] = None
+
+
+def default_device() -> str:
+    """'cuda' nếu có GPU, ngược lại 'cpu'. Kiểm tra lười (không import torch lúc khởi động)."""
+    global _device_cache
+    if _device_cache is None:
+        _device_cache = "cpu"
+        try:
+            import ctranslate2
+            if ctranslate2.get_cuda_device_count() > 0:
+                _device_cache = "cuda"
+        except Exception:
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    _device_cache = "cuda"
+            except Exception as e:
+                logger.warning("Torch/CUDA check failed: %s", e)
+    return _device_cache
+
+
+@dataclass
+class _Entry:
+    state: str = "loading"  # loading|ready|error
+    model: object = None
+    error: Optional[str] = None
+    users: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    evict_on_release: bool = False
+    loaded: threading.Event = field(default_factory=threading.Event)
+
+
+class ModelRegistry:
+    def __init__(self, idle_ttl_sec: float = IDLE_TTL_SEC):
+        self.idle_ttl_sec = idle_ttl_sec
+        self._lock = threading.Lock()
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._janitor: Optional[threading.Thread] = None
+
+    @staticmethod
+    def key_for(model_size: str, device: str | None = None, compute_type: str | None = None) -> ModelKey:
+        device = device or default_device()
+        compute_type = compute_type or ("float16" if device == "cuda" else "int8")
+        return (model_size, device, compute_type)
+
+    # ---------- loading ----------
+    def _claim(self, key: ModelKey) -> Tuple[_Entry, bool]:
+        """Lấy entry cho key; trả (entry, True) nếu caller phải tự load."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.state != "error":
+                return entry, False
+            entry = _Entry()
+            self._entries[key] = entry
+            self._ensure_janitor()
+            return entry, True
+
+    def _load(self, key: ModelKey, entry: _Entry):
+        model_size, device, compute_type = key
+        t0 = time.monotonic()
+        logger.info("ModelRegistry: loading %s on %s (%s)", model_size, device, compute_type)
+        try:
+            from faster_whisper import WhisperModel
+            entry.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+            entry.state = "ready"
+            logger.info("ModelRegistry: %s ready in %.1fs", model_size, time.monotonic() - t0)
+        except Exception as e:
+            entry.state = "error"
+            entry.error = str(e)
+            logger.exception("ModelRegistry: load %s failed: %s", model_size, e)
+        finally:
+            entry.last_used = time.monotonic()
+            entry.loaded.set()
+
+    def preload(self, key: ModelKey, on_ready: Callable[[ModelKey, Optional[str]], None] | None = None):
+        """Load nền (không chặn). on_ready(key, error) được gọi từ thread nền khi xong."""
+        entry, must_load = self._claim(key)
+
+        def run():
+            if must_load:
+                self._load(key, entry)
+            else:
+                entry.loaded.wait()
+            if on_ready:
+                on_ready(key, entry.error)
+
+        threading.Thread(target=run, name=f"asr-load-{key[0]}", daemon=True).start()
+
+    def get(self, key: ModelKey, timeout: float | None = None):
+        """Trả model đã load; load đồng bộ nếu chưa có, hoặc chờ nếu đang load ở thread khác."""
+        entry, must_load = self._claim(key)
+        if must_load:
+            self._load(key, entry)
+        elif not entry.loaded.wait(timeout):
+            raise TimeoutError(f"ASR model {key[0]} chưa load xong")
+        if entry.state != "ready":
+            raise RuntimeError(f"Không load được ASR model {key[0]}: {entry.error}")
+        entry.last_used = time.monotonic()
+        return entry.model
+
+    @contextmanager
+    def use(self, key: ModelKey) -> Iterator[object]:
+        """Mượn model trong suốt một lần nhận dạng (không bị evict khi đang dùng)."""
+        while True:
+            model = self.get(key)
+            with self._lock:
+                entry = self._entries.get(key)
+                # Có thể vừa bị evict giữa get() và đây -> load lại
+                if entry is not None and entry.model is model:
+                    entry.users += 1
+                    break
+        try:
+            yield model
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+                if entry.users == 0 and entry.evict_on_release and self._entries.get(key) is entry:
+                    del self._entries[key]
+                    logger.info("ModelRegistry: evicted %s after release", key[0])
+
+    def status(self, key: ModelKey) -> str:
+        """absent|loading|ready|error"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.state if entry else "absent"
+
+    # ---------- eviction ----------
+    def evict(self, key: ModelKey) -> bool:
+        """Giải phóng model ngay nếu không ai dùng, ngược lại giải phóng khi trả về."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.state == "loading":
+                return False
+            if entry.users:
+                entry.evict_on_release = True
+                return False
+            del self._entries[key]
+        logger.info("ModelRegistry: evicted %s", key[0])
+        return True
+
+    def evict_idle(self, max_idle_sec: float | None = None) -> int:
+        max_idle = self.idle_ttl_sec if max_idle_sec is None else max_idle_sec
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                k for k, e in self._entries.items()
+                if e.state != "loading" and e.users == 0 and now - e.last_used >= max_idle
+            ]
+            for k in stale:
+                del self._entries[k]
+        for k in stale:
+            logger.info("ModelRegistry: evicted idle model %s", k[0])
+        return len(stale)
+
+    def _ensure_janitor(self):
+        if self._janitor is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(_JANITOR_INTERVAL_SEC)
+                try:
+                    self.evict_idle()
+                except Exception as e:
+                    logger.warning("ModelRegistry janitor error: %s", e)
+
+        self._janitor = threading.Thread(target=loop, name="asr-model-janitor", daemon=True)
+        self._janitor.start()
+
+
+MODEL_REGISTRY = ModelRegistry()
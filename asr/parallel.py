@@ -0,0 +1,227 @@
+# ------------------------------
+# file: meeting_assistant/asr/parallel.py
+# ------------------------------
+"""Parallel chunked transcription of long recordings.
+
+The recording is decoded once, split at silence boundaries (VAD) into chunks
+of roughly `target_chunk_sec`, and the chunks are transcribed in a pool of
+worker processes — each with its own WhisperModel and `cpu_threads` threads.
+Segments are stitched back in order with their offsets corrected; chunks that
+had to be hard-cut inside long speech overlap slightly and the duplicated text
+at the seam is removed.
+
+faster-whisper is only imported inside the workers (after OMP_NUM_THREADS is
+set), never at module import.
+"""
+from __future__ import annotations
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from core.logger import logger
+
+SAMPLE_RATE = 16000
+# File ngắn hơn mức này chạy 1 tiến trình (chi phí load model mỗi worker không đáng)
+PARALLEL_MIN_SEC = 600
+
+Chunk = Tuple[float, float]
+
+
+def default_workers(cpu_threads: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, cpu_threads))
+
+
+def plan_chunks(
+    regions: List[Tuple[float, float]],
+    total_sec: float,
+    target_chunk_sec: float = 300.0,
+    overlap_sec: float = 1.0,
+    tolerance: float = 0.25,
+) -> List[Chunk]:
+    """
+    Chia [0, total_sec] thành các chunk ~target_chunk_sec, cắt ở giữa khoảng lặng
+    giữa hai vùng nói. Vùng nói dài hơn 1.5 x target: trước khi cắt cứng, tìm khoảng lặng
+    gần nhất trong dung sai `tolerance` x target (khoảng lặng ngay trước vùng nói, hoặc ngay
+    sau nếu vùng kết thúc trong dung sai); chỉ khi không có mới cắt cứng, có overlap.
+    """
+    if not regions:
+        return []
+    chunks: List[Chunk] = []
+    start = regions[0][0]
+    hard_limit = (1.5 + tolerance) * target_chunk_sec
+    for i, (s, e) in enumerate(regions):
+        nxt = regions[i + 1][0] if i + 1 < len(regions) else None
+        # Khoảng lặng trước vùng này: chunk từ start tới đó đủ dài thì cắt ở đây, không cắt giữa câu
+        gap = (regions[i - 1][1] + s) / 2.0 if i > 0 else None
+        # Vùng kết thúc trong dung sai và còn khoảng lặng phía sau -> để nhánh dưới cắt ở khoảng lặng đó
+        limit = hard_limit if nxt is not None else 1.5 * target_chunk_sec
+        while e - start > limit:
+            if gap is not None and gap - start >= (1.0 - tolerance) * target_chunk_sec:
+                chunks.append((start, gap))
+                start, gap = gap, None
+                continue
+            # Vùng nói quá dài, không có khoảng lặng gần -> cắt cứng thành các đoạn target có chồng lấn
+            cut = start + target_chunk_sec
+            chunks.append((start, cut))
+            start = cut - overlap_sec
+            gap = None
+        if nxt is None:
+            chunks.append((start, min(e, total_sec)))
+        elif e - start >= target_chunk_sec:
+            cut = (e + nxt) / 2.0  # giữa khoảng lặng
+            chunks.append((start, cut))
+            start = cut
+    return chunks
+
+
+# ---------- worker process ----------
+_MODEL = None
+_OPTS: Dict = {}
+
+
+def _init_worker(
+    model_size: str, device: str, compute_type: str, cpu_threads: int, language: Optional[str],
+    word_timestamps: bool = False,
+):
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+    os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
+    from faster_whisper import WhisperModel
+    global _MODEL, _OPTS
+    _MODEL = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+    _OPTS = {"language": language, "word_timestamps": word_timestamps}
+
+
+def _transcribe_chunk(index: int, audio, chunk_start: float, use_vad: bool) -> Tuple[int, List[Dict]]:
+    from asr.vad import detect_speech, collect_speech, TimestampMap
+    from asr.segment_store import segment_dict
+    if use_vad:
+        regions = detect_speech(audio, SAMPLE_RATE)
+        audio, tmap = collect_speech(audio, regions, SAMPLE_RATE)
+    else:
+        tmap = TimestampMap([])
+    out: List[Dict] = []
+    if audio.size:
+        segments, _info = _MODEL.transcribe(
+            audio, language=_OPTS.get("language"), word_timestamps=_OPTS.get("word_timestamps", False)
+        )
+        for seg in segments:
+            if seg.text.strip():
+                out.append(segment_dict(seg, tmap, chunk_start))
+    return index, out
+
+
+def transcribe_path(audio_path: str, use_vad: bool = True) -> Tuple[List[Dict], float, float]:
+    """
+    Chạy trong worker của make_worker_pool(): nhận dạng trọn một file.
+    Trả (segments, audio_sec, wall_sec).
+    """
+    import time
+    from faster_whisper import decode_audio
+    t0 = time.perf_counter()
+    audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+    _, segs = _transcribe_chunk(0, audio, 0.0, use_vad)
+    return segs, audio.size / SAMPLE_RATE, time.perf_counter() - t0
+
+
+def make_worker_pool(
+    model_size: str,
+    language: Optional[str] = None,
+    device: str = "cpu",
+    compute_type: str = "int8",
+    workers: int = 0,
+    cpu_threads: int = 4,
+    word_timestamps: bool = False,
+) -> ProcessPoolExecutor:
+    """Pool tiến trình, mỗi tiến trình giữ một WhisperModel riêng (`cpu_threads` luồng)."""
+    workers = workers or default_workers(cpu_threads)
+    # spawn: không fork tiến trình đang có thread/OpenMP
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_size, device, compute_type, cpu_threads, language, word_timestamps),
+    )
+
+
+# ---------- stitching ----------
+def _dedupe_overlap(prev_text: str, text: str, max_words: int = 12) -> str:
+    """Bỏ phần đầu của `text` trùng với phần cuối của `prev_text` (theo từ)."""
+    prev_words = prev_text.split()
+    words = text.split()
+    norm = lambda ws: [w.casefold().strip(".,!?…") for w in ws]
+    p, w = norm(prev_words[-max_words:]), norm(words[:max_words])
+    for k in range(min(len(p), len(w)), 0, -1):
+        if p[-k:] == w[:k]:
+            return " ".join(words[k:])
+    return text
+
+
+def stitch(chunks: List[Chunk], results: List[List[Dict]]) -> List[Dict]:
+    """Ghép segment các chunk theo thứ tự; vùng chồng lấn chia đôi tại điểm giữa."""
+    merged: List[Dict] = []
+    for i, segs in enumerate(results):
+        lo = hi = None
+        if i > 0 and chunks[i][0] < chunks[i - 1][1]:
+            lo = (chunks[i][0] + chunks[i - 1][1]) / 2.0
+        if i + 1 < len(chunks) and chunks[i + 1][0] < chunks[i][1]:
+            hi = (chunks[i + 1][0] + chunks[i][1]) / 2.0
+        for j, seg in enumerate(segs):
+            if (lo is not None and seg["start"] < lo) or (hi is not None and seg["start"] >= hi):
+                continue
+            if lo is not None and merged and j <= 1:
+                text = _dedupe_overlap(merged[-1]["text"], seg["text"])
+                if not text:
+                    continue
+                if text != seg["text"]:
+                    dropped = len(seg["text"].split()) - len(text.split())
+                    seg = {**seg, "text": text}
+                    if seg.get("words"):
+                        seg["words"] = seg["words"][dropped:]
+                        seg["start"] = seg["words"][0]["start"] if seg["words"] else seg["start"]
+            merged.append(seg)
+    return merged
+
+
+# ---------- entry point ----------
+def transcribe_parallel(
+    audio_path: str,
+    model_size: str,
+    language: Optional[str] = None,
+    device: str = "cpu",
+    compute_type: str = "int8",
+    workers: int = 0,
+    cpu_threads: int = 4,
+    use_vad: bool = True,
+    target_chunk_sec: float = 300.0,
+    word_timestamps: bool = False,
+) -> List[Dict]:
+    """Nhận dạng song song một file dài; trả về list segment {"start","end","text"} (+ "words")."""
+    from faster_whisper import decode_audio
+    from asr.vad import detect_speech
+
+    workers = workers or default_workers(cpu_threads)
+    audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+    total = audio.size / SAMPLE_RATE
+    regions = detect_speech(audio, SAMPLE_RATE)
+    chunks = plan_chunks(regions, total, target_chunk_sec=target_chunk_sec)
+    logger.info(
+        "transcribe_parallel %s: %.0fs audio, %d chunks, workers=%d x %d threads",
+        audio_path, total, len(chunks), workers, cpu_threads,
+    )
+    if not chunks:
+        return []
+
+    results: List[List[Dict]] = [[] for _ in chunks]
+    with make_worker_pool(
+        model_size, language, device, compute_type, min(workers, len(chunks)), cpu_threads, word_timestamps
+    ) as pool:
+        futures = [
+            pool.submit(_transcribe_chunk, i, audio[int(s * SAMPLE_RATE): int(e * SAMPLE_RATE)], s, use_vad)
+            for i, (s, e) in enumerate(chunks)
+        ]
+        for fut in futures:
+            i, segs = fut.result()
+            results[i] = segs
+            logger.debug("transcribe_parallel chunk %d/%d done (%d segments)", i + 1, len(chunks), len(segs))
+    return stitch(chunks, results)
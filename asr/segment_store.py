@@ -0,0 +1,231 @@
+# ------------------------------
+# file: meeting_assistant/asr/segment_store.py
+# ------------------------------
+"""Compact columnar storage for Whisper segments (and optional word timestamps).
+
+A 3-hour meeting is ~2k segments / ~30k words; as JSON dicts that is megabytes
+to parse and tens of thousands of Python objects. Here everything is parallel
+arrays in one file, opened with a memory map — loading costs a header read and
+individual segments/words are decoded only when accessed.
+
+Layout (little-endian, each array 8-byte aligned):
+
+    b"MSEG0001" | u32 header_len | header JSON | arrays...
+
+    seg_start f32[n]   seg_end f32[n]   seg_text u32[n+1]   (offsets into seg_blob)
+    seg_word u32[n+1]  (segment i owns words seg_word[i]:seg_word[i+1])
+    word_start f32[m]  word_end f32[m]  word_prob f32[m]    word_text u32[m+1]
+    seg_blob u8        word_blob u8     (UTF-8 text)
+
+The header maps array name -> [offset, dtype, count]. Times are float32
+seconds (~1 ms resolution at 3 h).
+"""
+from __future__ import annotations
+import json
+import os
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - numpy đi kèm faster-whisper
+    np = None  # type: ignore
+
+MAGIC = b"MSEG0001"
+FILENAME = "segments.seg"  # sidecar trong folder session (base_dir/<uuid>)
+_ALIGN = 8
+
+
+def _encode_texts(texts: List[str]):
+    blobs = [t.encode("utf-8") for t in texts]
+    offsets = np.zeros(len(blobs) + 1, dtype="<u4")
+    if blobs:
+        np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    return offsets, b"".join(blobs)
+
+
+def segment_dict(seg, tmap=None, offset: float = 0.0) -> Dict:
+    """
+    Segment faster-whisper -> {"start","end","text"} (+ "words" khi bật word_timestamps).
+    tmap: TimestampMap của VAD (timestamp trên audio đã cắt lặng -> audio gốc); offset: vị trí chunk.
+    """
+    def t(x, is_end=False):
+        return offset + (tmap.to_original(x, is_end=is_end) if tmap is not None else x)
+    out = {"start": t(seg.start), "end": t(seg.end, True), "text": seg.text.strip()}
+    words = getattr(seg, "words", None)
+    if words:
+        out["words"] = [
+            {"start": t(w.start), "end": t(w.end, True), "word": w.word, "probability": w.probability}
+            for w in words
+        ]
+    return out
+
+
+def pack_segments(segments: List[dict]) -> bytes:
+    """segments: [{"start","end","text", "words"?: [{"start","end","word","probability"}]}] -> bytes."""
+    if np is None:
+        raise RuntimeError("Chưa cài numpy. Chạy: pip install numpy")
+    segments = segments or []
+    words = [w for s in segments for w in (s.get("words") or [])]
+    seg_text, seg_blob = _encode_texts([str(s.get("text") or "") for s in segments])
+    word_text, word_blob = _encode_texts([str(w.get("word") or "") for w in words])
+    seg_word = np.zeros(len(segments) + 1, dtype="<u4")
+    if segments:
+        np.cumsum([len(s.get("words") or []) for s in segments], out=seg_word[1:])
+    arrays = {
+        "seg_start": np.array([s.get("start") or 0.0 for s in segments], dtype="<f4"),
+        "seg_end": np.array([s.get("end") or 0.0 for s in segments], dtype="<f4"),
+        "seg_text": seg_text,
+        "seg_word": seg_word,
+        "word_start": np.array([w.get("start") or 0.0 for w in words], dtype="<f4"),
+        "word_end": np.array([w.get("end") or 0.0 for w in words], dtype="<f4"),
+        "word_prob": np.array([w.get("probability") or 0.0 for w in words], dtype="<f4"),
+        "word_text": word_text,
+        "seg_blob": np.frombuffer(seg_blob, dtype="u1"),
+        "word_blob": np.frombuffer(word_blob, dtype="u1"),
+    }
+    # Offset tính từ đầu vùng dữ liệu (sau header), header cần biết trước kích thước -> 2 bước
+    table, pos = {}, 0
+    for name, arr in arrays.items():
+        table[name] = [pos, arr.dtype.str, int(arr.size)]
+        pos += -(-arr.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({"n_seg": len(segments), "n_word": len(words), "arrays": table}).encode("utf-8")
+    head = MAGIC + struct.pack("<I", len(header)) + header
+    head += b"\0" * (-len(head) % _ALIGN)
+    out = bytearray(head)
+    for arr in arrays.values():
+        out += arr.tobytes()
+        out += b"\0" * (-arr.nbytes % _ALIGN)
+    return bytes(out)
+
+
+def write_segments(path: str, segments: List[dict]) -> int:
+    """Ghi file segment (atomic: tmp + os.replace). Trả về số byte."""
+    data = pack_segments(segments)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(data)
+
+
+class SegmentStore:
+    """
+    View chỉ-đọc trên dữ liệu đã pack (memmap hoặc bytes). Các cột là numpy view,
+    không copy; segment/word chỉ được tạo dict khi truy cập.
+    """
+
+    def __init__(self, buf):
+        if np is None:
+            raise RuntimeError("Chưa cài numpy. Chạy: pip install numpy")
+        self._buf = buf
+        raw = np.frombuffer(buf, dtype="u1") if not isinstance(buf, np.ndarray) else buf
+        if bytes(raw[:8]) != MAGIC:
+            raise ValueError("not a segment store")
+        (hlen,) = struct.unpack("<I", bytes(raw[8:12]))
+        header = json.loads(bytes(raw[12:12 + hlen]).decode("utf-8"))
+        base = 12 + hlen
+        base += -base % _ALIGN
+        self.n_words = int(header["n_word"])
+        self._cols: Dict[str, np.ndarray] = {}
+        for name, (off, dtype, count) in header["arrays"].items():
+            dt = np.dtype(dtype)
+            self._cols[name] = raw[base + off: base + off + dt.itemsize * count].view(dt)
+        self.starts = self._cols["seg_start"]
+        self.ends = self._cols["seg_end"]
+
+    @classmethod
+    def open(cls, path: str) -> "SegmentStore":
+        """Mở bằng memory map (file 0 byte / hỏng -> ValueError)."""
+        return cls(np.memmap(path, dtype="u1", mode="r"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SegmentStore":
+        return cls(data)
+
+    @classmethod
+    def from_segments(cls, segments: List[dict]) -> "SegmentStore":
+        return cls(pack_segments(segments))
+
+    def __len__(self) -> int:
+        return int(self.starts.size)
+
+    def _text(self, offsets: str, blob: str, i: int) -> str:
+        off = self._cols[offsets]
+        return bytes(self._cols[blob][off[i]:off[i + 1]]).decode("utf-8")
+
+    def text(self, i: int) -> str:
+        return self._text("seg_text", "seg_blob", i)
+
+    @property
+    def has_words(self) -> bool:
+        return self.n_words > 0
+
+    def words(self, i: int) -> List[dict]:
+        """Các từ của segment i: [{"start","end","word","probability"}]."""
+        lo, hi = int(self._cols["seg_word"][i]), int(self._cols["seg_word"][i + 1])
+        ws, we, wp = self._cols["word_start"], self._cols["word_end"], self._cols["word_prob"]
+        return [
+            {"start": round(float(ws[j]), 3), "end": round(float(we[j]), 3),
+             "word": self._text("word_text", "word_blob", j), "probability": round(float(wp[j]), 3)}
+            for j in range(lo, hi)
+        ]
+
+    def segment(self, i: int, with_words: bool = False) -> dict:
+        seg = {"start": round(float(self.starts[i]), 3), "end": round(float(self.ends[i]), 3), "text": self.text(i)}
+        if with_words and self.has_words:
+            seg["words"] = self.words(i)
+        return seg
+
+    def __getitem__(self, i: int) -> dict:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.segment(i)
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(len(self)):
+            yield self.segment(i)
+
+    def full_text(self) -> str:
+        return " ".join(self.text(i) for i in range(len(self)))
+
+    def to_dicts(self, with_words: bool = False) -> List[dict]:
+        return [self.segment(i, with_words) for i in range(len(self))]
+
+    def find(self, t: float) -> int:
+        """Chỉ số segment đang nói tại thời điểm t (giây); trước segment đầu -> 0."""
+        return max(0, int(np.searchsorted(self.starts, np.float32(t), side="right")) - 1)
+
+    def find_word(self, t: float) -> Optional[int]:
+        """Chỉ số từ (toàn cục) tại thời điểm t; None nếu không có word timestamp."""
+        if not self.has_words:
+            return None
+        return max(0, int(np.searchsorted(self._cols["word_start"], np.float32(t), side="right")) - 1)
+
+
+def segments_path(folder: str) -> str:
+    return os.path.join(folder, FILENAME)
+
+
+def save_segments(session_uuid: str, segments: List[dict], base_dir: Optional[str] = None) -> str:
+    """Ghi sidecar base_dir/<uuid>/segments.seg; trả về đường dẫn."""
+    from core.config import get_config
+    folder = os.path.join(base_dir or get_config().base_dir, session_uuid)
+    os.makedirs(folder, exist_ok=True)
+    path = segments_path(folder)
+    write_segments(path, segments)
+    return path
+
+
+def load_segments(session_uuid: str, base_dir: Optional[str] = None) -> Optional[SegmentStore]:
+    """SegmentStore của session từ sidecar base_dir/<uuid>/segments.seg (None nếu chưa có)."""
+    from core.config import get_config
+    path = segments_path(os.path.join(base_dir or get_config().base_dir, session_uuid))
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    return SegmentStore.open(path)
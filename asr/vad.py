@@ -0,0 +1,131 @@
+# ------------------------------
+# file: meeting_assistant/asr/vad.py
+# ------------------------------
+"""Voice-activity detection pre-pass (in-process, CPU, no network).
+
+Prefers the Silero VAD model bundled inside faster-whisper (ONNX, shipped with
+the package); falls back to a simple energy detector in NumPy if unavailable.
+
+Typical use:
+    regions = detect_speech(audio)             # [(start_sec, end_sec), ...]
+    speech, tmap = collect_speech(audio, regions)
+    ... decode `speech` ...
+    start = tmap.to_original(seg.start)
+    end   = tmap.to_original(seg.end, is_end=True)
+"""
+from __future__ import annotations
+import bisect
+from typing import List, Tuple
+
+import numpy as np
+
+from core.logger import logger
+
+try:
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+except Exception as e:
+    VadOptions = None  # type: ignore
+    get_speech_timestamps = None  # type: ignore
+    logger.debug("Silero VAD unavailable, using energy VAD: %s", e)
+
+SAMPLE_RATE = 16000
+
+Region = Tuple[float, float]
+
+
+def detect_speech(
+    audio: np.ndarray,
+    sr: int = SAMPLE_RATE,
+    min_silence_ms: int = 500,
+    speech_pad_ms: int = 200,
+) -> List[Region]:
+    """Trả về các vùng có tiếng nói (giây, theo thời gian gốc), đã pad và gộp."""
+    if audio.size == 0:
+        return []
+    if get_speech_timestamps is not None and sr == SAMPLE_RATE:
+        opts = VadOptions(min_silence_duration_ms=min_silence_ms, speech_pad_ms=speech_pad_ms)
+        stamps = get_speech_timestamps(audio, opts)
+        regions = [(st["start"] / sr, st["end"] / sr) for st in stamps]
+    else:
+        regions = _energy_vad(audio, sr, min_silence_ms, speech_pad_ms)
+    return _merge(regions, gap=min_silence_ms / 1000.0, total=audio.size / sr)
+
+
+def _energy_vad(audio: np.ndarray, sr: int, min_silence_ms: int, speech_pad_ms: int) -> List[Region]:
+    """VAD năng lượng: khung 30 ms, ngưỡng = nền nhiễu + 10 dB (tối thiểu -50 dBFS)."""
+    frame = int(sr * 0.03)
+    n = audio.size // frame
+    if n == 0:
+        return []
+    frames = audio[: n * frame].reshape(n, frame)
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1) + 1e-12)
+    db = 20 * np.log10(rms)
+    threshold = max(float(np.percentile(db, 20)) + 10.0, -50.0)
+    voiced = db > threshold
+
+    regions: List[Region] = []
+    pad = speech_pad_ms / 1000.0
+    start = None
+    for i, v in enumerate(voiced):
+        if v and start is None:
+            start = i
+        elif not v and start is not None:
+            regions.append((start * 0.03 - pad, i * 0.03 + pad))
+            start = None
+    if start is not None:
+        regions.append((start * 0.03 - pad, n * 0.03 + pad))
+    return regions
+
+
+def _merge(regions: List[Region], gap: float, total: float) -> List[Region]:
+    """Kẹp vào [0, total] và gộp các vùng cách nhau < gap."""
+    out: List[Region] = []
+    for s, e in sorted(regions):
+        s, e = max(0.0, s), min(total, e)
+        if e <= s:
+            continue
+        if out and s - out[-1][1] < gap:
+            out[-1] = (out[-1][0], max(out[-1][1], e))
+        else:
+            out.append((s, e))
+    return out
+
+
+class TimestampMap:
+    """Ánh xạ thời gian trên audio đã ghép (chỉ gồm vùng nói) về thời gian audio gốc."""
+
+    def __init__(self, regions: List[Region], gap_sec: float = 0.0):
+        self.regions = list(regions)
+        self._cat_starts: List[float] = []
+        t = 0.0
+        for s, e in self.regions:
+            self._cat_starts.append(t)
+            t += (e - s) + gap_sec
+        self.total = t
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        if not self.regions:
+            return t
+        i = bisect.bisect_right(self._cat_starts, t) - 1
+        if is_end and i > 0 and t <= self._cat_starts[i]:
+            # Mốc kết thúc đúng tại ranh giới -> thuộc vùng trước
+            i -= 1
+        i = max(i, 0)
+        s, e = self.regions[i]
+        return min(s + (t - self._cat_starts[i]), e)
+
+
+def collect_speech(
+    audio: np.ndarray,
+    regions: List[Region],
+    sr: int = SAMPLE_RATE,
+    gap_sec: float = 0.1,
+) -> Tuple[np.ndarray, TimestampMap]:
+    """Ghép các vùng nói (chèn `gap_sec` im lặng giữa các vùng) + bảng ánh xạ thời gian."""
+    gap = np.zeros(int(gap_sec * sr), dtype=audio.dtype)
+    parts = []
+    for s, e in regions:
+        parts.append(audio[int(s * sr): int(e * sr)])
+        parts.append(gap)
+    speech = np.concatenate(parts[:-1]) if parts else audio[:0]
+    return speech, TimestampMap(regions, gap_sec=gap_sec)
@@ -5,8 +5,11 @@
 Install: pip install faster-whisper
 """
 from __future__ import annotations
-from typing import Iterable, Tuple, List, Dict
+from typing import Iterable, Iterator, Tuple, List, Dict
+import time
 from core.logger import logger
+from core.config import get_config
+from core import metrics
 
 # --- add at top (before importing faster_whisper) ---
 import os
@@ -18,41 +21,265 @@ os.environ.setdefault("OMP_NUM_THREADS", "1")
 # ----------------------------------------------------
 
 try:
-    from faster_whisper import WhisperModel
+    from faster_whisper import WhisperModel, decode_audio
 except Exception as e:
     WhisperModel = None  # type: ignore
+    decode_audio = None  # type: ignore
     logger.warning("WhisperModel import failed: %s", e)
 
 try:
-    import torch
-    _has_cuda = torch.cuda.is_available()
+    import numpy as np
 except Exception as e:
-    _has_cuda = False
-    logger.warning("Torch/CUDA check failed: %s", e)
+    np = None  # type: ignore
+    logger.warning("numpy import failed: %s", e)
+
+from asr.model_registry import MODEL_REGISTRY
+from asr.segment_store import segment_dict
+
+# Whisper làm việc ở 16 kHz mono
+SAMPLE_RATE = 16000
 
 
 class WhisperWorker:
-    def __init__(self, model_size: str = "medium", language: str | None = None):
-        logger.info("WhisperWorker.__init__ model=%s language=%s cuda=%s", model_size, language, _has_cuda)
+    """
+    Wrapper nhận dạng. Model được lấy từ MODEL_REGISTRY (dùng chung toàn process,
+    load lười) — khởi tạo WhisperWorker không load model.
+    """
+    def __init__(
+        self,
+        model_size: str = "medium",
+        language: str | None = None,
+        vad: bool | None = None,
+        device: str | None = None,
+        compute_type: str | None = None,
+        word_timestamps: bool | None = None,
+    ):
         if WhisperModel is None:
             raise RuntimeError("Chưa cài faster-whisper. Chạy: pip install faster-whisper")
-        device = "cuda" if _has_cuda else "cpu"
-        compute_type = "float16" if _has_cuda else "int8"
-        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        self.model_size = model_size
+        self.key = MODEL_REGISTRY.key_for(model_size, device, compute_type)
         self.language = language
+        self.vad = vad  # None -> theo CONFIG.asr_vad
+        self.word_timestamps = word_timestamps  # None -> theo CONFIG.asr_word_timestamps
+        logger.info("WhisperWorker.__init__ model=%s language=%s device=%s", model_size, language, self.key[1])
+
+    def _words_on(self) -> bool:
+        return get_config().asr_word_timestamps if self.word_timestamps is None else self.word_timestamps
+
+    @property
+    def model(self):
+        """Model đã load (chặn nếu chưa load xong)."""
+        return MODEL_REGISTRY.get(self.key)
+
+    def preload(self, on_ready=None):
+        """Load model ở thread nền; on_ready(key, error) khi xong."""
+        MODEL_REGISTRY.preload(self.key, on_ready=on_ready)
+
+    @property
+    def ready(self) -> bool:
+        return MODEL_REGISTRY.status(self.key) == "ready"
 
     def transcribe_file(self, audio_path: str) -> Tuple[str, List[Dict]]:
         logger.info("WhisperWorker.transcribe_file -> %s", audio_path)
-        segments, info = self.model.transcribe(audio_path, language=self.language)
-        full_text = []
-        seg_list: List[Dict] = []
-        for seg in segments:
-            text = seg.text.strip()
-            full_text.append(text)
-            seg_list.append({"start": seg.start, "end": seg.end, "text": text})
-        logger.info("WhisperWorker.transcribe_file done, chars=%d segments=%d", len(" ".join(full_text)), len(seg_list))
-        return " ".join(full_text), seg_list
-
-    def transcribe_stream(self, chunks_iterable: Iterable[bytes]) -> str:
-        logger.info("WhisperWorker.transcribe_stream called (not implemented)")
-        raise NotImplementedError("Streaming ASR chưa được triển khai")
\ No newline at end of file
+        use_vad = get_config().asr_vad if self.vad is None else self.vad
+        t0 = time.perf_counter()
+        with MODEL_REGISTRY.use(self.key) as model:
+            if use_vad and np is not None:
+                seg_list, audio_sec = self._transcribe_speech_only(model, audio_path)
+            else:
+                segments, info = model.transcribe(
+                    audio_path, language=self.language, word_timestamps=self._words_on()
+                )
+                seg_list = [segment_dict(seg) for seg in segments]
+                audio_sec = float(getattr(info, "duration", 0.0) or 0.0)
+        full_text = " ".join(s["text"] for s in seg_list)
+        self._record(audio_sec, time.perf_counter() - t0, "file")
+        logger.info("WhisperWorker.transcribe_file done, chars=%d segments=%d", len(full_text), len(seg_list))
+        return full_text, seg_list
+
+    def _record(self, audio_sec: float, wall_sec: float, mode: str):
+        """Số đo ASR: thời lượng audio vs thời gian chạy, real-time factor (wall / audio)."""
+        labels = {"mode": mode, "model": self.model_size, "device": self.key[1]}
+        metrics.observe("asr_transcribe_seconds", wall_sec, **labels)
+        metrics.inc("asr_audio_seconds_total", audio_sec, **labels)
+        if audio_sec > 0:
+            metrics.observe("asr_rtf", wall_sec / audio_sec, **labels)
+        logger.info("ASR %s: audio=%.1fs wall=%.1fs rtf=%.3f", mode, audio_sec, wall_sec,
+                    wall_sec / audio_sec if audio_sec > 0 else 0.0)
+
+    def transcribe_file_parallel(
+        self, audio_path: str, workers: int | None = None, cpu_threads: int | None = None
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Như transcribe_file nhưng chia file dài tại khoảng lặng và nhận dạng song song
+        trên nhiều tiến trình (mỗi tiến trình một model, `cpu_threads` luồng).
+        """
+        from asr.parallel import transcribe_parallel
+        from audio.probe import probe_duration_sec
+        cfg = get_config()
+        logger.info("WhisperWorker.transcribe_file_parallel -> %s", audio_path)
+        t0 = time.perf_counter()
+        seg_list = transcribe_parallel(
+            audio_path, self.model_size, language=self.language,
+            device=self.key[1], compute_type=self.key[2],
+            workers=cfg.asr_workers if workers is None else workers,
+            cpu_threads=cpu_threads or cfg.asr_cpu_threads,
+            use_vad=cfg.asr_vad if self.vad is None else self.vad,
+            word_timestamps=self._words_on(),
+        )
+        full_text = " ".join(s["text"] for s in seg_list)
+        self._record(probe_duration_sec(audio_path), time.perf_counter() - t0, "parallel")
+        logger.info("WhisperWorker.transcribe_file_parallel done, chars=%d segments=%d", len(full_text), len(seg_list))
+        return full_text, seg_list
+
+    def _transcribe_speech_only(self, model, audio_path: str) -> Tuple[List[Dict], float]:
+        """
+        VAD pre-pass: chỉ decode vùng có tiếng nói, timestamp ánh xạ về audio gốc.
+        Trả về (segments, tổng số giây audio).
+        """
+        from asr.vad import detect_speech, collect_speech
+        audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+        regions = detect_speech(audio, SAMPLE_RATE)
+        speech, tmap = collect_speech(audio, regions, SAMPLE_RATE)
+        logger.info(
+            "VAD: speech=%.1fs / total=%.1fs (%d regions)",
+            speech.size / SAMPLE_RATE, audio.size / SAMPLE_RATE, len(regions),
+        )
+        total_sec = audio.size / SAMPLE_RATE
+        metrics.inc("asr_speech_seconds_total", speech.size / SAMPLE_RATE, model=self.model_size)
+        if speech.size == 0:
+            return [], total_sec
+        segments, info = model.transcribe(speech, language=self.language, word_timestamps=self._words_on())
+        seg_list = [segment_dict(seg, tmap) for seg in segments]
+        return seg_list, total_sec
+
+    def transcribe_stream(
+        self,
+        chunks_iterable: Iterable,
+        samplerate: int = SAMPLE_RATE,
+        window_sec: float = 30.0,
+        step_sec: float = 5.0,
+        holdback_sec: float = 2.0,
+    ) -> Iterator[Dict]:
+        """
+        Nhận dạng streaming theo cửa sổ trượt (rolling window).
+
+        `chunks_iterable`: các khối PCM — bytes (int16 little-endian) hoặc numpy array
+        (float32 [-1, 1] / int16, shape (n,) hoặc (n, channels)), ví dụ từ Recorder.
+        Mỗi khi có thêm `step_sec` giây audio mới, cửa sổ chưa chốt (tối đa `window_sec`)
+        được decode lại; các segment kết thúc trước mép phải - `holdback_sec` được coi là
+        ổn định → chốt (final) và cắt khỏi bộ đệm. Phần còn lại được gộp thành đúng một
+        partial (có thể rỗng) — partial mới luôn thay thế partial trước đó.
+
+        Yield dict: {"start": float, "end": float, "text": str, "final": bool}
+        (timestamp tính từ đầu stream). Khi stream kết thúc, phần còn lại được chốt hết.
+        """
+        if np is None:
+            raise RuntimeError("Chưa cài numpy. Chạy: pip install numpy")
+        logger.info(
+            "WhisperWorker.transcribe_stream start window=%.1fs step=%.1fs holdback=%.1fs",
+            window_sec, step_sec, holdback_sec,
+        )
+        with MODEL_REGISTRY.use(self.key) as model:
+            yield from self._stream_loop(model, chunks_iterable, samplerate, window_sec, step_sec, holdback_sec)
+
+    def _stream_loop(self, model, chunks_iterable, samplerate, window_sec, step_sec, holdback_sec) -> Iterator[Dict]:
+        sr = SAMPLE_RATE
+        pending = np.zeros(0, dtype=np.float32)  # audio chưa chốt, bắt đầu tại `offset`
+        offset = 0.0
+        new_samples = 0
+        step = int(step_sec * sr)
+        committed_text: List[str] = []
+        n_final = 0
+
+        def decode(audio) -> List[Dict]:
+            # Ngữ cảnh = đuôi phần đã chốt, giúp nối câu qua ranh giới cửa sổ
+            prompt = " ".join(committed_text)[-200:] or None
+            segments, _info = model.transcribe(
+                audio, language=self.language,
+                initial_prompt=prompt, condition_on_previous_text=False,
+            )
+            out = []
+            for seg in segments:
+                text = seg.text.strip()
+                if text:
+                    out.append({"start": offset + seg.start, "end": offset + seg.end, "text": text})
+            return out
+
+        for chunk in chunks_iterable:
+            audio = _pcm_to_float32(chunk, samplerate)
+            if audio.size == 0:
+                continue
+            pending = np.concatenate((pending, audio))
+            new_samples += audio.size
+            if new_samples < step:
+                continue
+            new_samples = 0
+
+            dur = pending.size / sr
+            # decode lâu hơn step_sec -> live transcript tụt lại sau audio
+            with metrics.timer("asr_stream_decode_seconds", model=self.model_size):
+                segs = decode(pending)
+            stable_until = offset + dur - holdback_sec
+            final = [s for s in segs if s["end"] <= stable_until]
+            if not final and dur >= window_sec:
+                # Cửa sổ đầy mà chưa có gì ổn định: chốt tất cả trừ segment cuối
+                final = segs[:-1]
+            if final:
+                cut_at = final[-1]["end"]
+            elif dur >= window_sec and segs:
+                # Bỏ khoảng không lời trước segment đầu tiên
+                cut_at = segs[0]["start"]
+            elif dur >= window_sec:
+                # Không có lời nói trong cửa sổ (im lặng) -> bỏ phần đầu, giữ lại holdback
+                cut_at = stable_until
+            else:
+                cut_at = offset
+            if cut_at <= offset and dur >= 2 * window_sec:
+                # Chặn bộ đệm phình vô hạn: chốt cứng những gì đã có
+                final = segs
+                cut_at = segs[-1]["end"] if segs else stable_until
+
+            for s in final:
+                committed_text.append(s["text"])
+                n_final += 1
+                yield {**s, "final": True}
+            if cut_at > offset:
+                pending = pending[int(round((cut_at - offset) * sr)):]
+                offset = cut_at
+            # Mỗi lần decode trả đúng 1 partial (có thể rỗng) thay thế partial trước đó
+            rest = segs[len(final):]
+            yield {
+                "start": rest[0]["start"] if rest else offset,
+                "end": rest[-1]["end"] if rest else offset,
+                "text": " ".join(s["text"] for s in rest),
+                "final": False,
+            }
+
+        # Hết stream: chốt toàn bộ phần còn lại
+        if pending.size:
+            for s in decode(pending):
+                committed_text.append(s["text"])
+                n_final += 1
+                yield {**s, "final": True}
+        logger.info("WhisperWorker.transcribe_stream done, segments=%d", n_final)
+
+
+def _pcm_to_float32(chunk, samplerate: int = SAMPLE_RATE):
+    """Chuẩn hoá một khối PCM về float32 mono 16 kHz (định dạng Whisper cần)."""
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        audio = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+    else:
+        audio = np.asarray(chunk)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768.0
+        else:
+            audio = audio.astype(np.float32, copy=False)
+    if samplerate != SAMPLE_RATE and audio.size:
+        n_out = int(round(audio.size * SAMPLE_RATE / samplerate))
+        audio = np.interp(
+            np.linspace(0, audio.size - 1, n_out), np.arange(audio.size), audio
+        ).astype(np.float32)
+    return audio
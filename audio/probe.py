@@ -0,0 +1,40 @@
+# ------------------------------
+# file: meeting_assistant/audio/probe.py
+# ------------------------------
+"""Audio duration probing shared by the UI and the batch CLI."""
+from __future__ import annotations
+import wave
+
+from core.logger import logger
+
+
+def probe_duration_sec(path: str) -> float:
+    """Get duration (seconds) from audio file.
+    Prefer mutagen (mp3/m4a/flac), fallback to soundfile/wave. 0.0 if unknown."""
+    # 1) mutagen (mp3/m4a/flac/…)
+    try:
+        from mutagen import File as MFile  # pip install mutagen
+        mf = MFile(path)
+        length = getattr(getattr(mf, "info", None), "length", None)
+        if length:
+            return float(length)
+    except Exception as e:
+        logger.debug("mutagen probe failed: %s", e)
+
+    # 2) soundfile (wav/flac/ogg…)
+    try:
+        import soundfile as sf
+        with sf.SoundFile(path) as f:
+            return len(f) / float(f.samplerate)
+    except Exception as e:
+        logger.debug("soundfile probe failed: %s", e)
+
+    # 3) wave (wav only)
+    try:
+        with wave.open(path, 'rb') as wf:
+            return wf.getnframes() / float(wf.getframerate())
+    except Exception as e:
+        logger.debug("wave probe failed: %s", e)
+
+    # Fallback to 0
+    return 0.0
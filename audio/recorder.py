@@ -6,50 +6,97 @@
 If sounddevice/soundfile are not installed, this acts as a no-op stub and
 raises a clear error on .start().
 
+The PortAudio callback only copies each block into a preallocated RingBuffer;
+a separate writer thread drains the ring into the WAV file, so slow disk I/O
+can never stall the callback. Live consumers (ASR, level meters, VAD) read the
+same ring through chunks() / read_since(cursor). A reader that falls more
+than RING_SECONDS behind loses audio: the dropped frames are logged, counted
+(`recorder_dropped_frames_total{reader}`) and kept in `Recorder.dropped`.
+A writer-thread failure is reported through the `on_error` callback of start().
+
 Install:
   pip install sounddevice soundfile
 """
 from __future__ import annotations
 import threading
-from typing import Optional
+from typing import Callable, Dict, Iterator, Optional, Tuple
 import os
 
 try:
     import sounddevice as sd
     import soundfile as sf
+    from audio.ring_buffer import RingBuffer
 except Exception:
     sd = None
     sf = None
+    RingBuffer = None  # type: ignore
+
+from core import metrics
+from core.logger import logger
+
+# Dung lượng ring (giây). Reader tụt quá mức này sẽ mất phần audio cũ nhất.
+RING_SECONDS = 120
 
 
 class Recorder:
-    def __init__(self, samplerate: int = 16000, channels: int = 1):
+    def __init__(self, samplerate: int = 16000, channels: int = 1, ring_seconds: int = RING_SECONDS):
         self.samplerate = samplerate
         self.channels = channels
+        self.ring_seconds = ring_seconds
         self._stream: Optional[sd.InputStream] = None if sd else None
         self._file: Optional[sf.SoundFile] = None if sf else None
+        self._ring: Optional[RingBuffer] = None
+        self._writer: Optional[threading.Thread] = None
         self._paused = False
         self._lock = threading.Lock()
         self._path: Optional[str] = None
+        self.overflows = 0
+        self.dropped: Dict[str, int] = {}  # reader -> số frame đã mất vì tụt quá ring
+        self.writer_error: Optional[BaseException] = None
 
-    def start(self, path: str):
+    def start(self, path: str, on_error: Optional[Callable[[BaseException], None]] = None):
+        """on_error(exc): writer thread lỗi (file WAV không còn được ghi) — gọi từ luồng writer."""
         if sd is None or sf is None:
             raise RuntimeError("sounddevice/soundfile chưa được cài. Chạy: pip install sounddevice soundfile")
         os.makedirs(os.path.dirname(path), exist_ok=True)
         self._path = path
         self._file = sf.SoundFile(path, mode='w', samplerate=self.samplerate, channels=self.channels, subtype='PCM_16')
+        self._ring = RingBuffer(self.samplerate * self.ring_seconds, channels=self.channels)
+        self.overflows = 0
+        self.dropped = {}
+        self.writer_error = None
+        ring = self._ring
 
         def callback(indata, frames, time, status):
-            if status:
-                # You may want to log status
-                pass
-            with self._lock:
-                if not self._paused and self._file is not None:
-                    self._file.write(indata.copy())
+            # Không lock, không cấp phát: chỉ copy vào ring đã cấp phát sẵn
+            if status and status.input_overflow:
+                self.overflows += 1
+            if not self._paused:
+                ring.write(indata)
 
+        self._writer = threading.Thread(target=self._write_loop, args=(ring, self._file, on_error), daemon=True)
+        self._writer.start()
         self._stream = sd.InputStream(samplerate=self.samplerate, channels=self.channels, callback=callback)
         self._stream.start()
 
+    def _write_loop(self, ring: RingBuffer, file, on_error=None):
+        """Writer thread: đọc ring và ghi ra đĩa tới khi ring đóng."""
+        try:
+            for data in ring.iter_chunks(0, poll_interval=0.1, on_drop=lambda n: self._on_drop("writer", n)):
+                file.write(data)
+        except Exception as e:
+            self.writer_error = e
+            metrics.inc("recorder_writer_errors_total")
+            logger.exception("Recorder writer thread failed, audio file is incomplete: %s", e)
+            if on_error is not None:
+                on_error(e)
+
+    def _on_drop(self, reader: str, frames: int):
+        self.dropped[reader] = self.dropped.get(reader, 0) + frames
+        metrics.inc("recorder_dropped_frames_total", frames, reader=reader)
+        logger.warning("Recorder: reader '%s' fell behind, dropped %.1fs of audio",
+                       reader, frames / self.samplerate)
+
     def pause(self):
         with self._lock:
             self._paused = True
@@ -64,8 +111,42 @@ class Recorder:
                 self._stream.stop()
                 self._stream.close()
                 self._stream = None
+            if self._ring is not None:
+                self._ring.close()
+            if self._writer is not None:
+                self._writer.join()
+                self._writer = None
             if self._file is not None:
                 self._file.flush()
                 self._file.close()
                 self._file = None
+        if self.overflows:
+            logger.warning("Recorder: %d input overflow(s) during recording", self.overflows)
+        for reader, frames in self.dropped.items():
+            logger.warning("Recorder: reader '%s' lost %.1fs of audio in total", reader, frames / self.samplerate)
         return self._path or ""
+
+    # ---------- Live readers ----------
+    def cursor(self) -> int:
+        """Vị trí ghi hiện tại (frame tuyệt đối) — dùng làm cursor bắt đầu cho reader mới."""
+        return self._ring.write_pos if self._ring is not None else 0
+
+    def read_since(self, cursor: int, reader: str = "live") -> Tuple:
+        """(data, new_cursor): các frame ghi được kể từ `cursor` (không chặn); frame bị mất được ghi nhận."""
+        if self._ring is None:
+            raise RuntimeError("Recorder chưa start()")
+        data, cursor, dropped = self._ring.read_since(cursor)
+        if dropped:
+            self._on_drop(reader, dropped)
+        return data, cursor
+
+    def chunks(self, cursor: int = 0, reader: str = "live") -> Iterator:
+        """
+        Generator các khối audio (numpy, shape (frames, channels)) theo thời gian thực,
+        từ `cursor` (mặc định: đầu bản ghi) tới khi stop(). Nhiều consumer có thể đọc song song.
+        Frame mất do tụt quá ring được cộng vào dropped[reader].
+        """
+        ring = self._ring
+        if ring is None:
+            return iter(())
+        return ring.iter_chunks(cursor, on_drop=lambda n: self._on_drop(reader, n))
@@ -0,0 +1,112 @@
+# ------------------------------
+# file: meeting_assistant/audio/ring_buffer.py
+# ------------------------------
+"""Preallocated single-producer / multi-reader audio ring buffer.
+
+Writer (PortAudio callback) announces the frame range it is about to overwrite,
+copies each block into a fixed NumPy array and then publishes the new total frame
+count — no lock, no per-callback allocation.
+Readers keep their own cursor (absolute frame index) and call read_since(cursor);
+a reader that falls more than `capacity` frames behind loses the oldest audio
+(read_since returns the number of dropped frames), it never blocks the writer.
+"""
+from __future__ import annotations
+import time
+import threading
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity_frames: int, channels: int = 1, dtype="float32"):
+        if capacity_frames <= 0:
+            raise ValueError("capacity_frames phải > 0")
+        self.capacity = int(capacity_frames)
+        self.channels = channels
+        self._buf = np.zeros((self.capacity, channels), dtype=dtype)
+        # Tổng số frame đã ghi từ đầu (tăng đơn điệu). Gán int là atomic dưới GIL.
+        self._write_pos = 0
+        # Frame cuối writer đang/sắp ghi tới (>= _write_pos): công bố TRƯỚC khi copy block,
+        # reader dùng nó để biết phần nào có thể đã bị ghi đè trong lúc mình copy
+        self._reserve_pos = 0
+        self._closed = False
+
+    @property
+    def write_pos(self) -> int:
+        return self._write_pos
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, block) -> None:
+        """Ghi một block (frames, channels). Chỉ được gọi từ một producer."""
+        n = len(block)
+        if n == 0:
+            return
+        if n > self.capacity:
+            block = block[-self.capacity:]
+            n = self.capacity
+        pos = self._write_pos
+        self._reserve_pos = pos + n
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = block[:first]
+        if first < n:
+            self._buf[:n - first] = block[first:]
+        # Publish sau khi dữ liệu đã nằm trong buffer
+        self._write_pos = pos + n
+
+    def close(self) -> None:
+        """Đánh dấu kết thúc stream: reader sẽ dừng sau khi đọc hết."""
+        self._closed = True
+
+    def read_since(self, cursor: int, max_frames: Optional[int] = None) -> Tuple[np.ndarray, int, int]:
+        """
+        Trả về (data, new_cursor, dropped) với data = các frame trong [cursor, write_pos).
+        Nếu reader bị tụt quá capacity, phần cũ nhất đã bị ghi đè và bị bỏ qua
+        (data bắt đầu ở frame cũ nhất còn hợp lệ); dropped = số frame đã mất.
+        """
+        end = self._write_pos
+        if max_frames is not None:
+            end = min(end, cursor + max_frames)
+        begin = max(cursor, end - self.capacity)
+        if begin >= end:
+            return self._buf[:0].copy(), max(cursor, end), max(0, begin - cursor)
+        s = begin % self.capacity
+        e = end % self.capacity
+        if s < e:
+            data = self._buf[s:e].copy()
+        else:
+            data = np.concatenate((self._buf[s:], self._buf[:e]))
+        # Writer có thể đã ghi đè phần đầu trong lúc copy (kể cả block đang ghi dở, chưa publish
+        # _write_pos) -> cắt bỏ phần không còn hợp lệ theo _reserve_pos
+        overrun = self._reserve_pos - self.capacity - begin
+        if overrun > 0:
+            data = data[overrun:]
+            begin += overrun
+        return data, begin + len(data), begin - cursor
+
+    def iter_chunks(
+        self,
+        cursor: int = 0,
+        poll_interval: float = 0.05,
+        stop_event: Optional[threading.Event] = None,
+        on_drop: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[np.ndarray]:
+        """
+        Generator đọc liên tục từ `cursor` tới khi buffer close() và đã đọc hết.
+        on_drop(frames): gọi khi reader tụt quá capacity và mất audio.
+        """
+        while True:
+            closed = self._closed
+            data, cursor, dropped = self.read_since(cursor)
+            if dropped and on_drop is not None:
+                on_drop(dropped)
+            if len(data):
+                yield data
+            elif closed or (stop_event is not None and stop_event.is_set()):
+                return
+            else:
+                time.sleep(poll_interval)
@@ -0,0 +1,351 @@
+# -------------------------------
+# file: meeting_assistant/batch.py
+# -------------------------------
+"""Headless batch transcription: ASR -> Summarizer/Extractor -> DB, no Tk.
+
+    python batch.py /archive/2024 "/archive/2025/**/*.m4a" --asr-workers 4 --nlp-workers 4
+
+Files already saved as completed sessions (matched on sessions.audio_path) are
+skipped, so re-running after a crash resumes where it stopped. When GPT fails
+the transcript is still saved with status 'nlp_failed'; the next run re-runs
+only Summarizer/Extractor for those sessions, not ASR. Stages are connected
+by bounded queues; a throughput report is printed at the end.
+"""
+from __future__ import annotations
+import argparse
+import glob
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from core.config import get_config
+from core.logger import logger
+
+AUDIO_EXTS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm")
+
+
+@dataclass
+class BatchJob:
+    path: str
+    session_uuid: str
+    audio_sec: float = 0.0
+    full_text: str = ""
+    segments: List[Dict] = field(default_factory=list)
+    summary: Optional[str] = None
+    extracted: Optional[dict] = None
+    status: str = "completed"  # 'nlp_failed' -> transcript đã lưu, lần chạy sau chỉ làm lại NLP
+    session: Optional[dict] = None  # dòng sessions đã có (job resume NLP) -> giữ nguyên thời gian
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    failed: int = 0
+    busy_sec: float = 0.0
+    audio_sec: float = 0.0
+    first_ts: float = 0.0
+    last_ts: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, busy_sec: float, ok: bool = True, audio_sec: float = 0.0):
+        now = time.perf_counter()
+        with self._lock:
+            if not self.first_ts:
+                self.first_ts = now - busy_sec
+            self.last_ts = now
+            self.busy_sec += busy_sec
+            self.audio_sec += audio_sec
+            if ok:
+                self.items += 1
+            else:
+                self.failed += 1
+
+    def line(self) -> str:
+        wall = max(self.last_ts - self.first_ts, 1e-9)
+        txt = (f"{self.name:<6} items={self.items:<6} failed={self.failed:<4} "
+               f"busy={self.busy_sec:9.1f}s wall={wall:9.1f}s rate={self.items / wall * 60:8.2f}/min")
+        if self.audio_sec:
+            txt += f" audio={self.audio_sec / 3600:.2f}h rtf={self.busy_sec / self.audio_sec:.3f}"
+        return txt
+
+
+def discover(inputs: Iterable[str]) -> List[str]:
+    """Thư mục (đệ quy), glob hoặc file lẻ -> danh sách file audio (abs path, không trùng)."""
+    seen: Dict[str, None] = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _dirs, files in os.walk(item):
+                for name in sorted(files):
+                    if name.lower().endswith(AUDIO_EXTS):
+                        seen[os.path.abspath(os.path.join(root, name))] = None
+        else:
+            for p in sorted(glob.glob(item, recursive=True)) or ([item] if os.path.isfile(item) else []):
+                if os.path.isfile(p):
+                    seen[os.path.abspath(p)] = None
+    return list(seen)
+
+
+class BatchPipeline:
+    def __init__(self, asr_workers: int, cpu_threads: int, nlp_workers: int,
+                 queue_size: int, language: Optional[str], with_nlp: bool = True,
+                 db_batch: int = 50):
+        self.asr_workers = asr_workers
+        self.cpu_threads = cpu_threads
+        self.nlp_workers = nlp_workers
+        self.language = language
+        self.with_nlp = with_nlp
+        self.db_batch = db_batch
+        self.q_nlp: "queue.Queue[Optional[BatchJob]]" = queue.Queue(maxsize=queue_size)
+        self.q_db: "queue.Queue[Optional[BatchJob]]" = queue.Queue(maxsize=queue_size)
+        self.stats = {name: StageStats(name) for name in ("asr", "nlp", "db")}
+
+    # ---------- stages ----------
+    def _asr_stage(self, jobs: List[BatchJob]):
+        from asr.model_registry import MODEL_REGISTRY
+        from asr.parallel import make_worker_pool, transcribe_path
+        from asr.segment_store import save_segments
+        cfg = get_config()
+        _size, device, compute_type = MODEL_REGISTRY.key_for(cfg.asr_model)
+        inflight: dict = {}
+
+        def drain(done):
+            for fut in done:
+                job = inflight.pop(fut)
+                try:
+                    segs, audio_sec, wall = fut.result()
+                except Exception as e:
+                    logger.error("ASR failed %s: %s", job.path, e)
+                    self.stats["asr"].record(0.0, ok=False)
+                    continue
+                job.segments = segs
+                job.full_text = " ".join(s["text"] for s in segs)
+                try:
+                    save_segments(job.session_uuid, segs)  # timestamp cho seek/SRT sau này
+                except Exception as e:
+                    logger.warning("Could not write segments for %s: %s", job.path, e)
+                job.audio_sec = audio_sec
+                self.stats["asr"].record(wall, audio_sec=audio_sec)
+                self.q_nlp.put(job)  # chặn khi NLP chậm -> backpressure
+
+        with make_worker_pool(cfg.asr_model, self.language, device, compute_type,
+                              self.asr_workers, self.cpu_threads, cfg.asr_word_timestamps) as pool:
+            for job in jobs:
+                while len(inflight) >= self.asr_workers * 2:
+                    done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                    drain(done)
+                inflight[pool.submit(transcribe_path, job.path, cfg.asr_vad)] = job
+            while inflight:
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                drain(done)
+        for _ in range(self.nlp_workers):
+            self.q_nlp.put(None)
+
+    def _nlp_stage(self, summarizer, extractor):
+        while True:
+            job = self.q_nlp.get()
+            if job is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                if self.with_nlp and job.full_text:
+                    job.summary = summarizer.summarize(job.full_text, job.segments)
+                    job.extracted = extractor.extract_fields(job.full_text, job.segments)
+            except Exception as e:
+                # Vẫn ghi transcript (ASR tốn hàng giờ CPU); lần chạy sau chỉ làm lại NLP
+                logger.error("NLP failed %s: %s", job.path, e)
+                self.stats["nlp"].record(time.perf_counter() - t0, ok=False)
+                job.summary, job.extracted, job.status = None, None, "nlp_failed"
+                self.q_db.put(job)
+                continue
+            job.status = "completed"
+            self.stats["nlp"].record(time.perf_counter() - t0)
+            self.q_db.put(job)
+
+    def _db_stage(self):
+        """Gom job thành batch (tối đa db_batch, hoặc khi hàng đợi rảnh 1s) rồi ghi bulk."""
+        pending: List[BatchJob] = []
+        while True:
+            try:
+                job = self.q_db.get(timeout=1.0 if pending else None)
+            except queue.Empty:
+                job = False  # hàng đợi rảnh -> flush phần đang gom
+            if job:
+                pending.append(job)
+            if pending and (job is None or job is False or len(pending) >= self.db_batch):
+                try:
+                    self._flush_db(pending)
+                except Exception as e:
+                    logger.error("DB batch of %d failed: %s", len(pending), e)
+                    for _ in pending:
+                        self.stats["db"].record(0.0, ok=False)
+                pending = []
+            if job is None:
+                return
+
+    def _flush_db(self, jobs: List[BatchJob]):
+        from db.dao import upsert_sessions_bulk, insert_transcripts_bulk
+        t0 = time.perf_counter()
+        sessions = []
+        for job in jobs:
+            if job.session is not None:
+                sessions.append(dict(job.session, status="processing"))
+                continue
+            end_dt = datetime.fromtimestamp(os.path.getmtime(job.path))
+            start_dt = end_dt - timedelta(seconds=job.audio_sec)
+            sessions.append(dict(
+                uuid=job.session_uuid,
+                title=os.path.splitext(os.path.basename(job.path))[0],
+                main_topic="",
+                start_time=start_dt.strftime("%Y-%m-%d %H:%M:%S"),
+                end_time=end_dt.strftime("%Y-%m-%d %H:%M:%S"),
+                duration_min=int(round(job.audio_sec / 60.0)),
+                status="processing",
+                audio_path=job.path,
+            ))
+        # 'processing' trước; transcript + 'completed' ghi chung một transaction:
+        # crash giữa chừng -> lần sau làm lại
+        failed = upsert_sessions_bulk(sessions, batch_size=self.db_batch).failed_keys()
+        for status in ("completed", "nlp_failed"):
+            group = [j for j in jobs if j.status == status and j.session_uuid not in failed]
+            if not group:
+                continue
+            res = insert_transcripts_bulk(
+                ({"session_uuid": j.session_uuid, "full_text": j.full_text,
+                  "summary": j.summary, "extracted": j.extracted, "segments": j.segments}
+                 for j in group),
+                batch_size=self.db_batch, replace=True, status=status,
+            )
+            failed |= res.failed_keys()
+        wall = time.perf_counter() - t0
+        for job in jobs:
+            ok = job.session_uuid not in failed
+            if not ok:
+                logger.error("DB write failed %s", job.path)
+            self.stats["db"].record(wall / len(jobs), ok=ok)
+
+    # ---------- run ----------
+    def run(self, paths: List[str]) -> None:
+        from db.dao import find_sessions_by_audio_paths
+        existing = find_sessions_by_audio_paths(paths)
+        jobs: List[BatchJob] = []
+        nlp_retry: Dict[str, str] = {}  # session_uuid -> path: transcript đã có, chỉ làm lại NLP
+        for p in paths:
+            sid, status = existing.get(p, (None, None))
+            if status == "completed":
+                continue
+            if status == "nlp_failed":
+                nlp_retry[sid] = p
+                continue
+            jobs.append(BatchJob(path=p, session_uuid=sid or str(uuid.uuid4())))
+        resumed = self._nlp_retry_jobs(nlp_retry)
+        logger.info("batch: %d files found, %d already done, %d to process, %d NLP retries",
+                    len(paths), len(paths) - len(jobs) - len(nlp_retry), len(jobs), len(resumed))
+        if not jobs and not resumed:
+            return
+
+        summarizer = extractor = None
+        if self.with_nlp:
+            from nlp.gpt_client import GPTClient
+            from nlp.summarizer import Summarizer
+            from nlp.extractor import Extractor
+            client = GPTClient()
+            summarizer, extractor = Summarizer(client), Extractor(client)
+
+        threads = [threading.Thread(target=self._db_stage, name="batch-db", daemon=True)]
+        nlp_threads = [
+            threading.Thread(target=self._nlp_stage, args=(summarizer, extractor), name=f"batch-nlp-{i}", daemon=True)
+            for i in range(self.nlp_workers)
+        ]
+        for t in threads + nlp_threads:
+            t.start()
+        t0 = time.perf_counter()
+        for job in resumed:
+            self.q_nlp.put(job)
+        self._asr_stage(jobs)
+        for t in nlp_threads:
+            t.join()
+        self.q_db.put(None)
+        threads[0].join()
+        self.report(time.perf_counter() - t0)
+
+    @staticmethod
+    def _nlp_retry_jobs(paths_by_uuid: Dict[str, str]) -> List[BatchJob]:
+        """Session 'nlp_failed': đọc transcript mới nhất + segments.seg, bỏ qua ASR."""
+        if not paths_by_uuid:
+            return []
+        from asr.segment_store import load_segments
+        from db.dao import export_page
+        jobs: List[BatchJob] = []
+        after = 0
+        while after is not None:
+            items, after = export_page(after, 200, uuids=list(paths_by_uuid))
+            for item in items:
+                sid, title, main_topic, start_time, end_time, duration_min, _status, audio_path = item["session"]
+                t = item["transcript"]
+                if not t or not t[2]:
+                    continue  # không còn transcript -> để lần sau chạy lại từ đầu
+                store = load_segments(sid)
+                jobs.append(BatchJob(
+                    path=paths_by_uuid[sid], session_uuid=sid, audio_sec=float(duration_min or 0) * 60,
+                    full_text=t[2], segments=store.to_dicts() if store is not None else [],
+                    session=dict(uuid=sid, title=title, main_topic=main_topic or "", start_time=start_time,
+                                 end_time=end_time, duration_min=duration_min, audio_path=audio_path),
+                ))
+        return jobs
+
+    def report(self, total_sec: float):
+        print(f"\nBatch finished in {total_sec:.1f}s")
+        for st in self.stats.values():
+            print("  " + st.line())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    cfg = get_config()
+    ap = argparse.ArgumentParser(description="Headless batch transcription of meeting recordings")
+    ap.add_argument("inputs", nargs="+", help="thư mục, file hoặc glob (hỗ trợ **)")
+    ap.add_argument("--asr-workers", type=int, default=cfg.asr_workers or 0, help="số tiến trình ASR (0 = tự động)")
+    ap.add_argument("--cpu-threads", type=int, default=cfg.asr_cpu_threads, help="số luồng mỗi tiến trình ASR")
+    ap.add_argument("--nlp-workers", type=int, default=2, help="số session phân tích GPT song song (request chat API vẫn giới hạn theo GPT_CONCURRENCY)")
+    ap.add_argument("--queue-size", type=int, default=8, help="kích thước hàng đợi giữa các stage")
+    ap.add_argument("--db-batch", type=int, default=50, help="số session ghi DB mỗi transaction")
+    ap.add_argument("--language", default="vi")
+    ap.add_argument("--no-nlp", action="store_true", help="chỉ lưu transcript, bỏ qua tóm tắt/trích xuất")
+    ap.add_argument("--dry-run", action="store_true", help="chỉ liệt kê file sẽ xử lý")
+    args = ap.parse_args(argv)
+
+    paths = discover(args.inputs)
+    if args.dry_run:
+        for p in paths:
+            print(p)
+        print(f"{len(paths)} file(s)")
+        return 0
+    if not paths:
+        print("No audio files found", file=sys.stderr)
+        return 1
+
+    from asr.parallel import default_workers
+    from core import metrics
+    metrics.start_from_config()
+    pipeline = BatchPipeline(
+        asr_workers=args.asr_workers or default_workers(args.cpu_threads),
+        cpu_threads=args.cpu_threads,
+        nlp_workers=max(1, args.nlp_workers),
+        queue_size=max(1, args.queue_size),
+        language=args.language or None,
+        with_nlp=not args.no_nlp,
+        db_batch=max(1, args.db_batch),
+    )
+    pipeline.run(paths)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# ------------------------------
+# file: meeting_assistant/bench/gpt_stub.py
+# ------------------------------
+"""Local stand-in for the OpenAI chat completions API.
+
+    with StubServer(LatencyModel(base_ms=300, per_1k_prompt_ms=200)) as srv:
+        client = GPTClient(api_key="stub", base_url=srv.base_url, cache=None)
+
+Latency is deterministic (base + per prompt/completion token) so runs are
+comparable. `max_inflight` makes the stub answer 429 with Retry-After when more
+requests are in flight, to exercise GPTClient's backoff. When the openai SDK
+is not installed, `StubChatClient` gives the same latency model in-process.
+"""
+from __future__ import annotations
+import json
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+_EXTRACT_JSON = {
+    "goal": ["Thống nhất kế hoạch triển khai"],
+    "agenda": ["Tiến độ", "Ngân sách", "Rủi ro"],
+    "attendance": ["An (PM)", "Bình (Dev)"],
+    "decisions": ["Phát hành bản thử nghiệm tuần sau"],
+    "action_items": [{"item": "Cập nhật tài liệu thiết kế", "assignee": "Chi", "due": "2024-02-01", "done": False}],
+}
+
+
+def _tokens(text: str) -> int:
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+@dataclass
+class LatencyModel:
+    base_ms: float = 300.0
+    per_1k_prompt_ms: float = 150.0
+    per_completion_token_ms: float = 2.0
+    completion_tokens: int = 200
+
+    def delay(self, prompt_tokens: int) -> float:
+        return (
+            self.base_ms
+            + self.per_1k_prompt_ms * prompt_tokens / 1000.0
+            + self.per_completion_token_ms * self.completion_tokens
+        ) / 1000.0
+
+
+def _answer(messages: list, json_mode: bool, completion_tokens: int) -> str:
+    if json_mode:
+        return json.dumps(_EXTRACT_JSON, ensure_ascii=False)
+    return ("- Ý chính cuộc họp. " * max(1, completion_tokens // 6)).strip()
+
+
+class StubServer:
+    def __init__(self, latency: Optional[LatencyModel] = None, max_inflight: int = 0, host: str = "127.0.0.1"):
+        self.latency = latency or LatencyModel()
+        self.max_inflight = max_inflight
+        self.requests = 0
+        self.rejected = 0
+        self._inflight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": "not found"}}); return
+                with stub._lock:
+                    stub.requests += 1
+                    if stub.max_inflight and stub._inflight >= stub.max_inflight:
+                        stub.rejected += 1
+                        busy = True
+                    else:
+                        stub._inflight += 1
+                        busy = False
+                if busy:
+                    self._send(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                               {"retry-after": "0.05"})
+                    return
+                try:
+                    messages = body.get("messages") or []
+                    prompt = sum(_tokens(str(m.get("content", ""))) for m in messages)
+                    time.sleep(stub.latency.delay(prompt))
+                    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+                    content = _answer(messages, json_mode, stub.latency.completion_tokens)
+                    self._send(200, {
+                        "id": f"stub-{stub.requests}", "object": "chat.completion", "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                        "usage": {"prompt_tokens": prompt, "completion_tokens": stub.latency.completion_tokens,
+                                  "total_tokens": prompt + stub.latency.completion_tokens},
+                    })
+                finally:
+                    with stub._lock:
+                        stub._inflight -= 1
+
+            def _send(self, code: int, payload: dict, headers: Optional[dict] = None):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self._httpd.server_address[1]}/v1"
+
+    def __enter__(self) -> "StubServer":
+        threading.Thread(target=self._httpd.serve_forever, name="gpt-stub", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class StubChatClient:
+    """Thay GPTClient khi không có openai SDK: cùng giao diện chat/chat_json, cùng mô hình latency."""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, model: str = "gpt-4o-mini"):
+        self.latency = latency or LatencyModel()
+        self.model = model
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _call(self, messages: list, json_mode: bool) -> str:
+        with self._lock:
+            self.requests += 1
+        prompt = sum(_tokens(str(m.get("content", ""))) for m in messages)
+        time.sleep(self.latency.delay(prompt))
+        return _answer(messages, json_mode, self.latency.completion_tokens)
+
+    def chat(self, messages: list, **kwargs) -> str:
+        return self._call(messages, False)
+
+    def chat_json(self, messages: list, **kwargs) -> str:
+        return self._call(messages, True)
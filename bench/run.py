@@ -0,0 +1,398 @@
+# ------------------------------
+# file: meeting_assistant/bench/run.py
+# ------------------------------
+"""Offline benchmark suite.
+
+    python -m bench.run                         # mọi suite, ghi bench_results.json
+    python -m bench.run --suite summarize docx --repeat 5 --out after.json
+    python -m bench.run --compare before.json after.json
+
+Suites (a suite whose dependency is missing is recorded as skipped, not failed):
+  asr        VAD pre-pass throughput and Whisper real-time factor on a synthetic
+             meeting WAV (or --audio FILE); Whisper needs faster-whisper + a
+             cached model (--asr-model, default tiny).
+  summarize  Summarizer wall time vs chunk count x concurrency against a local
+             OpenAI stub with deterministic latency (bench/gpt_stub.py).
+  dao        insert / list throughput of db.dao against a scratch MySQL database
+             (--mysql-db, default <MYSQL_DB>_bench; tables are dropped and
+             re-created from db/migrations.sql, never the configured database).
+  docx       export_meeting_report time for large action-item tables.
+
+Results: {"meta": {...commit, python, cpu...}, "results": {name: {metric: value}},
+"skipped": {suite: reason}, "metrics": core.metrics snapshot}. Metric names
+ending in _sec/_ms/rtf are lower-is-better; *_per_sec and x_realtime are
+higher-is-better — --compare flags changes beyond --threshold percent.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from core import metrics
+from core.config import get_config, set_config
+from core.logger import logger
+from bench.fixtures import (
+    make_action_items, make_meeting_wav, make_segments, make_transcript, read_wav, SAMPLE_RATE,
+)
+from bench.gpt_stub import LatencyModel, StubChatClient, StubServer
+
+
+class Skip(Exception):
+    """Suite không chạy được trong môi trường này (thiếu thư viện / dịch vụ)."""
+
+
+def _measure(fn: Callable[[], object], repeat: int):
+    """Chạy fn `repeat` lần; trả về (median_sec, min_sec, kết quả lần cuối)."""
+    walls, out = [], None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        out = fn()
+        walls.append(time.perf_counter() - t0)
+    return statistics.median(walls), min(walls), out
+
+
+# ---------- asr ----------
+def bench_asr(args, tmp: str) -> Dict[str, dict]:
+    path = args.audio or make_meeting_wav(os.path.join(tmp, "meeting.wav"), args.audio_sec, seed=args.seed)
+    out: Dict[str, dict] = {}
+
+    from asr.vad import detect_speech
+    audio = read_wav(path) if path.lower().endswith(".wav") else None
+    if audio is not None:
+        audio_sec = audio.size / SAMPLE_RATE
+        med, best, regions = _measure(lambda: detect_speech(audio, SAMPLE_RATE), args.repeat)
+        speech = sum(e - s for s, e in regions)
+        out["asr.vad"] = {
+            "audio_sec": round(audio_sec, 2), "wall_sec": med, "wall_min_sec": best,
+            "x_realtime": audio_sec / med if med else 0.0, "speech_ratio": speech / audio_sec if audio_sec else 0.0,
+        }
+
+    try:
+        from asr.whisper_worker import WhisperWorker
+        from asr.model_registry import MODEL_REGISTRY
+        from audio.probe import probe_duration_sec
+        worker = WhisperWorker(args.asr_model, language="vi")
+        t0 = time.perf_counter()
+        MODEL_REGISTRY.get(worker.key)
+        load_sec = time.perf_counter() - t0
+    except Exception as e:
+        if out:
+            out["asr.whisper"] = {"skipped": f"{type(e).__name__}: {e}"}
+            return out
+        raise Skip(f"Whisper unavailable: {e}")
+    audio_sec = probe_duration_sec(path)
+    for vad in (False, True):
+        worker.vad = vad
+        med, best, (_text, segs) = _measure(lambda: worker.transcribe_file(path), args.repeat)
+        out[f"asr.whisper.{args.asr_model}.{'vad' if vad else 'novad'}"] = {
+            "audio_sec": round(audio_sec, 2), "wall_sec": med, "wall_min_sec": best,
+            "rtf": med / audio_sec if audio_sec else 0.0, "segments": len(segs),
+            "model_load_sec": load_sec, "device": worker.key[1],
+        }
+    return out
+
+
+# ---------- summarize ----------
+def _stub_client(latency: LatencyModel):
+    """(client, đếm request, đóng) — GPTClient thật qua HTTP stub nếu có openai SDK, không thì stub in-process."""
+    try:
+        import openai  # noqa: F401
+    except Exception:
+        c = StubChatClient(latency)
+        return c, "inproc", (lambda: c.requests), (lambda: None)
+    from nlp.gpt_client import GPTClient
+    srv = StubServer(latency).__enter__()
+    c = GPTClient(api_key="stub", base_url=srv.base_url, cache=None)
+    return c, "http", (lambda: srv.requests), (lambda: srv.__exit__(None, None, None))
+
+
+def bench_summarize(args, tmp: str) -> Dict[str, dict]:
+    from nlp.chunker import chunk_text
+    from nlp.summarizer import Summarizer
+    latency = LatencyModel(base_ms=args.gpt_latency_ms, per_1k_prompt_ms=50.0,
+                           per_completion_token_ms=0.25, completion_tokens=200)
+    client, mode, n_requests, close = _stub_client(latency)
+    out: Dict[str, dict] = {}
+    try:
+        for words in args.transcript_words:
+            text = make_transcript(words, seed=args.seed)
+            segs = make_segments(text)
+            chunks = len(chunk_text(text, segs, args.chunk_tokens, client.model))
+            for conc in args.concurrency:
+                s = Summarizer(client, concurrency=conc, chunk_tokens=args.chunk_tokens)
+                before = n_requests()
+                med, best, _ = _measure(lambda: s.summarize(text, segs), args.repeat)
+                calls = (n_requests() - before) / max(1, args.repeat)
+                out[f"summarize.w{words}.c{conc}"] = {
+                    "words": words, "chunks": chunks, "concurrency": conc, "gpt_calls": calls,
+                    "wall_sec": med, "wall_min_sec": best, "client": mode,
+                    "stub_ms_per_call": round(latency.delay(args.chunk_tokens) * 1000, 1),
+                }
+    finally:
+        close()
+    return out
+
+
+# ---------- dao ----------
+def _create_schema(cfg) -> None:
+    import pymysql
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root, "db", "migrations.sql"), encoding="utf-8") as f:
+        sql = f.read().split("-- Upgrades")[0]
+    body = "\n".join(ln for ln in sql.splitlines() if not ln.lstrip().startswith(("#", "--")))
+    conn = pymysql.connect(host=cfg.mysql_host, user=cfg.mysql_user, password=cfg.mysql_password,
+                           charset="utf8mb4", autocommit=True)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE DATABASE IF NOT EXISTS `{cfg.mysql_db}` CHARACTER SET utf8mb4")
+            cur.execute(f"USE `{cfg.mysql_db}`")
+            for t in ("action_items", "meeting_stats", "transcripts", "sessions"):
+                cur.execute(f"DROP TABLE IF EXISTS `{t}`")
+            for stmt in body.split(";"):
+                if stmt.strip():
+                    cur.execute(stmt)
+    finally:
+        conn.close()
+
+
+def bench_dao(args, tmp: str) -> Dict[str, dict]:
+    try:
+        import pymysql  # noqa: F401
+    except Exception as e:
+        raise Skip(f"pymysql not installed: {e}")
+    orig = get_config()
+    bench_db = args.mysql_db or f"{orig.mysql_db}_bench"
+    if bench_db == orig.mysql_db:
+        raise Skip("refusing to benchmark against the configured MYSQL_DB; pass a scratch --mysql-db")
+    cfg = replace(orig, mysql_db=bench_db, base_dir=os.path.join(tmp, "records"), gpt_cache_mb=0)
+    try:
+        _create_schema(cfg)
+    except Exception as e:
+        raise Skip(f"MySQL unavailable ({cfg.mysql_host}/{bench_db}): {e}")
+
+    from db import dao
+    from db.mysql import reset_connection
+    set_config(cfg)
+    reset_connection()
+    try:
+        return _run_dao(dao, args)
+    finally:
+        set_config(orig)
+        reset_connection()
+
+
+def _run_dao(dao, args) -> Dict[str, dict]:
+    n = args.sessions
+    rnd = random.Random(args.seed)
+    base = datetime(2024, 1, 1, 9, 0)
+
+    def session(i: int) -> dict:
+        st = base + timedelta(hours=rnd.randint(0, 24 * 365))
+        return {"uuid": f"bench-{i:07d}", "title": f"Bench meeting {i}", "main_topic": "bench",
+                "start_time": st.strftime("%Y-%m-%d %H:%M:%S"),
+                "end_time": (st + timedelta(minutes=45)).strftime("%Y-%m-%d %H:%M:%S"),
+                "duration_min": 45, "status": "completed", "audio_path": f"/bench/{i}.wav"}
+
+    sessions = [session(i) for i in range(n)]
+    text = make_transcript(args.transcript_words_dao, seed=args.seed)
+    out: Dict[str, dict] = {}
+
+    single = sessions[: min(200, n)]
+    t0 = time.perf_counter()
+    for s in single:
+        dao.upsert_session(**s)
+    wall = time.perf_counter() - t0
+    out["dao.upsert_session"] = {"rows": len(single), "wall_sec": wall, "rows_per_sec": len(single) / wall}
+
+    t0 = time.perf_counter()
+    res = dao.upsert_sessions_bulk(sessions, batch_size=500)
+    wall = time.perf_counter() - t0
+    out["dao.upsert_sessions_bulk"] = {"rows": res.rows, "wall_sec": wall, "rows_per_sec": res.rows / wall}
+
+    items = [{"session_uuid": s["uuid"], "full_text": text, "summary": "Tóm tắt.",
+              "extracted": {"decisions": ["Quyết định"], "action_items": make_action_items(5, seed=i)}}
+             for i, s in enumerate(sessions)]
+    t0 = time.perf_counter()
+    res = dao.insert_transcripts_bulk(items, batch_size=100, replace=True)
+    wall = time.perf_counter() - t0
+    out["dao.insert_transcripts_bulk"] = {"rows": res.rows, "wall_sec": wall, "rows_per_sec": res.rows / wall,
+                                          "words_per_transcript": args.transcript_words_dao}
+
+    t0 = time.perf_counter()
+    cursor, rows, pages = None, 0, 0
+    while True:
+        page, cursor = dao.list_sessions_page(after=cursor, limit=200)
+        rows += len(page); pages += 1
+        if cursor is None:
+            break
+    wall = time.perf_counter() - t0
+    out["dao.list_sessions_page"] = {"rows": rows, "pages": pages, "wall_sec": wall, "rows_per_sec": rows / wall}
+
+    picks = [rnd.choice(sessions)["uuid"] for _ in range(200)]
+    t0 = time.perf_counter()
+    for u in picks:
+        dao.get_session(u)
+    wall = time.perf_counter() - t0
+    out["dao.get_session"] = {"calls": len(picks), "per_call_ms": wall / len(picks) * 1000}
+
+    med, best, _ = _measure(dao.dashboard_stats, args.repeat)
+    out["dao.dashboard_stats"] = {"wall_ms": med * 1000, "wall_min_ms": best * 1000}
+    med, best, _ = _measure(dao.reconcile_meeting_stats, 1)
+    out["dao.reconcile_meeting_stats"] = {"sessions": n, "wall_sec": med}
+    return out
+
+
+# ---------- docx ----------
+def bench_docx(args, tmp: str) -> Dict[str, dict]:
+    try:
+        from report.docx_export import export_meeting_report
+    except Exception as e:
+        raise Skip(f"python-docx not installed: {e}")
+    summary = make_transcript(300, seed=args.seed)
+    out: Dict[str, dict] = {}
+    for n in args.action_items:
+        extracted = {"goal": ["Mục tiêu"] * 5, "agenda": ["Nội dung"] * 8, "attendance": ["An (PM)"] * 10,
+                     "decisions": ["Quyết định"] * 10, "action_items": make_action_items(n, seed=args.seed)}
+        path = os.path.join(tmp, f"report_{n}.docx")
+        meta = {"title": "Benchmark report", "datetime": "2024-01-01 09:00 → 10:00 (1h)"}
+        med, best, _ = _measure(lambda: export_meeting_report(path, meta, summary, extracted), args.repeat)
+        out[f"docx.action_items_{n}"] = {"action_items": n, "wall_sec": med, "wall_min_sec": best,
+                                         "bytes": os.path.getsize(path)}
+    return out
+
+
+SUITES: Dict[str, Callable] = {
+    "asr": bench_asr,
+    "summarize": bench_summarize,
+    "dao": bench_dao,
+    "docx": bench_docx,
+}
+
+
+# ---------- run / compare ----------
+def _git_meta() -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    def git(*a):
+        try:
+            return subprocess.run(["git", *a], cwd=root, capture_output=True, text=True, timeout=10).stdout.strip()
+        except Exception:
+            return ""
+    return {"commit": git("rev-parse", "HEAD"), "subject": git("log", "-1", "--format=%s"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run(args) -> dict:
+    doc = {
+        "meta": {
+            **_git_meta(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "seed": args.seed, "repeat": args.repeat,
+        },
+        "results": {}, "skipped": {},
+    }
+    metrics.METRICS.reset()
+    with tempfile.TemporaryDirectory(prefix="ma-bench-") as tmp:
+        for name in args.suite:
+            logger.info("bench: suite %s", name)
+            t0 = time.perf_counter()
+            try:
+                res = SUITES[name](args, tmp)
+            except Skip as e:
+                doc["skipped"][name] = str(e)
+                print(f"[{name}] skipped: {e}")
+                continue
+            doc["results"].update(res)
+            print(f"[{name}] {len(res)} result(s) in {time.perf_counter() - t0:.1f}s")
+            for key, vals in res.items():
+                print("  " + key + "  " + "  ".join(
+                    f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in vals.items()))
+    doc["metrics"] = metrics.snapshot()
+    return doc
+
+
+def _better(metric: str) -> int:
+    """+1 cao hơn là tốt, -1 thấp hơn là tốt, 0 không so sánh."""
+    if metric.endswith("_per_sec") or metric == "x_realtime":
+        return 1
+    if metric.endswith(("_sec", "_ms")) or metric == "rtf":
+        return -1
+    return 0
+
+
+def compare(base: dict, new: dict, threshold: float = 10.0) -> int:
+    """In bảng thay đổi; trả về số chỉ số xấu đi quá `threshold` %."""
+    bm, nm = base.get("meta", {}), new.get("meta", {})
+    print(f"base: {bm.get('commit', '')[:10]} {bm.get('subject', '')}")
+    print(f"new:  {nm.get('commit', '')[:10]} {nm.get('subject', '')}")
+    regressions = 0
+    for key in sorted(set(base.get("results", {})) | set(new.get("results", {}))):
+        b, n = base.get("results", {}).get(key), new.get("results", {}).get(key)
+        if b is None or n is None:
+            print(f"  {key:<40} {'only in new' if b is None else 'only in base'}")
+            continue
+        for m, bv in b.items():
+            d, nv = _better(m), n.get(m)
+            if not d or not isinstance(bv, (int, float)) or not isinstance(nv, (int, float)) or not bv:
+                continue
+            pct = (nv - bv) / bv * 100.0
+            worse = pct * d < -threshold
+            better = pct * d > threshold
+            regressions += worse
+            flag = "REGRESSION" if worse else ("improved" if better else "")
+            print(f"  {key:<40} {m:<14} {bv:>12.4g} -> {nv:<12.4g} {pct:+7.1f}%  {flag}")
+    print(f"{regressions} regression(s) beyond {threshold:.0f}%")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Offline benchmarks: ASR, summarization, DAO, DOCX export")
+    ap.add_argument("--suite", nargs="+", choices=list(SUITES), default=list(SUITES))
+    ap.add_argument("--out", default="bench_results.json", help="file JSON kết quả")
+    ap.add_argument("--repeat", type=int, default=3, help="số lần lặp mỗi phép đo (lấy median)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="so sánh hai file kết quả")
+    ap.add_argument("--threshold", type=float, default=10.0, help="ngưỡng %% coi là regression")
+    # asr
+    ap.add_argument("--audio", help="file audio thay cho WAV tổng hợp")
+    ap.add_argument("--audio-sec", type=float, default=120.0, help="độ dài WAV tổng hợp (giây)")
+    ap.add_argument("--asr-model", default="tiny")
+    # summarize
+    ap.add_argument("--transcript-words", type=int, nargs="+", default=[600, 2400, 7200])
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--chunk-tokens", type=int, default=400)
+    ap.add_argument("--gpt-latency-ms", type=float, default=80.0, help="latency cố định mỗi request của stub")
+    # dao
+    ap.add_argument("--mysql-db", help="database MySQL tạm cho bench (mặc định <MYSQL_DB>_bench)")
+    ap.add_argument("--sessions", type=int, default=2000)
+    ap.add_argument("--transcript-words-dao", type=int, default=1500)
+    # docx
+    ap.add_argument("--action-items", type=int, nargs="+", default=[100, 1000, 5000])
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            new = json.load(f)
+        return 1 if compare(base, new, args.threshold) else 0
+
+    doc = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2, default=str)
+    print(f"results -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,7 +16,10 @@ except Exception:
 
 ENV_KEYS = [
     "MYSQL_HOST", "MYSQL_USER", "MYSQL_PASSWORD", "MYSQL_DB",
-    "BASE_DIR", "OPENAI_API_KEY", "GPT_MODEL", "ASR_MODEL", "AUTOSAVE_SEC"
+    "BASE_DIR", "OPENAI_API_KEY", "GPT_MODEL", "ASR_MODEL", "AUTOSAVE_SEC",
+    "ASR_VAD", "ASR_WORD_TIMESTAMPS", "ASR_WORKERS", "ASR_CPU_THREADS", "GPT_CONCURRENCY",
+    "GPT_CHUNK_TOKENS", "GPT_CACHE_MB", "GPT_CACHE_TTL_SEC",
+    "DB_POOL_SIZE", "METRICS_PORT", "METRICS_JSONL",
 ]
 
 
@@ -31,6 +34,17 @@ class AppConfig:
     gpt_model: str = "gpt-4o-mini"
     asr_model: str = "medium"
     autosave_sec: int = 2
+    asr_vad: bool = True  # bỏ qua đoạn im lặng trước khi decode Whisper
+    asr_word_timestamps: bool = False  # Whisper trả thêm timestamp từng từ (chậm hơn ~10–20%)
+    asr_workers: int = 0  # số tiến trình ASR song song cho file dài (0 = tự động)
+    asr_cpu_threads: int = 4  # số luồng CTranslate2 mỗi tiến trình
+    gpt_concurrency: int = 4  # số request chat API chạy đồng thời (chung cả process)
+    gpt_chunk_tokens: int = 3000  # ngân sách token mỗi chunk transcript gửi GPT
+    gpt_cache_mb: int = 256  # dung lượng cache kết quả GPT trên đĩa (0 = tắt)
+    gpt_cache_ttl_sec: int = 0  # thời hạn một mục cache (0 = không hết hạn)
+    db_pool_size: int = 5  # số kết nối MySQL tối đa trong pool
+    metrics_port: int = 0  # cổng HTTP /metrics (Prometheus) trên 127.0.0.1 (0 = tắt)
+    metrics_jsonl: str = ""  # file JSONL ghi từng số đo (rỗng = tắt)
 
     @classmethod
     def from_env(cls) -> "AppConfig":
@@ -39,6 +53,11 @@ class AppConfig:
             load_dotenv(override=False)
         def _get(name, default):
             return os.getenv(name, default)
+        def _get_bool(name, default: bool) -> bool:
+            val = os.getenv(name)
+            if val is None or val.strip() == "":
+                return default
+            return val.strip().lower() in ("1", "true", "yes", "y", "on")
 
         cfg = cls(
             mysql_host=_get("MYSQL_HOST", "localhost"),
@@ -50,6 +69,17 @@ class AppConfig:
             gpt_model=_get("GPT_MODEL", "gpt-4o-mini"),
             asr_model=_get("ASR_MODEL", "medium"),
             autosave_sec=int(_get("AUTOSAVE_SEC", "2") or 2),
+            asr_vad=_get_bool("ASR_VAD", True),
+            asr_word_timestamps=_get_bool("ASR_WORD_TIMESTAMPS", False),
+            asr_workers=int(_get("ASR_WORKERS", "0") or 0),
+            asr_cpu_threads=int(_get("ASR_CPU_THREADS", "4") or 4),
+            gpt_concurrency=int(_get("GPT_CONCURRENCY", "4") or 4),
+            gpt_chunk_tokens=int(_get("GPT_CHUNK_TOKENS", "3000") or 3000),
+            gpt_cache_mb=int(_get("GPT_CACHE_MB", "256") or 256),
+            gpt_cache_ttl_sec=int(_get("GPT_CACHE_TTL_SEC", "0") or 0),
+            db_pool_size=int(_get("DB_POOL_SIZE", "5") or 5),
+            metrics_port=int(_get("METRICS_PORT", "0") or 0),
+            metrics_jsonl=_get("METRICS_JSONL", ""),
         )
         return cfg
 
@@ -84,6 +114,17 @@ def save_config(new_cfg: AppConfig, env_path: Optional[Path] = None) -> Path:
         f"GPT_MODEL={new_cfg.gpt_model}",
         f"ASR_MODEL={new_cfg.asr_model}",
         f"AUTOSAVE_SEC={new_cfg.autosave_sec}",
+        f"ASR_VAD={int(new_cfg.asr_vad)}",
+        f"ASR_WORD_TIMESTAMPS={int(new_cfg.asr_word_timestamps)}",
+        f"ASR_WORKERS={new_cfg.asr_workers}",
+        f"ASR_CPU_THREADS={new_cfg.asr_cpu_threads}",
+        f"GPT_CONCURRENCY={new_cfg.gpt_concurrency}",
+        f"GPT_CHUNK_TOKENS={new_cfg.gpt_chunk_tokens}",
+        f"GPT_CACHE_MB={new_cfg.gpt_cache_mb}",
+        f"GPT_CACHE_TTL_SEC={new_cfg.gpt_cache_ttl_sec}",
+        f"DB_POOL_SIZE={new_cfg.db_pool_size}",
+        f"METRICS_PORT={new_cfg.metrics_port}",
+        f"METRICS_JSONL={new_cfg.metrics_jsonl}",
         "",
     ]
     env_path.write_text("\n".join(lines), encoding="utf-8")
@@ -91,16 +132,40 @@ def save_config(new_cfg: AppConfig, env_path: Optional[Path] = None) -> Path:
     return env_path
 
 
+_listeners: list = []
+
+
+def add_config_listener(fn) -> None:
+    """
+    Đăng ký callback fn(old_cfg, new_cfg), được gọi mỗi lần set_config().
+    """
+    _listeners.append(fn)
+
+
 def set_config(new_cfg: AppConfig):
     """
-    Cập nhật CONFIG đang chạy (in-memory).
+    Cập nhật CONFIG đang chạy (in-memory) và báo cho các listener.
     """
     global CONFIG
+    old_cfg = CONFIG
     CONFIG = new_cfg
     logger.info(
         "CONFIG updated: host=%s db=%s base_dir=%s gpt_model=%s asr_model=%s autosave=%ss",
         CONFIG.mysql_host, CONFIG.mysql_db, CONFIG.base_dir, CONFIG.gpt_model, CONFIG.asr_model, CONFIG.autosave_sec
     )
+    for fn in list(_listeners):
+        try:
+            fn(old_cfg, new_cfg)
+        except Exception as e:
+            logger.exception("Config listener %r failed: %s", fn, e)
+
+
+def get_config() -> AppConfig:
+    """
+    CONFIG hiện hành. Dùng hàm này thay vì `from core.config import CONFIG`
+    ở những chỗ cần thấy thay đổi sau set_config().
+    """
+    return CONFIG
 
 
 def config_as_dict() -> dict:
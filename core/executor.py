@@ -0,0 +1,303 @@
+# -----------------------------------------------
+# file: meeting_assistant/core/executor.py
+# -----------------------------------------------
+"""Application-wide task executor.
+
+Blocking work (MySQL, GPT, ASR, file I/O) runs on small bounded worker pools,
+one per resource, so a slow MySQL host can't starve GPT calls and nothing
+blocks the Tk event loop:
+
+    EXECUTOR.submit("db", get_session, uuid, on_done=self._fill, owner=self)
+
+Completion callbacks never touch Tk from a worker thread: they are queued and
+run on the Tk thread by a single dispatcher polled with `after` (installed by
+App). Without a dispatcher (CLI, batch) callbacks run inline on the worker.
+
+Cancellation is cooperative: `TaskHandle.cancel()` drops a queued task, and a
+running task stops reporting (its callbacks are discarded); tasks submitted
+with `pass_token=True` can also check the CancelToken and stop early.
+Submitting with `key=` cancels the previous task with the same key, e.g. a
+search query superseded by the next keystroke.
+"""
+from __future__ import annotations
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from typing import Any, Callable, Dict, Optional
+
+from core import metrics
+from core.config import get_config
+from core.logger import logger
+
+# Số worker mỗi pool; 0 = theo DB_POOL_SIZE (không mượn quá số kết nối pool có)
+POOL_WORKERS = {"db": 0, "gpt": 4, "asr": 2, "io": 2}
+DISPATCH_POLL_MS = 30
+DISPATCH_BATCH = 200  # tối đa callback mỗi lượt poll, tránh giữ Tk quá lâu
+
+
+class CancelToken:
+    __slots__ = ("_ev",)
+
+    def __init__(self):
+        self._ev = threading.Event()
+
+    def cancel(self):
+        self._ev.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._ev.is_set()
+
+    def raise_if_cancelled(self):
+        if self._ev.is_set():
+            raise CancelledError()
+
+
+class TaskHandle:
+    def __init__(self, name: str, pool: str, future: Future, token: CancelToken):
+        self.name = name
+        self.pool = pool
+        self.future = future
+        self.token = token
+
+    def cancel(self) -> bool:
+        """Huỷ task; True nếu task chưa kịp chạy."""
+        self.token.cancel()
+        return self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        return self.future.result(timeout)
+
+
+class _WorkerPool:
+    """Pool luồng daemon có giới hạn (không chặn lúc thoát app như ThreadPoolExecutor)."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = max(1, int(size))
+        self._q: queue.SimpleQueue = queue.SimpleQueue()
+        self._threads: list = []
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "running": 0, "busy_sec": 0.0}
+
+    def count(self, what: str):
+        with self._lock:
+            self.stats[what] += 1
+
+    def submit(self, job: Callable[[], None]):
+        with self._lock:
+            self.stats["submitted"] += 1
+            if len(self._threads) < self.size:
+                t = threading.Thread(target=self._run, name=f"{self.name}-{len(self._threads)}", daemon=True)
+                self._threads.append(t)
+                t.start()
+        self._q.put(job)
+
+    def _run(self):
+        while True:
+            job = self._q.get()
+            if job is None:
+                return
+            try:
+                job()
+            except Exception as e:  # job tự bắt lỗi; đây chỉ là lưới an toàn
+                logger.exception("Worker %s: unexpected error: %s", self.name, e)
+
+    def shutdown(self):
+        with self._lock:
+            n = len(self._threads)
+        for _ in range(n):
+            self._q.put(None)
+
+
+class TaskExecutor:
+    def __init__(self, workers: Optional[Dict[str, int]] = None):
+        self._workers = dict(POOL_WORKERS, **(workers or {}))
+        self._pools: Dict[str, _WorkerPool] = {}
+        self._keyed: Dict[str, TaskHandle] = {}
+        self._lock = threading.Lock()
+        self._dispatch: queue.SimpleQueue = queue.SimpleQueue()
+        self._root = None
+        self._poll_job = None
+        self._closed = False
+
+    # ---------- pools ----------
+    def _pool(self, name: str) -> _WorkerPool:
+        with self._lock:
+            pool = self._pools.get(name)
+            if pool is None:
+                if name not in self._workers:
+                    raise ValueError(f"Unknown executor pool: {name!r}")
+                size = self._workers[name] or get_config().db_pool_size
+                pool = self._pools[name] = _WorkerPool(name, size)
+            return pool
+
+    def submit(
+        self,
+        pool: str,
+        fn: Callable[..., Any],
+        *args,
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        key: Optional[str] = None,
+        owner=None,
+        pass_token: bool = False,
+        **kwargs,
+    ) -> TaskHandle:
+        """
+        Chạy fn(*args, **kwargs) trên pool `pool` ("db" | "gpt" | "asr" | "io").
+        on_done(result) / on_error(exc) chạy trên luồng Tk (qua dispatcher).
+        - key: task mới cùng key huỷ task cũ.
+        - owner: widget; bỏ callback nếu widget đã bị huỷ (cửa sổ đã đóng).
+        - pass_token: truyền CancelToken làm tham số đầu tiên để fn tự dừng sớm.
+        Không có on_error -> lỗi được ghi log.
+        """
+        wp = self._pool(pool)
+        name = key or getattr(fn, "__qualname__", repr(fn))
+        handle = TaskHandle(name, pool, Future(), CancelToken())
+        if key:
+            with self._lock:
+                prev, self._keyed[key] = self._keyed.get(key), handle
+            if prev is not None:
+                prev.cancel()
+
+        def job():
+            fut, tok = handle.future, handle.token
+            if not fut.set_running_or_notify_cancel():
+                wp.count("cancelled")
+                return
+            t0 = time.perf_counter()
+            with wp._lock:
+                wp.stats["running"] += 1
+            try:
+                if tok.cancelled:
+                    raise CancelledError()
+                res = fn(tok, *args, **kwargs) if pass_token else fn(*args, **kwargs)
+            except BaseException as e:
+                fut.set_exception(e)
+            else:
+                fut.set_result(res)
+            finally:
+                with wp._lock:
+                    wp.stats["running"] -= 1
+                    wp.stats["busy_sec"] += time.perf_counter() - t0
+                if key:
+                    with self._lock:
+                        if self._keyed.get(key) is handle:
+                            del self._keyed[key]
+            self._complete(wp, handle, on_done, on_error, owner)
+
+        wp.submit(job)
+        return handle
+
+    def _complete(self, wp: _WorkerPool, handle: TaskHandle, on_done, on_error, owner):
+        exc = handle.future.exception()
+        if handle.token.cancelled or isinstance(exc, CancelledError):
+            wp.count("cancelled")
+            logger.debug("Task %s cancelled", handle.name)
+            return
+        if exc is not None:
+            wp.count("failed")
+            if on_error is None:
+                logger.error("Task %s failed: %s", handle.name, exc, exc_info=exc)
+                return
+            self.call_soon(lambda: on_error(exc), owner=owner, token=handle.token)
+            return
+        wp.count("completed")
+        if on_done is not None:
+            res = handle.future.result()
+            self.call_soon(lambda: on_done(res), owner=owner, token=handle.token)
+
+    def cancel(self, key: str) -> bool:
+        with self._lock:
+            handle = self._keyed.pop(key, None)
+        return handle.cancel() if handle is not None else False
+
+    # ---------- Tk dispatcher ----------
+    def install(self, root, poll_ms: int = DISPATCH_POLL_MS):
+        """Gắn dispatcher vào Tk root: callback của task được chạy trên luồng Tk."""
+        self._root = root
+        self._poll_ms = poll_ms
+        self._poll_job = root.after(poll_ms, self._drain)
+
+    def call_soon(self, fn: Callable[[], None], owner=None, token: Optional[CancelToken] = None):
+        """Lên lịch fn() trên luồng Tk (an toàn khi gọi từ bất kỳ luồng nào)."""
+        if self._closed:
+            return  # app đã đóng: không còn Tk để cập nhật
+        if self._root is None:
+            self._invoke(fn, owner, token)
+        else:
+            self._dispatch.put((fn, owner, token))
+
+    @staticmethod
+    def _invoke(fn, owner, token):
+        if token is not None and token.cancelled:
+            return
+        if owner is not None:
+            try:
+                if not owner.winfo_exists():
+                    return
+            except Exception:
+                return
+        try:
+            fn()
+        except Exception as e:
+            logger.exception("Task callback error: %s", e)
+
+    def _drain(self):
+        for _ in range(DISPATCH_BATCH):
+            try:
+                fn, owner, token = self._dispatch.get_nowait()
+            except queue.Empty:
+                break
+            self._invoke(fn, owner, token)
+        if self._root is not None:
+            self._poll_job = self._root.after(self._poll_ms, self._drain)
+
+    # ---------- lifecycle ----------
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            pools = dict(self._pools)
+        out = {}
+        for name, wp in pools.items():
+            with wp._lock:
+                out[name] = dict(wp.stats, workers=wp.size, threads=len(wp._threads), queued=wp._q.qsize())
+        return out
+
+    def shutdown(self):
+        """Huỷ mọi task có key, dừng dispatcher và worker (task đang chạy không bị chờ)."""
+        with self._lock:
+            keyed, self._keyed = list(self._keyed.values()), {}
+            pools = list(self._pools.values())
+        for h in keyed:
+            h.cancel()
+        if self._root is not None and self._poll_job is not None:
+            try:
+                self._root.after_cancel(self._poll_job)
+            except Exception:
+                pass
+        self._root = None
+        self._closed = self._poll_job is not None
+        for wp in pools:
+            wp.shutdown()
+
+
+EXECUTOR = TaskExecutor()
+
+
+def _executor_gauges():
+    out = []
+    for pool, st in EXECUTOR.stats().items():
+        out += [("executor_queued", {"pool": pool}, st["queued"]), ("executor_running", {"pool": pool}, st["running"])]
+    return out
+
+
+metrics.register_collector(_executor_gauges)
@@ -0,0 +1,409 @@
+# ------------------------------
+# file: meeting_assistant/core/jobs.py
+# ------------------------------
+"""Resumable, checkpointed processing job for one meeting session.
+
+Every session owns the folder `SessionManager.create` allocates
+(`base_dir/<uuid>`); the job keeps its state and stage outputs there:
+
+    job.json                 manifest: stage states, meeting meta, audio path
+    transcript.json          transcript text (+ whether segments still match it)
+    segments.seg             ASR segments/word timestamps (asr.segment_store)
+    summarize.partials.jsonl per-chunk GPT summaries, appended as they finish
+    summary.json             final summary
+    extract.partials.jsonl   per-chunk extraction results
+    extracted.json           merged extraction
+
+Stages run record -> asr -> summarize -> extract -> persist. A finished stage
+is never re-run; an interrupted summarize/extract replays the chunk calls it
+already paid for from the partials file. Editing the transcript resets the
+downstream stages, but unchanged chunks still hit their partials.
+Writes are atomic (tmp + os.replace) so a crash never leaves a torn file.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core import metrics
+from core.config import get_config
+from core.logger import logger
+
+STAGES = ("record", "asr", "summarize", "extract", "persist")
+MANIFEST = "job.json"
+STALE_SEGMENTS = "segments.asr.seg"  # segment ASR không còn khớp transcript đã sửa tay
+
+_lock = threading.Lock()
+_jobs: Dict[str, "MeetingJob"] = {}  # uuid -> job đang mở (một object / folder)
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _write_json(path: str, obj: Any) -> None:
+    """Ghi atomic: file tạm cùng thư mục rồi os.replace."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _read_json(path: str, default: Any = None) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except Exception as e:
+        logger.warning("Corrupt checkpoint %s: %s", path, e)
+        return default
+
+
+class PartialMemo:
+    """
+    Kết quả GPT từng chunk, khoá = sha256(text chunk). File JSONL append-only:
+    dòng cuối bị cắt dở khi crash thì bỏ qua lúc đọc.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            data: Dict[str, Any] = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            rec = json.loads(line)
+                            data[rec["k"]] = rec["v"]
+                        except Exception:
+                            continue
+            except FileNotFoundError:
+                pass
+            self._data = data
+        return self._data
+
+    def get(self, text: str) -> Any:
+        with self._lock:
+            return self._load().get(_digest(text))
+
+    def put(self, text: str, value: Any) -> None:
+        key = _digest(text)
+        line = json.dumps({"k": key, "v": value}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._load()[key] = value
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+
+def memoized(fn: Callable[[str], Any], memo: Optional[PartialMemo]) -> Callable[[str], Any]:
+    """Bọc lời gọi GPT theo chunk: trúng memo thì trả luôn, không thì gọi rồi ghi lại."""
+    if memo is None:
+        return fn
+
+    def call(text: str):
+        hit = memo.get(text)
+        if hit is not None:
+            metrics.inc("gpt_chunk_memo_total", result="hit")
+            return hit
+        metrics.inc("gpt_chunk_memo_total", result="miss")
+        out = fn(text)
+        memo.put(text, out)
+        return out
+    return call
+
+
+class MeetingJob:
+    def __init__(self, folder: str, data: dict):
+        self.folder = folder
+        self.data = data
+        self._lock = threading.RLock()
+        self._memos: Dict[str, PartialMemo] = {}
+
+    # ---------- open / create ----------
+    @classmethod
+    def create(cls, session_uuid: str, folder: Optional[str] = None, audio_path: str = "") -> "MeetingJob":
+        """Job mới cho session (folder mặc định base_dir/<uuid>); đã có job.json thì mở lại."""
+        folder = folder or os.path.join(get_config().base_dir, session_uuid)
+        with _lock:
+            job = _jobs.get(session_uuid)
+            if job is None:
+                os.makedirs(folder, exist_ok=True)
+                data = _read_json(os.path.join(folder, MANIFEST))
+                if not data:
+                    data = {
+                        "uuid": session_uuid, "created_at": _now(), "updated_at": _now(),
+                        "audio_path": audio_path, "submitted": False, "meta": {}, "error": "",
+                        "stages": {s: {"status": "pending"} for s in STAGES},
+                    }
+                job = cls(folder, data)
+                _jobs[session_uuid] = job
+                if not os.path.exists(job._path(MANIFEST)):
+                    job.save()
+        if audio_path and job.data.get("audio_path") != audio_path:
+            job.data["audio_path"] = audio_path
+            job.save()
+        return job
+
+    @classmethod
+    def load(cls, folder: str) -> Optional["MeetingJob"]:
+        data = _read_json(os.path.join(folder, MANIFEST))
+        if not data or not data.get("uuid"):
+            return None
+        with _lock:
+            job = _jobs.get(data["uuid"])
+            if job is None:
+                job = _jobs[data["uuid"]] = cls(folder, data)
+        return job
+
+    # ---------- manifest ----------
+    @property
+    def uuid(self) -> str:
+        return self.data["uuid"]
+
+    @property
+    def audio_path(self) -> str:
+        return self.data.get("audio_path") or ""
+
+    @property
+    def submitted(self) -> bool:
+        return bool(self.data.get("submitted"))
+
+    @property
+    def meta(self) -> dict:
+        return self.data.get("meta") or {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.folder, name)
+
+    def save(self) -> None:
+        with self._lock:
+            self.data["updated_at"] = _now()
+            _write_json(self._path(MANIFEST), self.data)
+
+    def is_done(self, stage: str) -> bool:
+        return self.data["stages"].get(stage, {}).get("status") == "done"
+
+    def pending(self) -> List[str]:
+        return [s for s in STAGES if not self.is_done(s)]
+
+    @property
+    def finished(self) -> bool:
+        return not self.pending()
+
+    def mark_done(self, stage: str, sec: Optional[float] = None) -> None:
+        with self._lock:
+            st = {"status": "done", "at": _now()}
+            if sec is not None:
+                st["sec"] = round(sec, 3)
+            self.data["stages"][stage] = st
+            self.data["error"] = ""
+            self.save()
+
+    def mark_failed(self, stage: str, err: str) -> None:
+        with self._lock:
+            self.data["stages"][stage] = {"status": "failed", "at": _now(), "error": str(err)[:500]}
+            self.data["error"] = f"{stage}: {err}"[:500]
+            self.save()
+
+    def reset(self, *stages: str) -> None:
+        with self._lock:
+            for s in stages:
+                self.data["stages"][s] = {"status": "pending"}
+            self.save()
+
+    def submit(self, **meta) -> None:
+        """Người dùng đã bấm Save: lưu meta (title, topic, thời gian...) để resume được."""
+        with self._lock:
+            self.data["meta"] = {**self.meta, **meta}
+            self.data["submitted"] = True
+            # Lưu lại lần nữa (vd. đổi title) -> ghi DB lại, GPT giữ nguyên nếu transcript không đổi
+            self.data["stages"]["persist"] = {"status": "pending"}
+            self.save()
+
+    # ---------- stage outputs ----------
+    def finish_recording(self, audio_path: str = "") -> None:
+        with self._lock:
+            if audio_path:
+                self.data["audio_path"] = audio_path
+            self.mark_done("record")
+
+    def set_transcript(self, full_text: str, segments: Optional[list], sec: Optional[float] = None) -> None:
+        """
+        Checkpoint ASR. Transcript khác bản đã lưu -> các stage GPT/DB phải chạy lại.
+        segments=None: segment ASR đã lưu vẫn khớp text (chưa sửa / chỉ khác khoảng trắng) thì giữ
+        nguyên segments.seg; text đã sửa tay thì đổi tên thành segments.asr.seg — không dùng cho
+        phụ đề/export nữa, chỉ còn làm ranh giới chunk.
+        """
+        from asr.segment_store import FILENAME, write_segments
+        with self._lock:
+            digest = _digest(full_text)
+            changed = digest != self.data.get("transcript_sha256")
+            if segments:
+                write_segments(self._path(FILENAME), segments)
+                _remove(self._path(STALE_SEGMENTS))
+            else:
+                segments = self._reuse_segments(full_text)
+            _write_json(self._path("transcript.json"),
+                        {"full_text": full_text, "segments": FILENAME if segments else None})
+            self.data["transcript_sha256"] = digest
+            if changed:
+                for s in ("summarize", "extract", "persist"):
+                    self.data["stages"][s] = {"status": "pending"}
+            if not self.is_done("record"):
+                self.data["stages"]["record"] = {"status": "done", "at": _now()}
+            self.mark_done("asr", sec)
+
+    def _reuse_segments(self, full_text: str) -> Optional[list]:
+        """Segment ASR đã lưu (kể cả bản .asr.seg) còn khớp full_text -> đặt lại làm segments.seg."""
+        from asr.segment_store import FILENAME, SegmentStore
+        from nlp.chunker import segments_match
+        current, stale = self._path(FILENAME), self._path(STALE_SEGMENTS)
+        for path in (current, stale):
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                continue
+            segments = SegmentStore.open(path).to_dicts(with_words=True)
+            if segments_match(full_text, segments):
+                if path == stale:
+                    os.replace(stale, current)
+                return segments
+        if os.path.exists(current):
+            os.replace(current, stale)
+        return None
+
+    def transcript(self) -> Tuple[str, Optional[list]]:
+        """(full_text, segments) — segments None nếu transcript đã sửa tay không còn khớp."""
+        data = _read_json(self._path("transcript.json"), {}) or {}
+        segments = data.get("segments")
+        if isinstance(segments, str):
+            store = self.segment_store()
+            segments = store.to_dicts() if store is not None else None
+        return data.get("full_text") or "", segments
+
+    def segment_store(self, stale: bool = False):
+        """
+        SegmentStore (memmap) của ASR, kể cả word timestamps; None nếu chưa có.
+        stale=True: nếu transcript đã sửa tay, trả segment ASR cũ (chỉ dùng làm ranh giới chunk).
+        """
+        from asr.segment_store import SegmentStore, segments_path
+        for path in (segments_path(self.folder),) + ((self._path(STALE_SEGMENTS),) if stale else ()):
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                return SegmentStore.open(path)
+        return None
+
+    def set_summary(self, summary: str, sec: Optional[float] = None) -> None:
+        _write_json(self._path("summary.json"), {"summary": summary})
+        self.mark_done("summarize", sec)
+
+    def summary(self) -> str:
+        return (_read_json(self._path("summary.json"), {}) or {}).get("summary") or ""
+
+    def set_extracted(self, extracted: dict, sec: Optional[float] = None) -> None:
+        _write_json(self._path("extracted.json"), extracted)
+        self.mark_done("extract", sec)
+
+    def extracted(self) -> dict:
+        return _read_json(self._path("extracted.json"), {}) or {}
+
+    def memo(self, stage: str) -> PartialMemo:
+        with self._lock:
+            if stage not in self._memos:
+                self._memos[stage] = PartialMemo(self._path(f"{stage}.partials.jsonl"))
+            return self._memos[stage]
+
+    def describe(self) -> str:
+        done = [s for s in STAGES if self.is_done(s)]
+        return f"{self.uuid} [{'/'.join(done) or '-'}]" + (f" error={self.data['error']}" if self.data.get("error") else "")
+
+
+def find_jobs(base_dir: Optional[str] = None) -> List[MeetingJob]:
+    """Mọi job trong base_dir (mới nhất trước)."""
+    base_dir = base_dir or get_config().base_dir
+    out = []
+    try:
+        names = os.listdir(base_dir)
+    except FileNotFoundError:
+        return []
+    for name in names:
+        folder = os.path.join(base_dir, name)
+        if os.path.isfile(os.path.join(folder, MANIFEST)):
+            job = MeetingJob.load(folder)
+            if job:
+                out.append(job)
+    out.sort(key=lambda j: j.data.get("updated_at") or "", reverse=True)
+    return out
+
+
+def unfinished_jobs(base_dir: Optional[str] = None, submitted: Optional[bool] = None) -> List[MeetingJob]:
+    return [
+        j for j in find_jobs(base_dir)
+        if not j.finished and (submitted is None or j.submitted == submitted)
+    ]
+
+
+def run_job(
+    job: MeetingJob,
+    worker=None,
+    summarizer=None,
+    extractor=None,
+    on_stage: Optional[Callable[[str, float], None]] = None,
+):
+    """
+    Chạy tiếp các stage còn thiếu của job đã submit (blocking, gọi từ luồng nền).
+    ASR chỉ chạy khi chưa có transcript.json (cần `worker` và file audio).
+    """
+    from core.save_pipeline import SaveRequest, save_meeting
+
+    if not job.submitted:
+        raise ValueError(f"job {job.uuid} has not been submitted")
+    if not job.is_done("asr"):
+        if not job.audio_path or not os.path.exists(job.audio_path):
+            raise FileNotFoundError(f"audio for job {job.uuid} not found: {job.audio_path!r}")
+        if worker is None:
+            from asr.whisper_worker import WhisperWorker
+            worker = WhisperWorker(get_config().asr_model, language="vi")
+        t0 = time.perf_counter()
+        try:
+            full_text, segments = worker.transcribe_file(job.audio_path)
+        except Exception as e:
+            job.mark_failed("asr", e)
+            raise
+        job.set_transcript(full_text, segments, time.perf_counter() - t0)
+        if on_stage:
+            on_stage("asr", time.perf_counter() - t0)
+    full_text, segments = job.transcript()
+    meta = job.meta
+    req = SaveRequest(
+        session_uuid=job.uuid, title=meta.get("title", ""), main_topic=meta.get("main_topic", ""),
+        start_time=meta.get("start_time", ""), end_time=meta.get("end_time", ""),
+        duration_min=int(meta.get("duration_min") or 0), audio_path=job.audio_path,
+        full_text=full_text, segments=segments,
+    )
+    return save_meeting(req, summarizer, extractor, on_stage=on_stage, job=job)
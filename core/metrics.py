@@ -0,0 +1,353 @@
+# -----------------------------------------------
+# file: meeting_assistant/core/metrics.py
+# -----------------------------------------------
+"""Process-wide metrics: counters, histograms and timers.
+
+    from core import metrics
+
+    with metrics.timer("asr_transcribe_seconds", mode="file"):
+        ...
+    metrics.inc("gpt_tokens_total", usage.prompt_tokens, type="prompt")
+    metrics.observe("asr_rtf", wall_sec / audio_sec, mode="file")
+
+Exports (both off by default, see start_from_config):
+  - Prometheus text format over HTTP: METRICS_PORT -> http://127.0.0.1:PORT/metrics
+    (p50/p99 per stage via histogram_quantile() on the *_bucket series).
+  - JSONL: METRICS_JSONL -> one line per observation
+    {"ts", "name", "labels", "value"}; `python -m core.metrics FILE` prints
+    count / p50 / p90 / p99 per series.
+
+Gauges that already live elsewhere (DB pool, executor queues) are pulled at
+export time through `register_collector`.
+"""
+from __future__ import annotations
+import atexit
+import bisect
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.logger import logger
+
+# Giây: đủ rộng cho cả query DB (ms) lẫn ASR/GPT (phút)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0)
+BUCKETS: Dict[str, Tuple[float, ...]] = {
+    "asr_rtf": RATIO_BUCKETS,
+}
+JSONL_FLUSH_SEC = 5.0
+JSONL_FLUSH_LINES = 500
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # ô cuối = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, v: float):
+        self.counts[bisect.bisect_left(self.bounds, v)] += 1
+        self.count += 1
+        self.sum += v
+        self.min = min(self.min, v)
+        self.max = max(self.max, v)
+
+    def quantile(self, q: float) -> float:
+        """Ước lượng phân vị từ bucket (nội suy tuyến tính như histogram_quantile)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = self.bounds[i - 1] if i > 0 else min(self.min, self.bounds[0])
+                hi = self.bounds[i] if i < len(self.bounds) else self.max
+                lo, hi = max(lo, self.min), min(hi, self.max)
+                return lo + (hi - lo) * ((rank - seen) / c)
+            seen += c
+        return self.max
+
+
+class _JsonlSink:
+    """Ghi từng observation ra file JSONL; buffer + flush định kỳ ở luồng nền."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._buf: List[str] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        threading.Thread(target=self._loop, name="metrics-jsonl", daemon=True).start()
+        atexit.register(self.flush)
+
+    def write(self, name: str, labels: LabelKey, value: float):
+        line = json.dumps({"ts": round(time.time(), 3), "name": name, "labels": dict(labels), "value": value},
+                          ensure_ascii=False)
+        with self._lock:
+            self._buf.append(line)
+            full = len(self._buf) >= JSONL_FLUSH_LINES
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            buf, self._buf = self._buf, []
+            if not buf:
+                return
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(buf) + "\n")
+            except Exception as e:
+                logger.warning("metrics: cannot write %s: %s", self.path, e)
+
+    def _loop(self):
+        while not self._stop.wait(JSONL_FLUSH_SEC):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._hists: Dict[Tuple[str, LabelKey], _Histogram] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, dict, float]]]] = []
+        self._sink: Optional[_JsonlSink] = None
+
+    # ---------- ghi ----------
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        lk = _labels(labels)
+        key = (name, lk)
+        with self._lock:
+            h = self._hists.get(key)
+            if h is None:
+                h = self._hists[key] = _Histogram(BUCKETS.get(name, LATENCY_BUCKETS))
+            h.observe(float(value))
+            sink = self._sink
+        if sink is not None:
+            sink.write(name, lk, float(value))
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Đo thời gian khối `with` vào histogram `name`; lỗi -> thêm counter `{name}_errors_total`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator: như timer() cho cả hàm."""
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def register_collector(self, fn: Callable[[], Iterable[Tuple[str, dict, float]]]):
+        """fn() -> [(gauge_name, labels, value)], gọi lúc export."""
+        self._collectors.append(fn)
+
+    def set_jsonl(self, path: Optional[str]):
+        with self._lock:
+            old, self._sink = self._sink, (_JsonlSink(path) if path else None)
+        if old is not None:
+            old.close()
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._hists.clear()
+
+    # ---------- đọc ----------
+    def _gauges(self) -> List[Tuple[str, LabelKey, float]]:
+        out = []
+        for fn in list(self._collectors):
+            try:
+                out += [(n, _labels(l), float(v)) for n, l, v in fn()]
+            except Exception as e:
+                logger.debug("metrics collector %r failed: %s", fn, e)
+        return out
+
+    def snapshot(self) -> dict:
+        """Dict gọn để log / bench: counters, histograms (count, sum, p50/p90/p99), gauges."""
+        with self._lock:
+            counters = dict(self._counters)
+            hists = {k: (h.count, h.sum, h.min, h.max, h.quantile(0.5), h.quantile(0.9), h.quantile(0.99))
+                     for k, h in self._hists.items()}
+        fmt = lambda name, lk: name + ("{" + ",".join(f"{k}={v}" for k, v in lk) + "}" if lk else "")
+        return {
+            "counters": {fmt(*k): v for k, v in sorted(counters.items())},
+            "histograms": {
+                fmt(*k): {"count": c, "sum": s, "min": mn, "max": mx, "p50": p50, "p90": p90, "p99": p99}
+                for k, (c, s, mn, mx, p50, p90, p99) in sorted(hists.items())
+            },
+            "gauges": {fmt(n, lk): v for n, lk, v in self._gauges()},
+        }
+
+    def render_prometheus(self) -> str:
+        def lbl(lk: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            items = lk + extra
+            if not items:
+                return ""
+            esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            hists = sorted(
+                (k, (h.bounds, list(h.counts), h.count, h.sum)) for k, h in self._hists.items()
+            )
+        lines: List[str] = []
+        typed = set()
+        for (name, lk), v in counters:
+            if name not in typed:
+                typed.add(name); lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{lbl(lk)} {v:g}")
+        for (name, lk), (bounds, counts, count, total) in hists:
+            if name not in typed:
+                typed.add(name); lines.append(f"# TYPE {name} histogram")
+            cum = 0
+            for b, c in zip(bounds, counts):
+                cum += c
+                lines.append(f"{name}_bucket{lbl(lk, (('le', f'{b:g}'),))} {cum}")
+            lines.append(f"{name}_bucket{lbl(lk, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{lbl(lk)} {total:.6f}")
+            lines.append(f"{name}_count{lbl(lk)} {count}")
+        for name, lk, v in sorted(self._gauges()):
+            if name not in typed:
+                typed.add(name); lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{lbl(lk)} {v:g}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+# Hàm tắt ở mức module (dùng phổ biến nhất)
+inc = METRICS.inc
+observe = METRICS.observe
+timer = METRICS.timer
+timed = METRICS.timed
+register_collector = METRICS.register_collector
+snapshot = METRICS.snapshot
+
+
+# ---------- HTTP /metrics ----------
+_server = None
+
+
+def start_http_server(port: int, host: str = "127.0.0.1"):
+    """Phục vụ /metrics (Prometheus text) và /metrics.json (snapshot) ở luồng nền."""
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, ctype = json.dumps(METRICS.snapshot(), ensure_ascii=False).encode("utf-8"), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, ctype = METRICS.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404); return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            logger.debug("metrics http: " + fmt, *args)
+
+    if _server is not None:
+        return _server
+    _server = ThreadingHTTPServer((host, int(port)), Handler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Metrics endpoint on http://%s:%d/metrics", host, _server.server_address[1])
+    return _server
+
+
+def start_from_config(cfg=None):
+    """Bật exporter theo CONFIG: METRICS_PORT (0 = tắt), METRICS_JSONL (rỗng = tắt)."""
+    from core.config import get_config
+    cfg = cfg or get_config()
+    if cfg.metrics_jsonl:
+        METRICS.set_jsonl(cfg.metrics_jsonl)
+        logger.info("Metrics JSONL -> %s", cfg.metrics_jsonl)
+    if cfg.metrics_port:
+        try:
+            start_http_server(cfg.metrics_port)
+        except OSError as e:
+            logger.warning("Cannot start metrics endpoint on port %s: %s", cfg.metrics_port, e)
+
+
+# ---------- đọc lại JSONL ----------
+def summarize_jsonl(path: str) -> Dict[str, dict]:
+    """Phân vị chính xác (không qua bucket) cho mỗi series trong file JSONL."""
+    series: Dict[str, List[float]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            lk = ",".join(f"{k}={v}" for k, v in sorted(rec.get("labels", {}).items()))
+            series.setdefault(f"{rec['name']}{{{lk}}}" if lk else rec["name"], []).append(float(rec["value"]))
+
+    def pct(vals: List[float], q: float) -> float:
+        return vals[min(len(vals) - 1, int(q * len(vals)))]
+
+    out = {}
+    for name, vals in sorted(series.items()):
+        vals.sort()
+        out[name] = {"count": len(vals), "p50": pct(vals, 0.5), "p90": pct(vals, 0.9), "p99": pct(vals, 0.99),
+                     "max": vals[-1]}
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python -m core.metrics METRICS.jsonl", file=sys.stderr)
+        return 2
+    for name, st in summarize_jsonl(argv[0]).items():
+        print(f"{name:<60} n={st['count']:<7} p50={st['p50']:.4f} p90={st['p90']:.4f} "
+              f"p99={st['p99']:.4f} max={st['max']:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# -----------------------------------------------
+# file: meeting_assistant/core/save_pipeline.py
+# -----------------------------------------------
+"""Save Meeting pipeline: GPT analysis and DB writes with overlapping stages.
+
+    summarize ─┐
+    extract   ─┼─> persist: transcript + status='completed' (one transaction)
+    upsert    ─┘   (status='processing')
+
+Summarizer and Extractor are independent, and the session row does not depend
+on either, so the three run concurrently; wall time is roughly the slowest of
+them plus the final persist. Per-stage timings are returned (and
+streamed to `on_stage`) so the UI can show where the time went.
+
+With a `MeetingJob` (core.jobs) every stage checkpoints into the session
+folder: finished stages are loaded instead of re-run, and GPT chunk calls are
+memoized, so a save interrupted by a crash or network drop resumes cheaply.
+Chunking is content-defined (nlp.chunker), so re-saving after a small
+transcript correction re-runs only the edited chunk(s) and the final reduce.
+"""
+from __future__ import annotations
+import time
+from concurrent.futures import FIRST_EXCEPTION, CancelledError, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from core import metrics
+from core.executor import CancelToken
+from core.logger import logger
+
+
+@dataclass
+class SaveRequest:
+    session_uuid: str
+    title: str
+    main_topic: str
+    start_time: str
+    end_time: str
+    duration_min: int
+    audio_path: str
+    full_text: str
+    segments: Optional[List[dict]] = None
+
+
+@dataclass
+class SaveResult:
+    session_uuid: str
+    summary: str = ""
+    extracted: dict = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    wall_sec: float = 0.0
+
+    def timing_text(self) -> str:
+        parts = " ".join(f"{k}={v:.1f}s" for k, v in self.timings.items())
+        return f"{parts} | total={self.wall_sec:.1f}s"
+
+
+def save_meeting(
+    req: SaveRequest,
+    summarizer=None,
+    extractor=None,
+    on_stage: Optional[Callable[[str, float], None]] = None,
+    job=None,
+    cancel: Optional[CancelToken] = None,
+) -> SaveResult:
+    """
+    Chạy toàn bộ pipeline lưu họp (blocking, gọi từ luồng nền).
+    on_stage(name, seconds) được gọi khi mỗi stage xong (từ luồng worker).
+    Lỗi ở bất kỳ stage nào -> session đánh dấu 'failed' (nếu đã tạo) rồi raise lại; stage
+    đầu tiên lỗi dừng luôn các chunk GPT chưa gửi của stage còn lại.
+    job: MeetingJob của session -> bỏ qua stage đã xong, checkpoint từng stage.
+    cancel: CancelToken của task EXECUTOR (pass_token) -> huỷ/thay task thì dừng giữa các chunk.
+    """
+    from nlp.summarizer import Summarizer
+    from nlp.extractor import Extractor
+    from db.dao import upsert_session, insert_transcripts_bulk, update_session_status
+
+    summarizer = summarizer or Summarizer()
+    extractor = extractor or Extractor()
+    res = SaveResult(session_uuid=req.session_uuid)
+    t_start = time.perf_counter()
+    stop = _Stop(cancel)
+
+    def timed(name, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            out = fn(*args, **kwargs)
+        except Exception as e:
+            if job is not None and name in ("summarize", "extract", "persist"):
+                job.mark_failed(name, e)
+            raise
+        res.timings[name] = time.perf_counter() - t0
+        metrics.observe("save_stage_seconds", res.timings[name], stage=name)
+        if on_stage:
+            on_stage(name, res.timings[name])
+        return out
+
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="save") as ex:
+        f_session = ex.submit(
+            timed, "session", upsert_session,
+            uuid=req.session_uuid, title=req.title, main_topic=req.main_topic,
+            start_time=req.start_time, end_time=req.end_time,
+            duration_min=req.duration_min, status="processing", audio_path=req.audio_path,
+        )
+        if job is not None and job.is_done("summarize"):
+            f_summary = _done(job.summary())
+        else:
+            f_summary = ex.submit(timed, "summarize", _checkpointed, job, "summarize", summarizer.summarize,
+                                  req.full_text, req.segments, stop)
+        if job is not None and job.is_done("extract"):
+            f_extract = _done(job.extracted())
+        else:
+            f_extract = ex.submit(timed, "extract", _checkpointed, job, "extract", extractor.extract_fields,
+                                  req.full_text, req.segments, stop)
+        # Stage đầu tiên lỗi (session / summarize / extract) -> chunk GPT chưa gửi của stage khác bị bỏ
+        # (CancelledError); executor chỉ còn đợi request đang bay, kết quả chunk xong vẫn nằm trong memo
+        done, _ = wait([f_session, f_summary, f_extract], return_when=FIRST_EXCEPTION)
+        if any(f.exception() is not None for f in done):
+            stop.cancel()
+        f_session.result()
+        try:
+            res.summary = f_summary.result()
+            res.extracted = f_extract.result()
+        except Exception:
+            _mark_failed(update_session_status, req.session_uuid)
+            raise
+
+    try:
+        # Transcript + 'completed' trong một transaction; replace=True -> chạy lại (resume) không tạo bản trùng
+        timed("persist", _persist, insert_transcripts_bulk, req, res)
+    except Exception:
+        _mark_failed(update_session_status, req.session_uuid)
+        raise
+    if job is not None:
+        job.mark_done("persist", res.timings.get("persist"))
+    res.wall_sec = time.perf_counter() - t_start
+    metrics.observe("save_meeting_seconds", res.wall_sec)
+    logger.info("save_meeting uuid=%s %s", req.session_uuid, res.timing_text())
+    return res
+
+
+def _done(value) -> Future:
+    fut: Future = Future()
+    fut.set_result(value)
+    return fut
+
+
+class _Stop(CancelToken):
+    """CancelToken nội bộ của một lần save, cũng coi là đã huỷ khi token của task bên ngoài bị huỷ."""
+    __slots__ = ("_outer",)
+
+    def __init__(self, outer: Optional[CancelToken] = None):
+        super().__init__()
+        self._outer = outer
+
+    @property
+    def cancelled(self) -> bool:
+        return self._ev.is_set() or (self._outer is not None and self._outer.cancelled)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise CancelledError()
+
+
+def _checkpointed(job, stage: str, fn, full_text: str, segments, cancel=None):
+    """Gọi summarize/extract với memo theo chunk của job rồi ghi kết quả stage."""
+    if job is None:
+        return fn(full_text, segments, cancel=cancel)
+    t0 = time.perf_counter()
+    if not segments:
+        # Text đã sửa tay: vẫn chia chunk theo ranh giới segment ASR (chunker căn lại theo text mới)
+        # -> chunk không bị sửa giữ nguyên nội dung, trúng memo của lần lưu trước
+        store = job.segment_store(stale=True)
+        segments = store.to_dicts() if store is not None and len(store) else None
+    out = fn(full_text, segments, memo=job.memo(stage), cancel=cancel)
+    if stage == "summarize":
+        job.set_summary(out, time.perf_counter() - t0)
+    else:
+        job.set_extracted(out, time.perf_counter() - t0)
+    return out
+
+
+def _persist(insert_transcripts_bulk, req: SaveRequest, res: SaveResult):
+    out = insert_transcripts_bulk(
+        [{"session_uuid": req.session_uuid, "full_text": req.full_text, "summary": res.summary,
+          "extracted": res.extracted, "segments": req.segments}],
+        replace=True, status="completed",
+    )
+    if not out.ok:
+        raise RuntimeError(out.errors[0].error)
+
+
+def _mark_failed(update_session_status, session_uuid: str):
+    try:
+        update_session_status(session_uuid, "failed")
+    except Exception as e:
+        logger.warning("Could not mark session %s failed: %s", session_uuid, e)
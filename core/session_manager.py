@@ -6,7 +6,7 @@ from typing import Optional
 import uuid
 import os
 from datetime import datetime
-from core.config import CONFIG
+from core.config import get_config
 from core.logger import logger
 
 @dataclass
@@ -22,11 +22,11 @@ class Session:
 class SessionManager:
     def __init__(self):
         self.current: Optional[Session] = None
-        os.makedirs(CONFIG.base_dir, exist_ok=True)
+        os.makedirs(get_config().base_dir, exist_ok=True)
 
     def create(self, title: str = "", topic: str = "") -> Session:
         sid = str(uuid.uuid4())
-        folder = os.path.join(CONFIG.base_dir, sid)
+        folder = os.path.join(get_config().base_dir, sid)
         os.makedirs(folder, exist_ok=True)
         self.current = Session(uuid=sid, title=title, main_topic=topic, status="idle",
                                audio_path=os.path.join(folder, "raw.wav"))
@@ -3,15 +3,253 @@
 # ------------------------------
 from __future__ import annotations
 
-from .mysql import get_conn
+from .mysql import connection
+from core import metrics
 from core.logger import logger
+import functools
 import json
-from typing import Iterable, Optional
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import islice
+import threading
+from typing import Callable, Iterable, Optional
+
+
+_UPSERT_SESSION_SQL = (
+    "INSERT INTO sessions (uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path) "
+    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s) "
+    "ON DUPLICATE KEY UPDATE "
+    "title=VALUES(title), main_topic=VALUES(main_topic), "
+    "start_time=VALUES(start_time), end_time=VALUES(end_time), "
+    "duration_min=VALUES(duration_min), status=VALUES(status), audio_path=VALUES(audio_path)"
+)
+
+_INSERT_TRANSCRIPT_SQL = (
+    "INSERT INTO transcripts (session_uuid, full_text, summary, goal, agenda, attendance, decisions, action_items) "
+    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s)"
+)
+
+
+def _transcript_params(session_uuid: str, full_text: str, summary: str | None, extracted: dict | None) -> tuple:
+    data = extracted or {}
+    return (
+        session_uuid,
+        full_text,
+        summary or "",
+        json.dumps(data.get("goal", []), ensure_ascii=False),
+        json.dumps(data.get("agenda", []), ensure_ascii=False),
+        json.dumps(data.get("attendance", []), ensure_ascii=False),
+        json.dumps(data.get("decisions", []), ensure_ascii=False),
+        json.dumps(data.get("action_items", []), ensure_ascii=False),
+    )
+
+
+@contextmanager
+def _transaction():
+    """Một transaction tường minh trên kết nối mượn từ pool (commit/rollback)."""
+    with connection() as conn:
+        conn.begin()
+        try:
+            with conn.cursor() as cur:
+                yield cur
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.warning("rollback failed: %s", e)
+            raise
+
+
+def _row_count(res) -> int:
+    """Số hàng của kết quả DAO: rowcount (int), len(list), BulkResult.rows, (rows, cursor), 1 hàng."""
+    if res is None:
+        return 0
+    if isinstance(res, bool):
+        return int(res)
+    if isinstance(res, int):
+        return res
+    if isinstance(res, list):
+        return len(res)
+    if isinstance(res, dict):
+        # {key: row} (find_sessions_by_audio_paths) vs một bản ghi tổng hợp (dashboard_stats)
+        return len(res) if all(isinstance(v, tuple) for v in res.values()) else 1
+    if isinstance(res, tuple) and len(res) == 2 and isinstance(res[0], list):
+        return len(res[0])
+    rows = getattr(res, "rows", None)
+    return rows if isinstance(rows, int) else 1
+
+
+def _metered(fn):
+    """Đo latency (db_call_seconds) và số hàng (db_rows_total) của một hàm DAO, label fn=<tên hàm>."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with metrics.timer("db_call_seconds", fn=name):
+            res = fn(*args, **kwargs)
+        metrics.inc("db_rows_total", _row_count(res), fn=name)
+        return res
+    return wrapper
+
+
+_ACTION_ITEM_SQL = (
+    "INSERT INTO action_items (transcript_id, session_uuid, position, item, assignee, due, due_date, done) "
+    "VALUES (%s,%s,%s,%s,%s,%s,%s,%s)"
+)
+
+_TRUTHY = ("1", "true", "yes", "y")
+_DUE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _due_date(due: str) -> Optional[str]:
+    if not _DUE_RE.match(due):
+        return None
+    try:
+        datetime.strptime(due, "%Y-%m-%d")
+    except ValueError:
+        return None
+    return due
+
+
+def _action_item_rows(transcript_id: int, session_uuid: str, items) -> list[tuple]:
+    """Chuyển action_items (list dict từ Extractor) thành các dòng bảng action_items."""
+    rows = []
+    for pos, it in enumerate(items or []):
+        if isinstance(it, dict):
+            item, assignee, due, done = it.get("item"), it.get("assignee"), it.get("due"), it.get("done")
+        else:
+            item, assignee, due, done = it, "", "", False
+        due = str(due or "").strip()[:32]
+        rows.append((
+            transcript_id, session_uuid, pos, str(item or ""), str(assignee or "")[:255],
+            due, _due_date(due), str(done).lower() in _TRUTHY,
+        ))
+    return rows
+
+
+def _write_action_items(cur, transcript_id: int, session_uuid: str, items, replace: bool = True) -> list[tuple]:
+    if replace:
+        cur.execute("DELETE FROM action_items WHERE transcript_id=%s", (transcript_id,))
+    rows = _action_item_rows(transcript_id, session_uuid, items)
+    if rows:
+        cur.executemany(_ACTION_ITEM_SQL, rows)
+    return rows
+
+
+def _search_sync(fn: Callable) -> None:
+    """Cập nhật index full-text (search/index.py) sau commit; best-effort, lỗi chỉ ghi log."""
+    try:
+        from search.index import get_search_index
+        fn(get_search_index())
+    except Exception as e:
+        logger.warning("search index sync failed: %s", e)
+
+
+# ------------------------------
+# meeting_stats (rollup cho Dashboard)
+# ------------------------------
+STATS_RECONCILE_SEC = 3600
+_ALL_PERIOD = "1970-01-01"
+
+_STATS_SQL = (
+    "INSERT INTO meeting_stats (bucket, period, meetings, duration_min, action_items, action_items_done) "
+    "VALUES (%s,%s,%s,%s,%s,%s) "
+    "ON DUPLICATE KEY UPDATE "
+    "meetings=meetings+VALUES(meetings), duration_min=duration_min+VALUES(duration_min), "
+    "action_items=action_items+VALUES(action_items), action_items_done=action_items_done+VALUES(action_items_done)"
+)
+
+
+def _as_datetime(val) -> Optional[datetime]:
+    if isinstance(val, datetime):
+        return val
+    if not val:
+        return None
+    for fmt, n in (("%Y-%m-%d %H:%M:%S", 19), ("%Y-%m-%d", 10)):
+        try:
+            return datetime.strptime(str(val)[:n], fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _stats_periods(start_time) -> list[tuple]:
+    """Các dòng meeting_stats mà một session (theo start_time) đóng góp vào."""
+    out = [("all", _ALL_PERIOD)]
+    dt = _as_datetime(start_time)
+    if dt is not None:
+        d = dt.date()
+        out.append(("day", d.isoformat()))
+        out.append(("week", (d - timedelta(days=d.weekday())).isoformat()))
+    return out
+
+
+class _StatsDelta:
+    """Cộng dồn thay đổi theo (bucket, period), ghi một lần ở cuối transaction."""
+
+    def __init__(self):
+        self._acc: dict = {}
+
+    def add(self, start_time, meetings: int = 0, duration_min: int = 0, items: int = 0, done: int = 0):
+        if not (meetings or duration_min or items or done):
+            return
+        for key in _stats_periods(start_time):
+            acc = self._acc.setdefault(key, [0, 0, 0, 0])
+            acc[0] += meetings
+            acc[1] += duration_min
+            acc[2] += items
+            acc[3] += done
+
+    def move_session(self, old: Optional[list], start_time, duration_min: int):
+        """Session được tạo/sửa: bỏ đóng góp cũ (nếu có), thêm đóng góp mới (giữ số action item)."""
+        items, done = (old[2], old[3]) if old else (0, 0)
+        if old:
+            self.add(old[0], -1, -old[1], -items, -done)
+        self.add(start_time, 1, int(duration_min or 0), items, done)
+
+    def flush(self, cur):
+        # Thứ tự khoá cố định (sorted) để tránh deadlock giữa các transaction
+        rows = [(b, p, *v) for (b, p), v in sorted(self._acc.items()) if any(v)]
+        if rows:
+            cur.executemany(_STATS_SQL, rows)
+        self._acc.clear()
+
+
+def _session_contribs(cur, uuids) -> dict:
+    """
+    uuid -> [start_time, duration_min, action_items, done] của các session đang có.
+    Khoá dòng sessions (FOR UPDATE) để delta không bị ghi chồng bởi transaction khác.
+    """
+    uuids = list(dict.fromkeys(uuids))
+    if not uuids:
+        return {}
+    marks = ",".join(["%s"] * len(uuids))
+    cur.execute(f"SELECT uuid, start_time, duration_min FROM sessions WHERE uuid IN ({marks}) FOR UPDATE", uuids)
+    out = {u: [st, int(dur or 0), 0, 0] for u, st, dur in cur.fetchall() or []}
+    if out:
+        cur.execute(
+            "SELECT session_uuid, COUNT(*), COALESCE(SUM(done),0) FROM action_items "
+            f"WHERE session_uuid IN ({marks}) GROUP BY session_uuid",
+            uuids,
+        )
+        for u, n, d in cur.fetchall() or []:
+            if u in out:
+                out[u][2], out[u][3] = int(n), int(d)
+    return out
+
+
+def _count_items(rows: list[tuple]) -> tuple:
+    """(số action item, số đã xong) từ các dòng _action_item_rows."""
+    return len(rows), sum(1 for r in rows if r[7])
 
 
 # ------------------------------
 # Sessions
 # ------------------------------
+@_metered
 def upsert_session(
     uuid: str,
     title: str,
@@ -25,19 +263,17 @@ def upsert_session(
     """
     Tạo mới hoặc cập nhật phiên họp theo uuid (ON DUPLICATE KEY UPDATE).
     """
-    sql = (
-        "INSERT INTO sessions (uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path) "
-        "VALUES (%s,%s,%s,%s,%s,%s,%s,%s) "
-        "ON DUPLICATE KEY UPDATE "
-        "title=VALUES(title), main_topic=VALUES(main_topic), "
-        "start_time=VALUES(start_time), end_time=VALUES(end_time), "
-        "duration_min=VALUES(duration_min), status=VALUES(status), audio_path=VALUES(audio_path)"
-    )
-    with get_conn().cursor() as cur:
-        cur.execute(sql, (uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path))
+    with _transaction() as cur:
+        old = _session_contribs(cur, [uuid]).get(uuid)
+        cur.execute(_UPSERT_SESSION_SQL, (uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path))
+        delta = _StatsDelta()
+        delta.move_session(old, start_time, duration_min)
+        delta.flush(cur)
+    _search_sync(lambda idx: idx.index_session(uuid, title, main_topic, start_time))
     logger.info("upsert_session ok uuid=%s duration_min=%s", uuid, duration_min)
 
 
+@_metered
 def update_session_title_topic(uuid: str, title: Optional[str] = None, main_topic: Optional[str] = None) -> int:
     """
     Cập nhật nhanh Title / Main Topic.
@@ -55,23 +291,46 @@ def update_session_title_topic(uuid: str, title: Optional[str] = None, main_topi
         return 0
     params.append(uuid)
     sql = f"UPDATE sessions SET {', '.join(sets)} WHERE uuid=%s"
-    with get_conn().cursor() as cur:
+    with connection() as conn, conn.cursor() as cur:
         rows = cur.execute(sql, params)
+        cur.execute("SELECT title, main_topic, start_time FROM sessions WHERE uuid=%s", (uuid,))
+        row = cur.fetchone()
+    if row:
+        _search_sync(lambda idx: idx.index_session(uuid, row[0] or "", row[1] or "", row[2]))
     logger.info("update_session_title_topic uuid=%s rows=%s", uuid, rows)
     return rows
 
 
+@_metered
+def update_session_status(uuid: str, status: str) -> int:
+    """
+    Đổi trạng thái session (processing|completed|failed...). Trả về số dòng ảnh hưởng.
+    """
+    with connection() as conn, conn.cursor() as cur:
+        rows = cur.execute("UPDATE sessions SET status=%s WHERE uuid=%s", (status, uuid))
+    logger.info("update_session_status uuid=%s status=%s rows=%s", uuid, status, rows)
+    return rows
+
+
+@_metered
 def delete_session(uuid: str) -> int:
     """
     Xoá một session (transcripts sẽ bị xoá theo FK ON DELETE CASCADE).
     Trả về số dòng ảnh hưởng.
     """
-    with get_conn().cursor() as cur:
+    with _transaction() as cur:
+        old = _session_contribs(cur, [uuid]).get(uuid)
         rows = cur.execute("DELETE FROM sessions WHERE uuid=%s", (uuid,))
+        if old:
+            delta = _StatsDelta()
+            delta.add(old[0], -1, -old[1], -old[2], -old[3])
+            delta.flush(cur)
+    _search_sync(lambda idx: idx.remove_session(uuid))
     logger.info("delete_session uuid=%s rows=%s", uuid, rows)
     return rows
 
 
+@_metered
 def list_sessions(
     limit: int = 200,
     search: Optional[str] = None,
@@ -105,7 +364,7 @@ def list_sessions(
         )
         params = (limit,)
 
-    with get_conn().cursor() as cur:
+    with connection() as conn, conn.cursor() as cur:
         cur.execute(sql, params)
         rows = cur.fetchall()
     # pymysql mặc định trả về tuple; giữ nguyên để tương thích UI
@@ -113,6 +372,59 @@ def list_sessions(
     return rows or []
 
 
+@_metered
+def list_sessions_page(
+    after: Optional[tuple] = None,
+    limit: int = 100,
+    search: Optional[str] = None,
+) -> tuple[list[tuple], Optional[tuple]]:
+    """
+    Phân trang keyset (seek) theo (start_time DESC, id DESC), dùng idx_sessions_start:
+    chi phí mỗi trang không phụ thuộc trang đã đi qua (khác OFFSET).
+    Trả về (rows, next_cursor); rows: (uuid, title, start_time, duration_min, status).
+
+    - `after`: cursor (start_time, id) của hàng cuối trang trước; None = trang đầu.
+    - next_cursor = None khi hết dữ liệu.
+    - Session không có start_time nằm sau cùng (pha 2, theo id DESC); cursor pha 2 là (None, id).
+    - `search`: lọc LIKE trên title.
+    """
+    limit = max(1, int(limit))
+    cols = "SELECT id, uuid, title, start_time, duration_min, status FROM sessions "
+    like = " AND title LIKE %s" if search else ""
+    like_p = (f"%{search}%",) if search else ()
+
+    rows: list = []
+    with connection() as conn, conn.cursor() as cur:
+        if after is None or after[0] is not None:
+            if after is None:
+                seek, seek_p = "", ()
+            else:
+                seek = " AND (start_time < %s OR (start_time = %s AND id < %s))"
+                seek_p = (after[0], after[0], after[1])
+            cur.execute(
+                cols + "WHERE start_time IS NOT NULL" + seek + like
+                + " ORDER BY start_time DESC, id DESC LIMIT %s",
+                (*seek_p, *like_p, limit + 1),
+            )
+            rows = list(cur.fetchall() or [])
+        if len(rows) <= limit:
+            # pha 2: start_time NULL
+            seek = " AND id < %s" if after is not None and after[0] is None else ""
+            seek_p = (after[1],) if seek else ()
+            cur.execute(
+                cols + "WHERE start_time IS NULL" + seek + like + " ORDER BY id DESC LIMIT %s",
+                (*seek_p, *like_p, limit + 1 - len(rows)),
+            )
+            rows += list(cur.fetchall() or [])
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = (rows[-1][3], rows[-1][0]) if more and rows else None
+    logger.debug("list_sessions_page after=%s rows=%s more=%s", after, len(rows), more)
+    return [r[1:] for r in rows], next_cursor
+
+
+@_metered
 def get_session(uuid: str) -> Optional[tuple]:
     """
     Lấy chi tiết một session (đủ trường cho trang chi tiết nếu cần).
@@ -122,42 +434,109 @@ def get_session(uuid: str) -> Optional[tuple]:
         "SELECT uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path "
         "FROM sessions WHERE uuid=%s"
     )
-    with get_conn().cursor() as cur:
+    with connection() as conn, conn.cursor() as cur:
         cur.execute(sql, (uuid,))
         row = cur.fetchone()
     return row
 
 
+@_metered
+def export_page(
+    after_id: int = 0,
+    limit: int = 50,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    search: Optional[str] = None,
+    uuids: Optional[list] = None,
+) -> tuple[list[dict], Optional[int]]:
+    """
+    Một trang (keyset theo sessions.id) session + transcript mới nhất, cho bulk export.
+    Trả về (items, next_after_id); mỗi item: {"session": tuple như get_session(),
+    "transcript": tuple như get_transcript() hoặc None}. next_after_id = None khi hết.
+    - start/end: lọc start_time trong [start, end) ('YYYY-MM-DD[ HH:MM:SS]').
+    - search: LIKE trên title; uuids: chỉ các session này.
+    Trang nhỏ vì full_text là LONGTEXT — bộ nhớ mỗi trang có giới hạn.
+    """
+    limit = max(1, int(limit))
+    where, params = ["s.id > %s"], [after_id]
+    if start:
+        where.append("s.start_time >= %s"); params.append(start)
+    if end:
+        where.append("s.start_time < %s"); params.append(end)
+    if search:
+        where.append("s.title LIKE %s"); params.append(f"%{search}%")
+    if uuids is not None:
+        if not uuids:
+            return [], None
+        where.append(f"s.uuid IN ({','.join(['%s'] * len(uuids))})"); params += list(uuids)
+    sql = (
+        "SELECT s.id, s.uuid, s.title, s.main_topic, s.start_time, s.end_time, s.duration_min, s.status, "
+        "s.audio_path, t.id, t.session_uuid, t.full_text, t.summary, t.goal, t.agenda, t.attendance, "
+        "t.decisions, t.action_items, t.created_at "
+        "FROM sessions s LEFT JOIN transcripts t "
+        "ON t.id = (SELECT MAX(t2.id) FROM transcripts t2 WHERE t2.session_uuid = s.uuid) "
+        f"WHERE {' AND '.join(where)} ORDER BY s.id LIMIT %s"
+    )
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(sql, (*params, limit + 1))
+        rows = list(cur.fetchall() or [])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    items = [{"session": r[1:9], "transcript": r[9:] if r[9] is not None else None} for r in rows]
+    return items, (rows[-1][0] if more and rows else None)
+
+
+@_metered
+def find_sessions_by_audio_paths(paths: Iterable[str], chunk_size: int = 500) -> dict[str, tuple]:
+    """
+    Tra cứu session theo audio_path (dùng cho batch import để bỏ qua file đã xử lý).
+    Trả về dict: audio_path -> (uuid, status)
+    """
+    paths = list(paths)
+    out: dict[str, tuple] = {}
+    for i in range(0, len(paths), chunk_size):
+        part = paths[i:i + chunk_size]
+        marks = ",".join(["%s"] * len(part))
+        sql = f"SELECT audio_path, uuid, status FROM sessions WHERE audio_path IN ({marks})"
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, part)
+            for audio_path, uuid, status in cur.fetchall() or []:
+                out[audio_path] = (uuid, status)
+    return out
+
+
 # ------------------------------
 # Transcripts
 # ------------------------------
-def insert_transcript(session_uuid: str, full_text: str, summary: str | None, extracted: dict | None) -> None:
+@_metered
+def insert_transcript(
+    session_uuid: str,
+    full_text: str,
+    summary: str | None,
+    extracted: dict | None,
+    segments: list | None = None,
+) -> None:
     """
     Thêm transcript mới cho một session (mỗi session có thể có nhiều bản nếu tái sinh/tái phân tích).
     Các trường list/dict sẽ được lưu ở dạng JSON.
+    `segments` (Whisper, nếu có) chỉ dùng cho index full-text (timestamp của kết quả tìm kiếm).
     """
-    data = extracted or {}
-    sql = (
-        "INSERT INTO transcripts (session_uuid, full_text, summary, goal, agenda, attendance, decisions, action_items) "
-        "VALUES (%s,%s,%s,%s,%s,%s,%s,%s)"
-    )
-    with get_conn().cursor() as cur:
-        cur.execute(
-            sql,
-            (
-                session_uuid,
-                full_text,
-                summary or "",
-                json.dumps(data.get("goal", []), ensure_ascii=False),
-                json.dumps(data.get("agenda", []), ensure_ascii=False),
-                json.dumps(data.get("attendance", []), ensure_ascii=False),
-                json.dumps(data.get("decisions", []), ensure_ascii=False),
-                json.dumps(data.get("action_items", []), ensure_ascii=False),
-            ),
-        )
+    with _transaction() as cur:
+        sess = _session_contribs(cur, [session_uuid]).get(session_uuid)
+        cur.execute(_INSERT_TRANSCRIPT_SQL, _transcript_params(session_uuid, full_text, summary, extracted))
+        tid = cur.lastrowid
+        items = _write_action_items(cur, tid, session_uuid, (extracted or {}).get("action_items"), replace=False)
+        if sess:
+            delta = _StatsDelta()
+            delta.add(sess[0], 0, 0, *_count_items(items))
+            delta.flush(cur)
+    _search_sync(lambda idx: idx.index_transcript(
+        tid, session_uuid, full_text or "", summary or "", (extracted or {}).get("decisions") or [], segments,
+    ))
     logger.info("insert_transcript ok session_uuid=%s len(full_text)=%s", session_uuid, len(full_text or ""))
 
 
+@_metered
 def list_transcripts(session_uuid: str, limit: int = 50) -> list[tuple]:
     """
     Trả về danh sách transcript theo session_uuid (mới nhất trước).
@@ -169,11 +548,12 @@ def list_transcripts(session_uuid: str, limit: int = 50) -> list[tuple]:
         "FROM transcripts WHERE session_uuid=%s "
         "ORDER BY created_at DESC LIMIT %s"
     )
-    with get_conn().cursor() as cur:
+    with connection() as conn, conn.cursor() as cur:
         cur.execute(sql, (session_uuid, limit))
         return cur.fetchall() or []
 
 
+@_metered
 def get_transcript(transcript_id: int) -> Optional[tuple]:
     """
     Lấy đầy đủ 1 transcript:
@@ -183,20 +563,28 @@ def get_transcript(transcript_id: int) -> Optional[tuple]:
         "SELECT id, session_uuid, full_text, summary, goal, agenda, attendance, decisions, action_items, created_at "
         "FROM transcripts WHERE id=%s"
     )
-    with get_conn().cursor() as cur:
+    with connection() as conn, conn.cursor() as cur:
         cur.execute(sql, (transcript_id,))
         return cur.fetchone()
 
 
+@_metered
 def delete_transcripts(session_uuid: str) -> int:
     """
     Xoá tất cả transcripts của một session (không xoá session).
     """
-    with get_conn().cursor() as cur:
+    with _transaction() as cur:
+        sess = _session_contribs(cur, [session_uuid]).get(session_uuid)
         rows = cur.execute("DELETE FROM transcripts WHERE session_uuid=%s", (session_uuid,))
+        if sess:
+            delta = _StatsDelta()
+            delta.add(sess[0], 0, 0, -sess[2], -sess[3])
+            delta.flush(cur)
+    _search_sync(lambda idx: idx.remove_session(session_uuid, keep_title=True))
     logger.info("delete_transcripts session_uuid=%s rows=%s", session_uuid, rows)
     return rows
 
+@_metered
 def update_transcript(
     transcript_id: int,
     summary: str | None,
@@ -233,11 +621,35 @@ def update_transcript(
 
     sql = f"UPDATE transcripts SET {', '.join(sets)} WHERE id=%s"
     params.append(transcript_id)
-    with get_conn().cursor() as cur:
+    with _transaction() as cur:
+        # Khoá sessions trước rồi mới tới transcripts (cùng thứ tự với insert/delete/bulk) -> không deadlock
+        cur.execute("SELECT session_uuid FROM transcripts WHERE id=%s", (transcript_id,))
+        row = cur.fetchone()
+        sess = _session_contribs(cur, [row[0]]).get(row[0]) if row else None
         rows = cur.execute(sql, params)
+        if extracted is not None:
+            if row:
+                cur.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(done),0) FROM action_items WHERE transcript_id=%s",
+                    (transcript_id,),
+                )
+                old_n, old_done = cur.fetchone() or (0, 0)
+                new_n, new_done = _count_items(
+                    _write_action_items(cur, transcript_id, row[0], extracted.get("action_items"))
+                )
+                if sess:
+                    delta = _StatsDelta()
+                    delta.add(sess[0], 0, 0, new_n - int(old_n), new_done - int(old_done))
+                    delta.flush(cur)
+    if row:
+        _search_sync(lambda idx: idx.index_transcript(
+            transcript_id, row[0], full_text, summary,
+            (extracted.get("decisions") or []) if extracted is not None else None,
+        ))
     return rows
 
 
+@_metered
 def update_latest_transcript(
     session_uuid: str,
     summary: str | None,
@@ -250,10 +662,339 @@ def update_latest_transcript(
     """
     # lấy id transcript mới nhất
     sql = "SELECT id FROM transcripts WHERE session_uuid=%s ORDER BY created_at DESC LIMIT 1"
-    with get_conn().cursor() as cur:
+    with connection() as conn, conn.cursor() as cur:
         cur.execute(sql, (session_uuid,))
         row = cur.fetchone()
     if not row:
         return 0
     tid = row[0]
     return update_transcript(tid, summary=summary, extracted=extracted, full_text=full_text)
+
+
+# ------------------------------
+# Bulk (import / backfill)
+# ------------------------------
+@dataclass
+class BulkError:
+    offset: int  # vị trí phần tử đầu tiên của batch trong iterable đầu vào
+    keys: list  # session uuid của các dòng trong batch lỗi
+    error: str
+
+
+@dataclass
+class BulkResult:
+    rows: int = 0
+    batches: int = 0
+    errors: list = field(default_factory=list)  # list[BulkError]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def failed_keys(self) -> set:
+        return {k for e in self.errors for k in e.keys}
+
+
+def _run_batches(
+    name: str,
+    items: Iterable,
+    batch_size: int,
+    key: Callable,
+    write: Callable,
+    after: Optional[Callable] = None,
+) -> BulkResult:
+    """
+    Chia `items` thành batch `batch_size`, mỗi batch một transaction: write(cur, batch).
+    Batch lỗi được rollback và ghi vào BulkResult.errors; các batch khác vẫn chạy tiếp.
+    after(batch) được gọi sau khi batch commit thành công.
+    """
+    res = BulkResult()
+    it = iter(items)
+    offset = 0
+    while True:
+        batch = list(islice(it, max(1, batch_size)))
+        if not batch:
+            break
+        try:
+            with _transaction() as cur:
+                write(cur, batch)
+            res.rows += len(batch)
+            if after is not None:
+                after(batch)
+        except Exception as e:
+            logger.error("%s batch at %d (%d rows) failed: %s", name, offset, len(batch), e)
+            res.errors.append(BulkError(offset, [key(x) for x in batch], str(e)))
+        res.batches += 1
+        offset += len(batch)
+    logger.info("%s: %d rows in %d batches, %d failed batches", name, res.rows, res.batches, len(res.errors))
+    return res
+
+
+@_metered
+def upsert_sessions_bulk(sessions: Iterable[dict], batch_size: int = 500) -> BulkResult:
+    """
+    Upsert nhiều session. Mỗi phần tử là dict cùng tham số với upsert_session().
+    pymysql gộp executemany(INSERT ... VALUES) thành INSERT nhiều dòng -> 1 round-trip / batch.
+    """
+    def write(cur, batch):
+        contribs = _session_contribs(cur, [s["uuid"] for s in batch])
+        delta = _StatsDelta()
+        for s in batch:
+            old = contribs.get(s["uuid"])
+            delta.move_session(old, s["start_time"], s["duration_min"])
+            contribs[s["uuid"]] = [s["start_time"], int(s["duration_min"] or 0),
+                                   old[2] if old else 0, old[3] if old else 0]
+        cur.executemany(_UPSERT_SESSION_SQL, [
+            (s["uuid"], s["title"], s["main_topic"], s["start_time"], s["end_time"],
+             s["duration_min"], s["status"], s["audio_path"])
+            for s in batch
+        ])
+        delta.flush(cur)
+
+    def after(batch):
+        _search_sync(lambda idx: [
+            idx.index_session(s["uuid"], s["title"], s["main_topic"], s["start_time"]) for s in batch
+        ])
+    return _run_batches("upsert_sessions_bulk", sessions, batch_size, lambda s: s["uuid"], write, after)
+
+
+@_metered
+def insert_transcripts_bulk(
+    transcripts: Iterable[dict],
+    batch_size: int = 100,
+    replace: bool = False,
+    status: Optional[str] = None,
+) -> BulkResult:
+    """
+    Thêm nhiều transcript. Mỗi phần tử: {"session_uuid", "full_text", "summary", "extracted"}
+    (+ "segments" tuỳ chọn cho index full-text).
+    - replace=True: xoá transcript cũ của các session trong batch trước (cùng transaction).
+    - status: nếu có, đổi sessions.status của batch (vd. 'completed') trong cùng transaction.
+    batch_size nhỏ hơn sessions vì full_text có thể lớn (giới hạn max_allowed_packet).
+    """
+    def write(cur, batch):
+        uuids = [t["session_uuid"] for t in batch]
+        marks = ",".join(["%s"] * len(uuids))
+        contribs = _session_contribs(cur, uuids)
+        delta = _StatsDelta()
+        if replace:
+            for sess in contribs.values():
+                delta.add(sess[0], 0, 0, -sess[2], -sess[3])
+            cur.execute(f"DELETE FROM transcripts WHERE session_uuid IN ({marks})", uuids)
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM transcripts")
+        floor = cur.fetchone()[0]
+        cur.executemany(_INSERT_TRANSCRIPT_SQL, [
+            _transcript_params(t["session_uuid"], t.get("full_text") or "", t.get("summary"), t.get("extracted"))
+            for t in batch
+        ])
+        # id mới của batch theo thứ tự chèn (= thứ tự batch, kể cả khi một session xuất hiện nhiều lần).
+        # Dòng sessions đã bị khoá FOR UPDATE ở _session_contribs -> không writer nào khác chèn cho các session này.
+        # (executemany có thể tách thành nhiều INSERT theo max_stmt_length nên không suy từ lastrowid.)
+        cur.execute(
+            f"SELECT id FROM transcripts WHERE id > %s AND session_uuid IN ({marks}) ORDER BY id",
+            [floor, *uuids],
+        )
+        new_ids.clear()
+        new_ids.extend(r[0] for r in cur.fetchall() or [])
+        if len(new_ids) != len(batch):
+            raise RuntimeError(f"insert_transcripts_bulk: expected {len(batch)} new ids, got {len(new_ids)}")
+        with_items = [(tid, t) for tid, t in zip(new_ids, batch) if (t.get("extracted") or {}).get("action_items")]
+        if with_items:
+            rows = []
+            for tid, t in with_items:
+                part = _action_item_rows(tid, t["session_uuid"], t["extracted"]["action_items"])
+                sess = contribs.get(t["session_uuid"])
+                if sess:
+                    delta.add(sess[0], 0, 0, *_count_items(part))
+                rows += part
+            cur.executemany(_ACTION_ITEM_SQL, rows)
+        delta.flush(cur)
+        if status is not None:
+            cur.execute(f"UPDATE sessions SET status=%s WHERE uuid IN ({marks})", [status, *uuids])
+
+    def after(batch):
+        def sync(idx):
+            removed = set()
+            for tid, t in zip(new_ids, batch):
+                sid = t["session_uuid"]
+                if replace and sid not in removed:
+                    idx.remove_session(sid, keep_title=True)
+                    removed.add(sid)
+                idx.index_transcript(
+                    tid, sid, t.get("full_text") or "", t.get("summary") or "",
+                    (t.get("extracted") or {}).get("decisions") or [], t.get("segments"),
+                )
+        _search_sync(sync)
+        new_ids.clear()
+
+    new_ids: list = []  # id transcript của batch vừa ghi, cùng thứ tự với batch
+    return _run_batches(
+        "insert_transcripts_bulk", transcripts, batch_size, lambda t: t["session_uuid"], write, after,
+    )
+
+
+@_metered
+def backfill_action_items(batch_size: int = 500) -> int:
+    """
+    Đổ dữ liệu bảng action_items từ cột JSON transcripts.action_items cho các transcript
+    chưa có dòng nào (bản Python của migration JSON_TABLE, chạy được trên MySQL 5.7).
+    Trả về số action item đã ghi.
+    """
+    last_id, total = 0, 0
+    while True:
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT t.id, t.session_uuid, t.action_items FROM transcripts t "
+                "WHERE t.id > %s AND NOT EXISTS (SELECT 1 FROM action_items a WHERE a.transcript_id = t.id) "
+                "ORDER BY t.id LIMIT %s",
+                (last_id, batch_size),
+            )
+            batch = cur.fetchall() or []
+        if not batch:
+            break
+        rows = []
+        for tid, session_uuid, blob in batch:
+            try:
+                items = json.loads(blob) if blob else []
+            except Exception:
+                logger.warning("backfill_action_items: bad JSON in transcript id=%s", tid)
+                continue
+            rows += _action_item_rows(tid, session_uuid, items if isinstance(items, list) else [])
+        if rows:
+            with _transaction() as cur:
+                cur.executemany(_ACTION_ITEM_SQL, rows)
+        total += len(rows)
+        last_id = batch[-1][0]
+    logger.info("backfill_action_items wrote %d rows", total)
+    if total:
+        reconcile_meeting_stats()
+    return total
+
+
+# ------------------------------
+# Dashboard aggregates
+# ------------------------------
+@_metered
+def reconcile_meeting_stats() -> int:
+    """
+    Tính lại toàn bộ meeting_stats từ sessions + action_items (sửa sai lệch của delta,
+    và khởi tạo rollup cho DB cũ). Trả về số dòng rollup.
+    """
+    per_session = (
+        "SELECT s.start_time, s.duration_min, COALESCE(a.n,0) AS n, COALESCE(a.d,0) AS d FROM sessions s "
+        "LEFT JOIN (SELECT session_uuid, COUNT(*) AS n, SUM(done) AS d FROM action_items GROUP BY session_uuid) a "
+        "ON a.session_uuid = s.uuid"
+    )
+    aggs = "COUNT(*), COALESCE(SUM(x.duration_min),0), COALESCE(SUM(x.n),0), COALESCE(SUM(x.d),0)"
+    cols = "INSERT INTO meeting_stats (bucket, period, meetings, duration_min, action_items, action_items_done) "
+    periods = {
+        "day": "DATE(x.start_time)",
+        "week": "DATE_SUB(DATE(x.start_time), INTERVAL WEEKDAY(x.start_time) DAY)",
+    }
+    with _transaction() as cur:
+        cur.execute("DELETE FROM meeting_stats")
+        n = cur.execute(f"{cols}SELECT 'all', %s, {aggs} FROM ({per_session}) x", (_ALL_PERIOD,))
+        for bucket, expr in periods.items():
+            n += cur.execute(
+                f"{cols}SELECT %s, {expr}, {aggs} FROM ({per_session}) x "
+                f"WHERE x.start_time IS NOT NULL GROUP BY {expr}",
+                (bucket,),
+            )
+    logger.info("reconcile_meeting_stats rows=%s", n)
+    return n
+
+
+_reconciler: Optional[threading.Thread] = None
+_reconciler_stop = threading.Event()
+
+
+def start_stats_reconciler(interval_sec: float = STATS_RECONCILE_SEC) -> None:
+    """
+    Chạy reconcile_meeting_stats() ngay khi khởi động (DB nâng cấp có thể đã có dòng 'all'
+    dở dang do delta) rồi định kỳ trên luồng nền. Gọi một lần khi khởi động app.
+    """
+    global _reconciler
+    if _reconciler is not None:
+        return
+    _reconciler_stop.clear()
+
+    def loop():
+        while True:
+            try:
+                reconcile_meeting_stats()
+            except Exception as e:
+                logger.warning("reconcile_meeting_stats failed: %s", e)
+            if _reconciler_stop.wait(interval_sec):
+                return
+
+    _reconciler = threading.Thread(target=loop, name="stats-reconcile", daemon=True)
+    _reconciler.start()
+
+
+def stop_stats_reconciler() -> None:
+    """Dừng luồng reconcile (khi đóng app)."""
+    global _reconciler
+    _reconciler_stop.set()
+    _reconciler = None
+
+
+@_metered
+def dashboard_stats() -> dict:
+    """
+    Số liệu tổng cho Dashboard, đọc từ rollup meeting_stats (không quét sessions):
+    total_meetings, total_duration_min, total_action_items, done_action_items.
+    """
+    sql = (
+        "SELECT meetings, duration_min, action_items, action_items_done "
+        "FROM meeting_stats WHERE bucket='all' AND period=%s"
+    )
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(sql, (_ALL_PERIOD,))
+        row = cur.fetchone()
+    if row is None:
+        # DB cũ chưa có rollup -> dựng lần đầu
+        reconcile_meeting_stats()
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, (_ALL_PERIOD,))
+            row = cur.fetchone()
+    row = row or (0, 0, 0, 0)
+    return {
+        "total_meetings": int(row[0] or 0),
+        "total_duration_min": int(row[1] or 0),
+        "total_action_items": int(row[2] or 0),
+        "done_action_items": int(row[3] or 0),
+    }
+
+
+@_metered
+def list_meeting_stats(bucket: str = "week", limit: int = 12) -> list[tuple]:
+    """
+    Các kỳ gần nhất của rollup: list (period, meetings, duration_min, action_items, action_items_done).
+    bucket: 'day' | 'week'
+    """
+    sql = (
+        "SELECT period, meetings, duration_min, action_items, action_items_done "
+        "FROM meeting_stats WHERE bucket=%s ORDER BY period DESC LIMIT %s"
+    )
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(sql, (bucket, int(limit)))
+        return cur.fetchall() or []
+
+
+@_metered
+def list_latest_action_items(limit: int = 20) -> list[dict]:
+    """
+    Action item của các transcript mới nhất (theo thứ tự trong transcript).
+    Mỗi item: {"item", "assignee", "due", "done"}
+    """
+    sql = (
+        "SELECT item, assignee, due, done FROM action_items "
+        "ORDER BY transcript_id DESC, position ASC LIMIT %s"
+    )
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(sql, (int(limit),))
+        rows = cur.fetchall() or []
+    return [
+        {"item": item or "", "assignee": assignee or "", "due": due or "", "done": bool(done)}
+        for item, assignee, due, done in rows
+    ]
@@ -11,7 +11,9 @@ CREATE TABLE IF NOT EXISTS sessions (
   end_time DATETIME,
   duration_min INT DEFAULT 0,
   status VARCHAR(32) DEFAULT 'idle',
-  audio_path VARCHAR(512) DEFAULT ''
+  audio_path VARCHAR(512) DEFAULT '',
+  INDEX idx_sessions_audio_path (audio_path),
+  INDEX idx_sessions_start (start_time, id)
 ) CHARACTER SET utf8mb4;
 
 CREATE TABLE IF NOT EXISTS transcripts (
@@ -27,3 +29,62 @@ CREATE TABLE IF NOT EXISTS transcripts (
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
   FOREIGN KEY (session_uuid) REFERENCES sessions(uuid) ON DELETE CASCADE
 ) CHARACTER SET utf8mb4;
+
+-- Action items chuẩn hoá (transcripts.action_items JSON vẫn giữ cho trang chi tiết)
+CREATE TABLE IF NOT EXISTS action_items (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  transcript_id INT NOT NULL,
+  session_uuid VARCHAR(64) NOT NULL,
+  position INT NOT NULL DEFAULT 0,
+  item TEXT,
+  assignee VARCHAR(255) DEFAULT '',
+  due VARCHAR(32) DEFAULT '',
+  due_date DATE NULL,
+  done TINYINT(1) NOT NULL DEFAULT 0,
+  INDEX idx_action_items_transcript (transcript_id, position),
+  INDEX idx_action_items_session (session_uuid),
+  INDEX idx_action_items_assignee (assignee),
+  INDEX idx_action_items_due (due_date),
+  INDEX idx_action_items_done (done),
+  FOREIGN KEY (transcript_id) REFERENCES transcripts(id) ON DELETE CASCADE
+) CHARACTER SET utf8mb4;
+
+-- Rollup cho Dashboard, cập nhật theo delta trong các transaction ghi của db/dao.py.
+-- bucket: 'all' (period = 1970-01-01) | 'day' (ngày của start_time) | 'week' (thứ Hai đầu tuần)
+-- Sai lệch (nếu có) được sửa bởi dao.reconcile_meeting_stats().
+CREATE TABLE IF NOT EXISTS meeting_stats (
+  bucket VARCHAR(8) NOT NULL,
+  period DATE NOT NULL,
+  meetings INT NOT NULL DEFAULT 0,
+  duration_min BIGINT NOT NULL DEFAULT 0,
+  action_items INT NOT NULL DEFAULT 0,
+  action_items_done INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (bucket, period)
+) CHARACTER SET utf8mb4;
+
+-- ------------------------------
+-- Upgrades for databases created by an older version of this file.
+-- Run each statement once (they are not idempotent).
+-- ------------------------------
+-- batch import: resume lookup by audio_path
+-- ALTER TABLE sessions ADD INDEX idx_sessions_audio_path (audio_path);
+-- sessions list: keyset pagination on (start_time, id)
+-- ALTER TABLE sessions ADD INDEX idx_sessions_start (start_time, id);
+-- action_items: backfill from transcripts.action_items JSON (MySQL 8.0+, JSON_TABLE).
+-- Safe to re-run: transcripts that already have rows are skipped.
+-- On MySQL 5.7 use db.dao.backfill_action_items() instead.
+-- INSERT INTO action_items (transcript_id, session_uuid, position, item, assignee, due, due_date, done)
+-- SELECT t.id, t.session_uuid, j.pos - 1, COALESCE(j.item, ''), LEFT(COALESCE(j.assignee, ''), 255),
+--        LEFT(COALESCE(j.due, ''), 32),
+--        IF(j.due REGEXP '^[0-9]{4}-[0-9]{2}-[0-9]{2}$', STR_TO_DATE(j.due, '%Y-%m-%d'), NULL),
+--        LOWER(COALESCE(j.done, '')) IN ('1', 'true', 'yes', 'y')
+-- FROM transcripts t,
+--      JSON_TABLE(t.action_items, '$[*]' COLUMNS (
+--        pos FOR ORDINALITY,
+--        item TEXT PATH '$.item',
+--        assignee VARCHAR(1024) PATH '$.assignee',
+--        due VARCHAR(1024) PATH '$.due',
+--        done VARCHAR(16) PATH '$.done'
+--      )) j
+-- WHERE JSON_VALID(t.action_items)
+--   AND NOT EXISTS (SELECT 1 FROM action_items a WHERE a.transcript_id = t.id);
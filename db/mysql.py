@@ -1,36 +1,234 @@
 # ------------------------------
 # file: meeting_assistant/db/mysql.py
 # ------------------------------
-from core.config import CONFIG
+from core.config import get_config
 import pymysql
+from pymysql.constants import SERVER_STATUS
+from core import metrics
 from core.logger import logger
+from contextlib import contextmanager
+from collections import deque
+import threading
+import time
 
-_conn = None
-
-def get_conn():
-    global _conn
-    if _conn is None or not getattr(_conn, "open", False):
-        logger.info("Opening MySQL connection to %s/%s", CONFIG.mysql_host, CONFIG.mysql_db)
-        _conn = pymysql.connect(
-            host=CONFIG.mysql_host,
-            user=CONFIG.mysql_user,
-            password=CONFIG.mysql_password,
-            database=CONFIG.mysql_db,
+POOL_CHECKOUT_TIMEOUT_SEC = 30.0
+POOL_MAX_AGE_SEC = 3600.0  # đóng & mở lại kết nối quá cũ (tránh wait_timeout phía server)
+POOL_PING_IDLE_SEC = 30.0  # kết nối rảnh lâu hơn mức này -> ping trước khi trao
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class _PooledConn:
+    __slots__ = ("conn", "created", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Pool kết nối pymysql có giới hạn. Mỗi kết nối chỉ được một luồng dùng tại một
+    thời điểm (checkout/checkin); kết nối rảnh được ping khi lấy ra, kết nối quá
+    tuổi hoặc hỏng bị đóng và thay mới.
+    """
+
+    def __init__(self, cfg, size: int = 5):
+        self.cfg = cfg
+        self.size = max(1, int(size))
+        self._idle: deque = deque()
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0, "opened": 0, "recycled": 0, "broken": 0, "timeouts": 0,
+            "wait_sec_total": 0.0, "wait_sec_max": 0.0,
+        }
+
+    def _open(self) -> _PooledConn:
+        cfg = self.cfg
+        logger.info("Opening MySQL connection to %s/%s", cfg.mysql_host, cfg.mysql_db)
+        conn = pymysql.connect(
+            host=cfg.mysql_host,
+            user=cfg.mysql_user,
+            password=cfg.mysql_password,
+            database=cfg.mysql_db,
             charset="utf8mb4",
             autocommit=True,
         )
-    return _conn
+        with self._cond:
+            self._stats["opened"] += 1
+        return _PooledConn(conn)
+
+    @staticmethod
+    def _close(pc: _PooledConn):
+        try:
+            pc.conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, pc: _PooledConn) -> bool:
+        now = time.monotonic()
+        if now - pc.created > POOL_MAX_AGE_SEC:
+            with self._cond:
+                self._stats["recycled"] += 1
+            return False
+        if now - pc.last_used > POOL_PING_IDLE_SEC:
+            try:
+                pc.conn.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._stats["broken"] += 1
+                return False
+        return True
+
+    def acquire(self, timeout: float = POOL_CHECKOUT_TIMEOUT_SEC) -> _PooledConn:
+        t0 = time.monotonic()
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle or self._in_use < self.size:
+                    pc = self._idle.pop() if self._idle else None
+                    self._in_use += 1
+                    break
+                left = timeout - (time.monotonic() - t0)
+                if left <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"No MySQL connection free after {timeout:.0f}s (pool size {self.size})")
+                self._cond.wait(left)
+            waited = time.monotonic() - t0
+            self._stats["checkouts"] += 1
+            self._stats["wait_sec_total"] += waited
+            self._stats["wait_sec_max"] = max(self._stats["wait_sec_max"], waited)
+        metrics.observe("db_pool_wait_seconds", waited)
+        # Kiểm tra / mở kết nối ngoài lock (network I/O)
+        try:
+            if pc is not None and not self._healthy(pc):
+                self._close(pc)
+                pc = None
+            return pc or self._open()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    @staticmethod
+    def _in_transaction(conn) -> bool:
+        # begin() không đổi autocommit -> xem cờ IN_TRANS server gửi kèm gói OK gần nhất
+        return not conn.get_autocommit() or bool(
+            getattr(conn, "server_status", 0) & SERVER_STATUS.SERVER_STATUS_IN_TRANS
+        )
+
+    def release(self, pc: _PooledConn, broken: bool = False):
+        if not broken and self._in_transaction(pc.conn):
+            # Transaction bị bỏ dở (vd. lỗi giữa _transaction()) -> rollback trước khi trả về pool
+            try:
+                pc.conn.rollback()
+                if not pc.conn.get_autocommit():
+                    pc.conn.autocommit(True)
+            except Exception as e:
+                logger.warning("Rollback on release failed, dropping connection: %s", e)
+                broken = True
+        with self._cond:
+            self._in_use -= 1
+            if broken or self._closed:
+                if broken:
+                    self._stats["broken"] += 1
+                drop = True
+            else:
+                pc.last_used = time.monotonic()
+                self._idle.append(pc)
+                drop = False
+            self._cond.notify()
+        if drop:
+            self._close(pc)
+
+    @contextmanager
+    def connection(self, timeout: float = POOL_CHECKOUT_TIMEOUT_SEC):
+        pc = self.acquire(timeout)
+        broken = False
+        try:
+            yield pc.conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(pc, broken=broken)
+
+    def close(self):
+        """Đóng kết nối rảnh ngay; kết nối đang dùng sẽ bị đóng khi trả về."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for pc in idle:
+            self._close(pc)
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self._stats)
+            out.update(size=self.size, in_use=self._in_use, idle=len(self._idle))
+        out["wait_sec_avg"] = out["wait_sec_total"] / out["checkouts"] if out["checkouts"] else 0.0
+        return out
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            cfg = get_config()
+            _pool = ConnectionPool(cfg, cfg.db_pool_size)
+        return _pool
+
+
+@contextmanager
+def connection(timeout: float = POOL_CHECKOUT_TIMEOUT_SEC):
+    """
+    Mượn một kết nối từ pool trong phạm vi `with`:
+
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(...)
+    """
+    with get_pool().connection(timeout) as conn:
+        yield conn
+
+
+def pool_stats() -> dict:
+    """Số liệu pool (checkouts, wait time, in_use, idle...) để theo dõi tải."""
+    return get_pool().stats()
+
+
+def _pool_gauges():
+    """Gauge cho /metrics; không tạo pool nếu chưa có."""
+    pool = _pool
+    if pool is None:
+        return []
+    st = pool.stats()
+    return [(f"db_pool_{k}", {}, st[k]) for k in ("size", "in_use", "idle", "opened", "broken", "timeouts")]
+
+
+metrics.register_collector(_pool_gauges)
+
 
 def reset_connection():
     """
-    Đóng kết nối hiện tại (nếu có). Lần gọi get_conn() sau sẽ mở lại theo CONFIG mới.
+    Đóng pool hiện tại (nếu có). Lần mượn kết nối sau sẽ mở pool mới theo CONFIG mới;
+    kết nối đang được luồng khác dùng sẽ bị đóng khi trả về.
     """
-    global _conn
-    try:
-        if _conn is not None:
-            logger.info("Resetting MySQL connection")
-            _conn.close()
-    except Exception as e:
-        logger.warning("Error closing existing MySQL connection: %s", e)
-    finally:
-        _conn = None
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, None
+    if old is not None:
+        logger.info("Resetting MySQL connection pool")
+        try:
+            old.close()
+        except Exception as e:
+            logger.warning("Error closing MySQL connection pool: %s", e)
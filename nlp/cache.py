@@ -0,0 +1,156 @@
+# ------------------------------
+# file: meeting_assistant/nlp/cache.py
+# ------------------------------
+"""On-disk, content-addressed cache for chat completions.
+
+Key = sha256 of (model, kind, messages, params), so re-saving an unchanged
+transcript — or re-running identical chunks in batch — returns instantly and
+costs nothing. Stored in a single SQLite file; size-bounded LRU eviction on
+`accessed`, optional TTL. Hit / miss / eviction counters are persisted so cost
+dashboards can read them via stats().
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from core.config import get_config
+from core.logger import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  created REAL NOT NULL,
+  accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed);
+CREATE TABLE IF NOT EXISTS counters (
+  name TEXT PRIMARY KEY,
+  value INTEGER NOT NULL
+);
+"""
+
+_COUNTERS = ("hits", "misses", "puts", "evictions", "expired")
+
+
+class ResponseCache:
+    def __init__(self, path: str, max_bytes: int, ttl_sec: float = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size),0) FROM entries").fetchone()[0]
+        logger.debug("ResponseCache open %s (%d bytes)", path, self._bytes)
+
+    @staticmethod
+    def make_key(model: str, kind: str, messages: list[dict], params: dict) -> str:
+        payload = json.dumps(
+            {"model": model, "kind": kind, "messages": messages, "params": params},
+            ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _bump(self, name: str, n: int = 1):
+        self._db.execute(
+            "INSERT INTO counters(name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, size, created FROM entries WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self._bump("misses")
+                return None
+            value, size, created = row
+            if self.ttl_sec and now - created > self.ttl_sec:
+                self._db.execute("DELETE FROM entries WHERE key=?", (key,))
+                self._bytes -= size
+                self._bump("expired")
+                self._bump("misses")
+                return None
+            self._db.execute("UPDATE entries SET accessed=? WHERE key=?", (now, key))
+            self._bump("hits")
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE key=?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries(key, value, size, created, accessed) VALUES (?,?,?,?,?)",
+                (key, value, size, now, now),
+            )
+            self._bytes += size - (old[0] if old else 0)
+            self._bump("puts")
+            if self._bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+
+    def _evict(self, target_bytes: int):
+        """Xoá LRU (accessed cũ nhất) tới khi tổng dung lượng <= target_bytes."""
+        evicted = 0
+        cur = self._db.execute("SELECT key, size FROM entries ORDER BY accessed ASC")
+        victims = []
+        for key, size in cur:
+            if self._bytes <= target_bytes:
+                break
+            victims.append((key,))
+            self._bytes -= size
+            evicted += 1
+        self._db.executemany("DELETE FROM entries WHERE key=?", victims)
+        self._bump("evictions", evicted)
+        logger.debug("ResponseCache evicted %d entries", evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._db.execute("SELECT name, value FROM counters").fetchall())
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        out = {name: int(counters.get(name, 0)) for name in _COUNTERS}
+        lookups = out["hits"] + out["misses"]
+        out.update(entries=entries, bytes=self._bytes, max_bytes=self.max_bytes,
+                   hit_rate=(out["hits"] / lookups) if lookups else 0.0)
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._bytes = 0
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Cache dùng chung theo CONFIG (None nếu GPT_CACHE_MB=0)."""
+    global _cache
+    cfg = get_config()
+    if cfg.gpt_cache_mb <= 0:
+        return None
+    path = os.path.join(cfg.base_dir, ".cache", "gpt_cache.sqlite3")
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            try:
+                _cache = ResponseCache(path, cfg.gpt_cache_mb * 1024 * 1024, cfg.gpt_cache_ttl_sec)
+            except Exception as e:
+                logger.warning("GPT cache disabled (cannot open %s): %s", path, e)
+                return None
+        _cache.max_bytes = cfg.gpt_cache_mb * 1024 * 1024
+        _cache.ttl_sec = cfg.gpt_cache_ttl_sec
+        return _cache
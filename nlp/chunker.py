@@ -0,0 +1,174 @@
+# ------------------------------
+# file: meeting_assistant/nlp/chunker.py
+# ------------------------------
+"""Token-aware transcript chunking shared by Summarizer and Extractor.
+
+Units are Whisper segments when available (they are already sentence-ish and
+carry timestamps), otherwise sentences split on punctuation / newlines. When
+the transcript was edited by hand, segment boundaries are carried over to the
+new text through a word-level diff, so untouched regions keep the same units.
+
+Chunk boundaries are content-defined: once a chunk holds `MIN_FILL` of the
+`budget`, it is cut after a unit whose hash falls under a threshold
+proportional to the unit's size; `budget` is only a hard cap. A boundary
+depends on the unit itself, not on everything before it, so editing a few
+words changes one chunk instead of shifting all later ones — and the per-chunk
+memo (core.jobs.PartialMemo) still hits for the rest. A single unit larger
+than the budget is split on word boundaries.
+
+Token counts use tiktoken when installed, otherwise ~4 UTF-8 bytes per token.
+"""
+from __future__ import annotations
+import difflib
+import re
+import zlib
+from bisect import bisect_left
+from functools import lru_cache
+from typing import List, Optional
+
+from core.config import get_config
+from core.logger import logger
+
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+# Chunk được cắt tự do sau khi đạt MIN_FILL * budget; trung bình thêm CUT_SPAN * budget token
+MIN_FILL = 0.6
+CUT_SPAN = 0.2
+
+
+@lru_cache(maxsize=8)
+def _encoder(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.debug("tiktoken encoder unavailable: %s", e)
+            return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    enc = _encoder(model or get_config().gpt_model)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def split_units(text: str = "", segments: Optional[list] = None) -> List[str]:
+    """
+    Đơn vị không được cắt ngang: segment Whisper, hoặc câu.
+    Segment không còn khớp `text` (đã sửa tay) -> ranh giới segment được căn lại theo text mới.
+    """
+    if segments:
+        units = [" ".join((s.get("text") or "").split()) for s in segments]
+        if text and not segments_match(text, segments):
+            units = align_units(units, text)
+    else:
+        units = [u.strip() for u in _SENTENCE_RE.split(text or "")]
+    return [u for u in units if u]
+
+
+def align_units(units: List[str], text: str) -> List[str]:
+    """
+    Chuyển ranh giới các đơn vị cũ sang `text` đã sửa: diff theo từ (bỏ phần đầu/cuối trùng nhau
+    trước cho nhanh), vùng không đổi giữ nguyên ranh giới, vùng sửa gộp vào đơn vị chứa nó.
+    """
+    old: List[str] = []
+    starts: List[int] = []
+    for u in units:
+        w = u.split()
+        if w:
+            starts.append(len(old))
+            old += w
+    new = text.split()
+    if not new:
+        return []
+    lo = 0
+    while lo < min(len(old), len(new)) and old[lo] == new[lo]:
+        lo += 1
+    hi = 0
+    while hi < min(len(old), len(new)) - lo and old[-1 - hi] == new[-1 - hi]:
+        hi += 1
+    blocks = [("equal", 0, lo, 0, lo)]
+    sm = difflib.SequenceMatcher(None, old[lo:len(old) - hi], new[lo:len(new) - hi])
+    blocks += [(tag, i1 + lo, i2 + lo, j1 + lo, j2 + lo) for tag, i1, i2, j1, j2 in sm.get_opcodes()]
+    blocks.append(("equal", len(old) - hi, len(old), len(new) - hi, len(new)))
+
+    cuts = {0}
+    for tag, i1, i2, j1, j2 in blocks:
+        k = bisect_left(starts, i1)
+        if tag == "equal":
+            while k < len(starts) and starts[k] < i2:
+                cuts.add(j1 + starts[k] - i1)
+                k += 1
+        elif k < len(starts) and starts[k] == i1:
+            cuts.add(j1)
+    bounds = sorted(c for c in cuts if c < len(new)) + [len(new)]
+    return [" ".join(new[a:b]) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def _is_cut(unit: str, n_tokens: int, span: float) -> bool:
+    """Điểm cắt theo nội dung: xác suất ~ n_tokens / span, chỉ phụ thuộc chính đơn vị."""
+    return zlib.crc32(unit.encode("utf-8")) < min(1.0, n_tokens / span) * 0x100000000
+
+
+def _split_long(unit: str, budget: int, model: Optional[str]) -> List[str]:
+    """Cắt một đơn vị quá dài theo ranh giới từ."""
+    pieces: List[str] = []
+    words: List[str] = []
+    for w in unit.split():
+        words.append(w)
+        if count_tokens(" ".join(words), model) > budget and len(words) > 1:
+            words.pop()
+            pieces.append(" ".join(words))
+            words = [w]
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+
+def chunk_text(
+    text: str = "",
+    segments: Optional[list] = None,
+    budget: Optional[int] = None,
+    model: Optional[str] = None,
+) -> List[str]:
+    """Gom các đơn vị thành chunk <= `budget` token (mặc định CONFIG.gpt_chunk_tokens), cắt theo nội dung."""
+    budget = budget or get_config().gpt_chunk_tokens
+    min_fill, span = budget * MIN_FILL, max(1.0, budget * CUT_SPAN)
+    chunks: List[str] = []
+    cur: List[str] = []
+    cur_tokens = 0
+    for unit in split_units(text, segments):
+        n = count_tokens(unit, model)
+        parts = [unit] if n <= budget else _split_long(unit, budget, model)
+        for part in parts:
+            n = n if len(parts) == 1 else count_tokens(part, model)
+            if cur and cur_tokens + n + 1 > budget:
+                chunks.append(" ".join(cur))
+                cur, cur_tokens = [], 0
+            cur.append(part)
+            cur_tokens += n + 1
+            if cur_tokens >= min_fill and _is_cut(part, n, span):
+                chunks.append(" ".join(cur))
+                cur, cur_tokens = [], 0
+    if cur:
+        chunks.append(" ".join(cur))
+    logger.debug("chunk_text: %d chunks (budget=%d tokens)", len(chunks), budget)
+    return chunks
+
+
+def segments_match(text: str, segments: Optional[list]) -> bool:
+    """Segment Whisper còn khớp transcript (người dùng chưa sửa text)?"""
+    if not segments:
+        return False
+    joined = " ".join((s.get("text") or "").strip() for s in segments)
+    return " ".join(joined.split()) == " ".join((text or "").split())
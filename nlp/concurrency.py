@@ -0,0 +1,33 @@
+# ------------------------------
+# file: meeting_assistant/nlp/concurrency.py
+# ------------------------------
+from __future__ import annotations
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Callable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_bounded(fn: Callable[[T], R], items: Iterable[T], max_workers: int, cancel=None) -> List[R]:
+    """
+    Gọi fn cho từng item với tối đa `max_workers` lời gọi đồng thời (thread pool).
+    Kết quả giữ đúng thứ tự đầu vào; exception đầu tiên được ném lại cho caller.
+    cancel: object có `.cancelled` (vd. CancelToken) -> item chưa chạy ném CancelledError
+    (lời gọi đang chạy vẫn chạy hết).
+    """
+    items = list(items)
+    if cancel is not None:
+        fn = _checked(fn, cancel)
+    if len(items) <= 1 or max_workers <= 1:
+        return [fn(it) for it in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="gpt") as pool:
+        return list(pool.map(fn, items))
+
+
+def _checked(fn: Callable[[T], R], cancel) -> Callable[[T], R]:
+    def call(item: T) -> R:
+        if cancel.cancelled:
+            raise CancelledError()
+        return fn(item)
+    return call
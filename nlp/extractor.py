@@ -2,8 +2,13 @@
 # file: meeting_assistant/nlp/extractor.py
 # ------------------------------
 from .gpt_client import GPTClient
+from .concurrency import map_bounded
+from .chunker import chunk_text
+from core.config import get_config
+from core.jobs import memoized
 from core.logger import logger
 import json
+import re
 
 _EXTRACT_INSTRUCTIONS = """
 Bạn là trợ lý trích xuất thông tin từ transcript họp (tiếng Việt). 
@@ -23,18 +28,70 @@ Ghi “[]” nếu không có thông tin. Giữ ngắn gọn, rõ ràng, đúng
 Transcript:
 """
 
+# Không ghi số thứ tự phần: note nằm trong prompt (khoá cache) -> chunk giống nhau trúng cache dù lệch vị trí
+_PART_NOTE = "(Đây là một phần của transcript dài; chỉ trích xuất thông tin có trong phần này.)\n"
+
+_LIST_KEYS = ("goal", "agenda", "attendance", "decisions")
+
+
+def _empty() -> dict:
+    return {"goal":[], "agenda":[], "attendance":[], "decisions":[], "action_items":[]}
+
+
+def _norm(s) -> str:
+    """Khoá so trùng: bỏ hoa/thường, dấu câu và khoảng trắng thừa."""
+    return re.sub(r"[\W_]+", " ", str(s or "")).casefold().strip()
+
+
+def merge_extractions(parts: list[dict]) -> dict:
+    """Gộp kết quả trích xuất của nhiều chunk, loại trùng (giữ thứ tự xuất hiện)."""
+    out = _empty()
+    for key in _LIST_KEYS:
+        seen = set()
+        for part in parts:
+            for val in part.get(key, []) or []:
+                k = _norm(val)
+                if k and k not in seen:
+                    seen.add(k)
+                    out[key].append(val)
+    by_item: dict = {}
+    for part in parts:
+        for it in part.get("action_items", []) or []:
+            if not isinstance(it, dict):
+                continue
+            k = _norm(it.get("item"))
+            if not k:
+                continue
+            prev = by_item.get(k)
+            if prev is None:
+                by_item[k] = dict(it)
+                out["action_items"].append(by_item[k])
+            else:
+                # Bổ sung thông tin còn thiếu từ bản trùng
+                for f in ("assignee", "due"):
+                    if not prev.get(f) and it.get(f):
+                        prev[f] = it[f]
+                prev["done"] = bool(prev.get("done")) or bool(it.get("done"))
+    return out
+
+
 class Extractor:
-    def __init__(self, client: GPTClient | None = None):
+    def __init__(
+        self,
+        client: GPTClient | None = None,
+        concurrency: int | None = None,
+        chunk_tokens: int | None = None,
+    ):
+        cfg = get_config()
         self.client = client or GPTClient()
+        self.concurrency = concurrency or cfg.gpt_concurrency
+        self.chunk_tokens = chunk_tokens or cfg.gpt_chunk_tokens
         logger.debug("Extractor init")
 
-    def extract_fields(self, transcript: str) -> dict:
-        logger.info("Extractor.extract_fields len=%d", len(transcript or ""))
-        if not transcript:
-            return {"goal":[], "agenda":[], "attendance":[], "decisions":[], "action_items":[]}
+    def _extract_chunk(self, text: str, note: str = "") -> dict:
         msgs = [
             {"role":"system","content":"Bạn là hệ thống trích xuất dữ liệu họp chính xác và súc tích."},
-            {"role":"user","content": _EXTRACT_INSTRUCTIONS + transcript},
+            {"role":"user","content": _EXTRACT_INSTRUCTIONS + note + text},
         ]
         raw = self.client.chat_json(msgs, temperature=0.0, max_tokens=1400)
         try:
@@ -50,3 +107,23 @@ class Extractor:
             "decisions": data.get("decisions", []) or [],
             "action_items": data.get("action_items", []) or [],
         }
+
+    def extract_fields(self, transcript: str, segments: list | None = None, memo=None, cancel=None) -> dict:
+        """
+        Transcript dài được chia chunk theo token (ranh giới segment/câu), trích xuất
+        song song từng chunk rồi gộp + loại trùng.
+        `memo`: PartialMemo của job -> chunk đã trích xuất ở lần chạy trước được dùng lại.
+        `cancel`: object có `.cancelled` -> dừng giữa các chunk (CancelledError).
+        """
+        logger.info("Extractor.extract_fields len=%d", len(transcript or ""))
+        if not transcript:
+            return _empty()
+        chunks = chunk_text(transcript, segments, self.chunk_tokens, getattr(self.client, "model", None))
+        if len(chunks) <= 1:
+            return memoized(self._extract_chunk, memo)(transcript)
+        parts = map_bounded(
+            memoized(lambda t: self._extract_chunk(t, _PART_NOTE), memo), chunks, self.concurrency, cancel,
+        )
+        merged = merge_extractions(parts)
+        logger.info("Extractor merged %d chunks -> %d action items", len(chunks), len(merged["action_items"]))
+        return merged
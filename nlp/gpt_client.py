@@ -1,48 +1,158 @@
 # ------------------------------
 # file: meeting_assistant/nlp/gpt_client.py
 # ------------------------------
-from core.config import CONFIG
+import random
+import threading
+import time
+
+from core import metrics
+from core.config import get_config
 from core.logger import logger
+from .cache import ResponseCache, get_response_cache
 
 try:
     from openai import OpenAI
+    import openai as _openai
+    # Lỗi tạm thời: thử lại với backoff
+    _RETRYABLE = (
+        _openai.RateLimitError,
+        _openai.APITimeoutError,
+        _openai.APIConnectionError,
+        _openai.InternalServerError,
+    )
 except Exception as e:
     OpenAI = None
+    _RETRYABLE = ()
     logger.warning("OpenAI SDK not available: %s", e)
 
+MAX_RETRIES = 5
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 30.0
+
+
+def _retry_after(err) -> float | None:
+    """Đọc header Retry-After (giây) nếu server trả về."""
+    try:
+        val = err.response.headers.get("retry-after")
+        return float(val) if val is not None else None
+    except Exception:
+        return None
+
+
+_slots: threading.BoundedSemaphore | None = None
+_slots_size = 0
+_slots_lock = threading.Lock()
+
+
+def _request_slots() -> threading.BoundedSemaphore:
+    """Semaphore chung cả process cho request chat API, cỡ theo CONFIG.gpt_concurrency.
+    Summarize + extract song song, nhiều session (batch --nlp-workers) cùng chia giới hạn này.
+    """
+    global _slots, _slots_size
+    size = max(1, get_config().gpt_concurrency)
+    with _slots_lock:
+        if _slots is None or _slots_size != size:
+            # Đổi cấu hình: request đang bay vẫn release semaphore cũ mà nó đã acquire
+            _slots, _slots_size = threading.BoundedSemaphore(size), size
+        return _slots
+
+
+_NO_CACHE = object()
+
+
 class GPTClient:
-    def __init__(self, api_key: str | None = None, model: str | None = None):
-        self.api_key = api_key or CONFIG.openai_api_key
-        self.model = model or CONFIG.gpt_model
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str | None = None,
+        cache: ResponseCache | None | object = _NO_CACHE,
+        base_url: str | None = None,
+    ):
+        """
+        cache: mặc định dùng cache đĩa chung (get_response_cache()); truyền None để tắt.
+        base_url: endpoint tương thích OpenAI khác (proxy, stub của bench/); None = mặc định SDK.
+        """
+        cfg = get_config()
+        self.api_key = api_key or cfg.openai_api_key
+        self.model = model or cfg.gpt_model
         if not self.api_key:
             raise RuntimeError("OPENAI_API_KEY chưa được cấu hình (.env)")
         if OpenAI is None:
             raise RuntimeError("Chưa cài openai SDK. Chạy: pip install openai")
-        self.client = OpenAI(api_key=self.api_key)
+        # Tự retry ở _create (backoff + jitter) thay cho retry mặc định của SDK
+        extra = {"base_url": base_url} if base_url else {}
+        self.client = OpenAI(api_key=self.api_key, max_retries=0, **extra)
+        self.cache = get_response_cache() if cache is _NO_CACHE else cache
         logger.debug("GPTClient init model=%s key_set=%s", self.model, bool(self.api_key))
 
+    def _create(self, **params):
+        """chat.completions.create với retry + exponential backoff cho rate-limit / lỗi tạm thời."""
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                # Chỉ giữ slot trong lúc gọi API; chờ backoff không chiếm slot của request khác
+                with _request_slots():
+                    return self.client.chat.completions.create(**params)
+            except _RETRYABLE as e:
+                metrics.inc("gpt_retries_total", error=type(e).__name__, model=self.model)
+                if attempt >= MAX_RETRIES:
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * (2 ** attempt))
+                    delay *= random.uniform(0.5, 1.0)
+                logger.warning(
+                    "GPTClient %s (attempt %d/%d), retry in %.1fs",
+                    type(e).__name__, attempt + 1, MAX_RETRIES, delay,
+                )
+                time.sleep(delay)
+
+    def _cached(self, kind: str, messages: list[dict], params: dict) -> str:
+        """Tra cache theo (model, kind, messages, params); miss thì gọi API rồi lưu."""
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.make_key(self.model, kind, messages, params)
+            try:
+                hit = self.cache.get(key)
+            except Exception as e:
+                # SQLite bị khoá / hỏng (nhiều worker batch) -> coi như miss, không làm hỏng stage GPT
+                logger.warning("GPTClient cache get failed: %s", e)
+                hit = None
+            metrics.inc("gpt_cache_total", result="hit" if hit is not None else "miss", kind=kind)
+            if hit is not None:
+                logger.debug("GPTClient cache hit %s %s", kind, key[:12])
+                return hit
+        extra = {"response_format": {"type": "json_object"}} if kind == "json" else {}
+        # latency gồm cả thời gian chờ retry/backoff
+        with metrics.timer("gpt_request_seconds", kind=kind, model=self.model):
+            resp = self._create(model=self.model, messages=messages, **params, **extra)
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            metrics.inc("gpt_tokens_total", getattr(usage, "prompt_tokens", 0) or 0, type="prompt", model=self.model)
+            metrics.inc("gpt_tokens_total", getattr(usage, "completion_tokens", 0) or 0, type="completion",
+                        model=self.model)
+        text = (resp.choices[0].message.content or "").strip()
+        if key is not None and text:
+            try:
+                self.cache.put(key, text)
+            except Exception as e:
+                logger.warning("GPTClient cache put failed: %s", e)
+        return text
+
     def chat(self, messages: list[dict], **kwargs) -> str:
         """
         messages: [{"role":"system"|"user"|"assistant", "content":"..."}]
         return: assistant text
         """
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=kwargs.get("temperature", 0.2),
-            max_tokens=kwargs.get("max_tokens", 800),
-        )
-        return (resp.choices[0].message.content or "").strip()
+        return self._cached("chat", messages, {
+            "temperature": kwargs.get("temperature", 0.2),
+            "max_tokens": kwargs.get("max_tokens", 800),
+        })
 
     def chat_json(self, messages: list[dict], **kwargs) -> str:
         """
         Force JSON output (for extractor). Return raw string (JSON).
         """
-        resp = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=kwargs.get("temperature", 0.1),
-            max_tokens=kwargs.get("max_tokens", 1200),
-            response_format={"type": "json_object"},
-        )
-        return (resp.choices[0].message.content or "").strip()
+        return self._cached("json", messages, {
+            "temperature": kwargs.get("temperature", 0.1),
+            "max_tokens": kwargs.get("max_tokens", 1200),
+        })
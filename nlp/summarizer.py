@@ -1,9 +1,13 @@
 # ------------------------------
 # file: meeting_assistant/nlp/summarizer.py
 # ------------------------------
+from concurrent.futures import CancelledError
 from .gpt_client import GPTClient
+from .concurrency import map_bounded
+from .chunker import chunk_text, count_tokens
+from core.config import get_config
+from core.jobs import memoized
 from core.logger import logger
-import textwrap
 
 _SUMMARY_PROMPT = """Bạn là trợ lý tóm tắt biên bản họp bằng tiếng Việt.
 YÊU CẦU: Viết ngắn gọn, rõ ràng, chỉ các ý chính; tránh lặp; giữ đúng ngữ cảnh.
@@ -12,10 +16,24 @@ Nếu input dài, tổng hợp thành 5–10 bullet, sau đó chốt 1–2 dòng
 Văn bản cần tóm tắt (tiếng Việt):
 """
 
+_PARTIAL_SEP = "\n\n---\n\n"
+
+
 class Summarizer:
-    def __init__(self, client: GPTClient | None = None):
+    def __init__(
+        self,
+        client: GPTClient | None = None,
+        concurrency: int | None = None,
+        chunk_tokens: int | None = None,
+    ):
+        cfg = get_config()
         self.client = client or GPTClient()
-        logger.debug("Summarizer init")
+        self.concurrency = concurrency or cfg.gpt_concurrency
+        self.chunk_tokens = chunk_tokens or cfg.gpt_chunk_tokens
+        logger.debug("Summarizer init concurrency=%d chunk_tokens=%d", self.concurrency, self.chunk_tokens)
+
+    def _tokens(self, text: str) -> int:
+        return count_tokens(text, getattr(self.client, "model", None))
 
     def _summarize_chunk(self, text: str) -> str:
         msgs = [
@@ -24,19 +42,55 @@ class Summarizer:
         ]
         return self.client.chat(msgs, temperature=0.2, max_tokens=900)
 
-    def summarize(self, transcript: str) -> str:
+    def summarize(self, transcript: str, segments: list | None = None, memo=None, cancel=None) -> str:
+        """
+        `segments`: segment Whisper (nếu còn khớp transcript) để cắt chunk đúng ranh giới câu.
+        `memo`: PartialMemo của job (core.jobs) -> chunk đã tóm tắt ở lần chạy trước không gọi lại GPT.
+        `cancel`: object có `.cancelled` -> dừng giữa các chunk (CancelledError).
+        """
         logger.info("Summarizer.summarize len=%d", len(transcript or ""))
         if not transcript:
             return ""
-        # Chunk theo ~4k ký tự để an toàn
-        chunks = []
-        buf = transcript.strip()
-        chunk_size = 4000
-        for i in range(0, len(buf), chunk_size):
-            chunks.append(buf[i:i+chunk_size])
-
-        partials = [self._summarize_chunk(ch) for ch in chunks]
-        # Tóm tắt lại lần cuối
-        final_input = "\n\n---\n\n".join(partials)
-        final = self._summarize_chunk(final_input)
+        # Chunk theo token của model, cắt ở ranh giới segment/câu
+        chunks = chunk_text(transcript.strip(), segments, self.chunk_tokens, getattr(self.client, "model", None))
+
+        # Map: tóm tắt các chunk song song (GPTClient giới hạn request toàn process theo gpt_concurrency)
+        call = memoized(self._summarize_chunk, memo)
+        partials = map_bounded(call, chunks, self.concurrency, cancel)
+        # Reduce: tóm tắt lại lần cuối (phân cấp nếu quá dài)
+        final = self._reduce(partials, call, cancel)
         return final.strip()
+
+    def _reduce(self, partials: list[str], call=None, cancel=None) -> str:
+        """
+        Gộp các bản tóm tắt con. Nếu nối lại vẫn vượt chunk_tokens thì gom nhóm,
+        tóm tắt từng nhóm song song rồi lặp lại cho tới khi vừa một lần gọi.
+        """
+        call = call or self._summarize_chunk
+        level = 0
+        while len(partials) > 1 and self._tokens(_PARTIAL_SEP.join(partials)) > self.chunk_tokens:
+            groups = self._group(partials)
+            if len(groups) >= len(partials):
+                # Mỗi partial đã quá dài -> ghép cặp để chắc chắn thu gọn dần
+                groups = [partials[i:i+2] for i in range(0, len(partials), 2)]
+            level += 1
+            logger.info("Summarizer reduce level=%d: %d partials -> %d groups", level, len(partials), len(groups))
+            partials = map_bounded(
+                lambda g: call(_PARTIAL_SEP.join(g)), groups, self.concurrency, cancel
+            )
+        if cancel is not None and cancel.cancelled:
+            raise CancelledError()
+        return call(_PARTIAL_SEP.join(partials))
+
+    def _group(self, partials: list[str]) -> list[list[str]]:
+        groups: list[list[str]] = []
+        size = 0
+        for p in partials:
+            add = self._tokens(p) + 2
+            if groups and size + add <= self.chunk_tokens:
+                groups[-1].append(p)
+                size += add
+            else:
+                groups.append([p])
+                size = add
+        return groups
@@ -0,0 +1,291 @@
+# ------------------------------
+# file: meeting_assistant/report/bulk_export.py
+# ------------------------------
+"""Bulk export of many sessions into a single ZIP archive.
+
+    python -m report.bulk_export out.zip --month 2024-05 --workers 4
+
+Sessions and their latest transcript are read from db.dao in keyset pages,
+each session is rendered (DOCX report, SRT from the segment store, JSON)
+in a process pool, and the files are written straight into a ZIP stream —
+no temporary files. At most `workers * 2` sessions are in flight and pages
+are fetched only as the pool drains, so memory stays bounded however many
+sessions are exported. Archive layout:
+
+    <YYYY-MM-DD>_<title>_<uuid8>/report.docx | captions.srt | session.json
+"""
+from __future__ import annotations
+import argparse
+import io
+import json
+import multiprocessing as mp
+import os
+import re
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from core import metrics
+from core.config import get_config
+from core.logger import logger
+
+FORMATS = ("docx", "srt", "json")
+PAGE_SIZE = 50
+_JSON_KEYS = ("goal", "agenda", "attendance", "decisions", "action_items")
+
+
+@dataclass
+class BulkExportResult:
+    sessions: int = 0
+    files: int = 0
+    bytes: int = 0
+    errors: list = field(default_factory=list)  # [(uuid, format, message)]
+    cancelled: bool = False
+    wall_sec: float = 0.0
+
+    def line(self) -> str:
+        state = "cancelled" if self.cancelled else "done"
+        return (f"{state}: {self.sessions} sessions, {self.files} files, {self.bytes / 1e6:.1f} MB, "
+                f"{len(self.errors)} errors in {self.wall_sec:.1f}s")
+
+
+def _text(val) -> str:
+    if val is None:
+        return ""
+    if isinstance(val, datetime):
+        return val.strftime("%Y-%m-%d %H:%M:%S")
+    return str(val)
+
+
+def _safe(text: str, limit: int = 60) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", text or "").strip("_.")[:limit] or "meeting"
+
+
+def _json_list(raw) -> list:
+    if not raw:
+        return []
+    if isinstance(raw, (list, dict)):
+        return raw
+    try:
+        return json.loads(raw)
+    except Exception:
+        return []
+
+
+def _plain(item: dict) -> dict:
+    """Item của dao.export_page -> dict thuần (pickle sang worker, ghi JSON)."""
+    uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path = item["session"]
+    t = item.get("transcript")
+    return {
+        "uuid": uuid, "title": title or "", "main_topic": main_topic or "",
+        "start_time": _text(start_time), "end_time": _text(end_time),
+        "duration_min": int(duration_min or 0), "status": status or "", "audio_path": audio_path or "",
+        "transcript_id": t[0] if t else None,
+        "transcript_created_at": _text(t[9]) if t else "",
+        "full_text": (t[2] if t else "") or "",
+        "summary": (t[3] if t else "") or "",
+        "extracted": {k: _json_list(t[4 + i]) if t else [] for i, k in enumerate(_JSON_KEYS)},
+    }
+
+
+def folder_name(sess: dict) -> str:
+    day = sess["start_time"][:10]
+    return f"{day + '_' if day else ''}{_safe(sess['title'])}_{sess['uuid'][:8]}"
+
+
+def _fmt_dur(minutes: int) -> str:
+    h, m = divmod(int(minutes or 0), 60)
+    return f"{m}m" if not h else (f"{h}h" if not m else f"{h}h {m}m")
+
+
+# ---------- worker (chạy trong tiến trình con) ----------
+def render_session(sess: dict, formats: Sequence[str], base_dir: str) -> Tuple[str, List[Tuple[str, bytes]], list]:
+    """Render các file của một session trong bộ nhớ. Trả (uuid, [(arcname, bytes)], [(format, lỗi)])."""
+    files: List[Tuple[str, bytes]] = []
+    errors: list = []
+    prefix = folder_name(sess)
+    if "docx" in formats:
+        try:
+            from report.docx_export import export_meeting_report
+            buf = io.BytesIO()
+            meta = {
+                "title": sess["title"] or "Meeting Report",
+                "datetime": f"{sess['start_time'][:16]} → {sess['end_time'][:16]}  ({_fmt_dur(sess['duration_min'])})",
+            }
+            export_meeting_report(buf, meta, sess["summary"], sess["extracted"])
+            files.append((f"{prefix}/report.docx", buf.getvalue()))
+        except Exception as e:
+            errors.append(("docx", str(e)))
+    if "srt" in formats:
+        try:
+            from asr.segment_store import load_segments
+            from report.srt_export import write_subtitles
+            store = load_segments(sess["uuid"], base_dir)
+            if store is not None and len(store):
+                buf = io.StringIO()
+                write_subtitles(buf, store, fmt="srt", wrap=42, merge_min_sec=1.0)
+                files.append((f"{prefix}/captions.srt", buf.getvalue().encode("utf-8")))
+        except Exception as e:
+            errors.append(("srt", str(e)))
+    if "json" in formats:
+        files.append((f"{prefix}/session.json", json.dumps(sess, ensure_ascii=False, indent=1).encode("utf-8")))
+    return sess["uuid"], files, errors
+
+
+class _InlinePool:
+    """workers=1: chạy ngay trong tiến trình hiện tại, cùng giao diện submit()."""
+
+    def submit(self, fn, *args):
+        fut: Future = Future()
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+        return fut
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+# ---------- main API ----------
+def iter_sessions(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    search: Optional[str] = None,
+    uuids: Optional[list] = None,
+    page_size: int = PAGE_SIZE,
+) -> Iterator[dict]:
+    """Duyệt lười session + transcript mới nhất theo trang keyset của dao.export_page."""
+    from db.dao import export_page
+    after = 0
+    while True:
+        items, after = export_page(after, page_size, start=start, end=end, search=search, uuids=uuids)
+        for item in items:
+            yield _plain(item)
+        if after is None:
+            return
+
+
+def export_zip(
+    dest,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    search: Optional[str] = None,
+    uuids: Optional[list] = None,
+    formats: Sequence[str] = FORMATS,
+    workers: int = 0,
+    on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    cancel=None,
+    page_size: int = PAGE_SIZE,
+) -> BulkExportResult:
+    """
+    Xuất các session khớp bộ lọc vào ZIP `dest` (đường dẫn hoặc file nhị phân, kể cả không seek được).
+    on_progress(done, total|None) sau mỗi session; cancel: object có `.cancelled`
+    (vd. CancelToken của EXECUTOR) -> dừng sớm, file ZIP dở dang bị xoá.
+    """
+    bad = [f for f in formats if f not in FORMATS]
+    if bad:
+        raise ValueError(f"unknown formats {bad} (expected {FORMATS})")
+    # như docx_export.default_export_workers (không import python-docx khi chỉ xuất srt/json)
+    workers = workers or max(1, min(8, (os.cpu_count() or 2) - 1))
+    total = len(uuids) if uuids is not None else None
+    res = BulkExportResult()
+    t0 = time.perf_counter()
+    base_dir = get_config().base_dir
+    owns = isinstance(dest, (str, os.PathLike))
+    if owns:
+        os.makedirs(os.path.dirname(os.path.abspath(dest)) or ".", exist_ok=True)
+    pool = _InlinePool() if workers <= 1 else ProcessPoolExecutor(
+        max_workers=workers, mp_context=mp.get_context("spawn"),
+    )
+    inflight: deque = deque()
+    complete = False
+
+    def drain_one(zf):
+        uuid, files, errors = inflight.popleft().result()
+        for arcname, data in files:
+            # docx đã là zip -> STORED, khỏi nén lại
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED if arcname.endswith(".docx") else zipfile.ZIP_DEFLATED
+            zf.writestr(info, data)
+            res.files += 1
+            res.bytes += len(data)
+        res.errors += [(uuid, fmt, msg) for fmt, msg in errors]
+        res.sessions += 1
+        metrics.inc("bulk_export_sessions_total")
+        if on_progress:
+            on_progress(res.sessions, total)
+
+    try:
+        with zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for sess in iter_sessions(start, end, search, uuids, page_size):
+                if cancel is not None and cancel.cancelled:
+                    res.cancelled = True
+                    break
+                inflight.append(pool.submit(render_session, sess, tuple(formats), base_dir))
+                # Giữ tối đa workers*2 session trong bộ nhớ; trang DB kế tiếp chỉ đọc khi pool rảnh
+                while len(inflight) >= workers * 2:
+                    drain_one(zf)
+            while inflight and not res.cancelled:
+                drain_one(zf)
+                if cancel is not None and cancel.cancelled:
+                    res.cancelled = True
+        complete = not res.cancelled
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if not complete and owns:
+            # Huỷ / lỗi giữa chừng: không để lại ZIP dở dang
+            try:
+                os.remove(dest)
+            except OSError:
+                pass
+    res.wall_sec = time.perf_counter() - t0
+    metrics.observe("bulk_export_seconds", res.wall_sec)
+    logger.info("export_zip -> %s %s", dest if owns else "<stream>", res.line())
+    return res
+
+
+# ---------- CLI ----------
+def _month_range(month: str) -> Tuple[str, str]:
+    y, m = (int(x) for x in month.split("-"))
+    return f"{y:04}-{m:02}-01", (f"{y + 1:04}-01-01" if m == 12 else f"{y:04}-{m + 1:02}-01")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Export many meeting sessions into one ZIP")
+    ap.add_argument("output", help="file .zip ('-' = stdout)")
+    ap.add_argument("--month", help="YYYY-MM (thay cho --from/--to)")
+    ap.add_argument("--from", dest="start", help="start_time >= (YYYY-MM-DD)")
+    ap.add_argument("--to", dest="end", help="start_time < (YYYY-MM-DD)")
+    ap.add_argument("--search", help="lọc title (LIKE)")
+    ap.add_argument("--formats", default=",".join(FORMATS), help="docx,srt,json")
+    ap.add_argument("--workers", type=int, default=0, help="số tiến trình render (0 = tự động)")
+    args = ap.parse_args(argv)
+
+    start, end = _month_range(args.month) if args.month else (args.start, args.end)
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    metrics.start_from_config()
+
+    def progress(done, total):
+        if done % 10 == 0:
+            print(f"\rexported {done} sessions", end="", file=sys.stderr, flush=True)
+
+    dest = sys.stdout.buffer if args.output == "-" else args.output
+    try:
+        res = export_zip(dest, start, end, args.search, formats=formats, workers=args.workers, on_progress=progress)
+    except KeyboardInterrupt:
+        print("\ninterrupted", file=sys.stderr)
+        return 130
+    print(f"\n{res.line()}", file=sys.stderr)
+    for uuid, fmt, msg in res.errors[:20]:
+        print(f"  {uuid} {fmt}: {msg}", file=sys.stderr)
+    return 1 if res.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
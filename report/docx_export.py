@@ -1,26 +1,55 @@
+"""DOCX meeting report.
+
+Fonts, colours and spacing live in paragraph styles of a template document
+built once per process and cached as bytes; each export re-opens the cached
+template instead of styling every run. Action-item rows are generated as one
+XML fragment and appended to the table in bulk (python-docx's add_row()/cell
+access is O(rows x cols) object churn). `export_many` renders many reports
+in a process pool.
+"""
 from __future__ import annotations
+import io
+import multiprocessing as mp
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
 from docx import Document
 from docx.shared import Pt, Inches, RGBColor
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
+from core import metrics
 from core.logger import logger
 
+FONT = "Segoe UI"
+MUTED = (100, 114, 139)
+BORDER = "1E2230"
 
-# ---------- helpers ----------
-def _ensure_font(paragraph, name="Segoe UI", size=11, bold=False, color: tuple[int,int,int]=(0,0,0)):
-    """Apply font to all runs inside a paragraph."""
-    if not paragraph.runs:
-        run = paragraph.add_run("")
-    for run in paragraph.runs:
-        run.font.name = name
-        run.font.size = Pt(size)
-        run.font.bold = bold
-        run.font.color.rgb = RGBColor(*color)
+# Style riêng của báo cáo (tên -> (cỡ chữ, đậm, màu, căn lề))
+_STYLES = {
+    "MA Title": (22, True, None, WD_ALIGN_PARAGRAPH.LEFT),
+    "MA Subtitle": (10, False, MUTED, WD_ALIGN_PARAGRAPH.LEFT),
+    "MA Footer": (9, False, MUTED, WD_ALIGN_PARAGRAPH.RIGHT),
+    "MA Table Header": (11, True, None, None),
+    "MA Table Cell": (11, False, None, None),
+}
+_AI_HEADERS = ("Action Item", "Assigned To", "Due Date", "Completed")
+_AI_ALIGN = ("left", "left", "left", "center")
+
+_XML_BAD = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_template_lock = threading.Lock()
+_template: Optional[bytes] = None
 
+
+# ---------- helpers ----------
 def _add_spacer(doc: Document, height_pt: int = 4):
     p = doc.add_paragraph("")
     p.paragraph_format.space_after = Pt(height_pt)
@@ -54,7 +83,7 @@ def _borders_xml(top=None, left=None, bottom=None, right=None):
             borders.append(side)
     return borders
 
-def _tbl_borders_xml(sz=1, color="1E2230"):
+def _tbl_borders_xml(sz=1, color=BORDER):
     borders = OxmlElement('w:tblBorders')
     for side in ("top","left","bottom","right","insideH","insideV"):
         e = OxmlElement(f"w:{side}")
@@ -66,11 +95,10 @@ def _tbl_borders_xml(sz=1, color="1E2230"):
 
 def _bullet_block(doc: Document, title: str, items: Iterable[str]):
     doc.add_heading(title, level=2)
+    style = "List Bullet" if "List Bullet" in doc.styles else None
     for it in (list(items) or ["Chưa xác định"]):
-        p = doc.add_paragraph(it, style=None)
-        p.style = doc.styles["List Bullet"] if "List Bullet" in doc.styles else None
+        p = doc.add_paragraph(it, style=style)
         p.paragraph_format.space_after = Pt(2)
-        _ensure_font(p, size=11)
 
 def _apply_page_margins(doc: Document, left=0.8, right=0.8, top=0.7, bottom=0.7):
     """inches"""
@@ -81,41 +109,111 @@ def _apply_page_margins(doc: Document, left=0.8, right=0.8, top=0.7, bottom=0.7)
         section.bottom_margin = Inches(bottom)
 
 
+# ---------- template ----------
+def _build_template() -> bytes:
+    """Document trống đã có lề trang + style; font/màu đặt một lần ở style, không ở từng run."""
+    doc = Document()
+    _apply_page_margins(doc)
+    normal = doc.styles["Normal"]
+    normal.font.name = FONT
+    normal.font.size = Pt(11)
+    normal.font.color.rgb = RGBColor(0, 0, 0)
+    for name, (size, bold, color, align) in _STYLES.items():
+        st = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        st.base_style = normal
+        st.font.size = Pt(size)
+        st.font.bold = bold
+        if color:
+            st.font.color.rgb = RGBColor(*color)
+        if align is not None:
+            st.paragraph_format.alignment = align
+        if name.startswith("MA Table"):
+            st.paragraph_format.space_after = Pt(0)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def _new_document() -> Document:
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = _build_template()
+    return Document(io.BytesIO(_template))
+
+
+def _run_xml(text: str) -> str:
+    text = _XML_BAD.sub("", str(text or ""))
+    if not text:
+        return ""
+    lines = [escape(line) for line in text.split("\n")]
+    return '<w:r><w:t xml:space="preserve">' + '</w:t><w:br/><w:t xml:space="preserve">'.join(lines) + "</w:t></w:r>"
+
+
+def _rows_xml(rows: Iterable[Tuple[str, ...]], style_id: str, aligns: Tuple[str, ...]) -> str:
+    """Toàn bộ <w:tr> của bảng trong một chuỗi -> parse một lần."""
+    parts: List[str] = []
+    for row in rows:
+        parts.append("<w:tr>")
+        for text, jc in zip(row, aligns):
+            parts.append(
+                f'<w:tc><w:p><w:pPr><w:pStyle w:val="{style_id}"/><w:jc w:val="{jc}"/></w:pPr>'
+                f"{_run_xml(text)}</w:p></w:tc>"
+            )
+        parts.append("</w:tr>")
+    return "".join(parts)
+
+
+def _action_items_table(doc: Document, items: list):
+    table = doc.add_table(rows=1, cols=len(_AI_HEADERS))
+    table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    table.autofit = True
+    # Viền một lần ở mức bảng (insideH/insideV), không gắn tcBorders cho từng ô
+    table._tbl.tblPr.append(_tbl_borders_xml(sz=1, color=BORDER))
+
+    header_style = doc.styles["MA Table Header"]
+    for i, (c, text) in enumerate(zip(table.rows[0].cells, _AI_HEADERS)):
+        p = c.paragraphs[0]
+        p.text = text
+        p.style = header_style
+        p.alignment = WD_ALIGN_PARAGRAPH.LEFT if _AI_ALIGN[i] == "left" else WD_ALIGN_PARAGRAPH.CENTER
+
+    rows = [
+        (it.get("item", "") or "", it.get("assignee", "") or "", it.get("due", "") or "",
+         "✔" if it.get("done") else "")
+        for it in items
+    ] or [("Chưa xác định", "", "", "")]
+    frag = parse_xml(f"<w:tbl {nsdecls('w')}>{_rows_xml(rows, doc.styles['MA Table Cell'].style_id, _AI_ALIGN)}</w:tbl>")
+    tbl = table._tbl
+    for tr in list(frag):
+        tbl.append(tr)
+    return table
+
+
 # ---------- main API ----------
-def export_meeting_report(docx_path: str, meta: dict, summary: str, extracted: dict):
+@metrics.timed("report_export_seconds", format="docx")
+def export_meeting_report(docx_path, meta: dict, summary: str, extracted: dict):
     """
     Export a polished meeting report.
     `extracted` keys: goal, agenda, attendance, decisions, action_items (list of dict)
+    `docx_path`: đường dẫn hoặc file-like (vd. BytesIO để ghi thẳng vào ZIP).
     """
     logger.info("export_meeting_report -> %s", docx_path)
-    Path(docx_path).parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(docx_path, (str, os.PathLike)):
+        Path(docx_path).parent.mkdir(parents=True, exist_ok=True)
 
-    # Document + base styles
-    doc = Document()
-    _apply_page_margins(doc)
-    # Base font
-    if "Normal" in doc.styles:
-        doc.styles["Normal"].font.name = "Segoe UI"
-        doc.styles["Normal"].font.size = Pt(11)
-
-    # Title
-    title_text = meta.get("title", "Meeting Report")
-    title_p = doc.add_paragraph(title_text)
-    title_p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    _ensure_font(title_p, size=22, bold=True)
-
-    # Subtitle meta (datetime)
-    dt = meta.get("datetime") or ""
-    sub_p = doc.add_paragraph(dt)
-    sub_p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    _ensure_font(sub_p, size=10, color=(100,114,139))  # muted gray
+    doc = _new_document()
+
+    # Title + subtitle meta (datetime)
+    doc.add_paragraph(meta.get("title", "Meeting Report"), style="MA Title")
+    doc.add_paragraph(meta.get("datetime") or "", style="MA Subtitle")
     _add_spacer(doc, 2)
 
     # Summary (paragraph block)
     doc.add_heading("Summary", level=2)
     p = doc.add_paragraph(summary or "Chưa xác định")
     p.paragraph_format.space_after = Pt(4)
-    _ensure_font(p, size=11)
     _add_spacer(doc, 6)
 
     # Goal / Agenda / Attendance / Decisions (bulleted)
@@ -130,58 +228,57 @@ def export_meeting_report(docx_path: str, meta: dict, summary: str, extracted: d
 
     # Action Items — proper table
     doc.add_heading("Action Items", level=2)
-    ai = extracted.get("action_items") or []
-    table = doc.add_table(rows=1, cols=4)
-    table.alignment = WD_TABLE_ALIGNMENT.CENTER
-    table.autofit = True
-
-    # table borders
-    tbl_pr = table._tbl.tblPr
-    tbl_pr.append(_tbl_borders_xml(sz=1, color="1E2230"))
-
-    hdr = table.rows[0].cells
-    hdr[0].text = "Action Item"
-    hdr[1].text = "Assigned To"
-    hdr[2].text = "Due Date"
-    hdr[3].text = "Completed"
-
-    # header styling
-    for i, c in enumerate(hdr):
-        for p in c.paragraphs:
-            p.alignment = WD_ALIGN_PARAGRAPH.LEFT if i < 3 else WD_ALIGN_PARAGRAPH.CENTER
-            _ensure_font(p, size=11, bold=True)
-        # cell borders (thicker bottom for header)
-        c._tc.get_or_add_tcPr().append(_borders_xml(bottom=(1, "1E2230")))
-
-    if not ai:
-        row = table.add_row().cells
-        row[0].text = "Chưa xác định"
-        row[1].text = ""
-        row[2].text = ""
-        row[3].text = ""
-    else:
-        for it in ai:
-            row = table.add_row().cells
-            row[0].text = it.get("item", "") or ""
-            row[1].text = it.get("assignee", "") or ""
-            row[2].text = it.get("due", "") or ""
-            row[3].text = "✔" if it.get("done") else ""
-
-    # body rows styling
-    for r_idx, row in enumerate(table.rows[1:], start=1):
-        for c_idx, c in enumerate(row.cells):
-            for p in c.paragraphs:
-                p.alignment = WD_ALIGN_PARAGRAPH.LEFT if c_idx < 3 else WD_ALIGN_PARAGRAPH.CENTER
-                _ensure_font(p, size=11)
-            # thin borders for body
-            c._tc.get_or_add_tcPr().append(_borders_xml(top=(1, "1E2230"), bottom=(1, "1E2230")))
+    _action_items_table(doc, extracted.get("action_items") or [])
 
     # Optional footer or note
     _add_spacer(doc, 10)
-    foot = doc.add_paragraph("Generated by AI Meeting Assistant")
-    foot.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    _ensure_font(foot, size=9, color=(100,114,139))
+    doc.add_paragraph("Generated by AI Meeting Assistant", style="MA Footer")
 
     # Save
     doc.save(docx_path)
     logger.info("export_meeting_report saved -> %s", docx_path)
+
+
+# ---------- batch ----------
+def _warm_worker():
+    _new_document()
+
+
+def _export_one(job: dict) -> Tuple[str, Optional[str]]:
+    try:
+        export_meeting_report(job["path"], job["meta"], job.get("summary") or "", job.get("extracted") or {})
+        return job["path"], None
+    except Exception as e:
+        return job["path"], str(e)
+
+
+def default_export_workers() -> int:
+    return max(1, min(8, (os.cpu_count() or 2) - 1))
+
+
+def export_many(jobs: Iterable[dict], workers: int = 0, on_progress=None) -> List[Tuple[str, Optional[str]]]:
+    """
+    Xuất nhiều báo cáo song song trên pool tiến trình. jobs: {"path","meta","summary","extracted"}.
+    Trả [(path, lỗi hoặc None)] theo thứ tự đầu vào; on_progress(done, total) sau mỗi file.
+    Ít file (<= 2) hoặc workers=1 -> chạy ngay trong tiến trình hiện tại.
+    """
+    jobs = list(jobs)
+    workers = workers or default_export_workers()
+    out: List[Tuple[str, Optional[str]]] = []
+    if workers <= 1 or len(jobs) <= 2:
+        for job in jobs:
+            out.append(_export_one(job))
+            if on_progress:
+                on_progress(len(out), len(jobs))
+        return out
+    # spawn: tiến trình cha có thread (Tk, executor) -> không fork
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(jobs)), mp_context=mp.get_context("spawn"), initializer=_warm_worker,
+    ) as pool:
+        for res in pool.map(_export_one, jobs, chunksize=max(1, len(jobs) // (workers * 4))):
+            out.append(res)
+            if on_progress:
+                on_progress(len(out), len(jobs))
+    failed = sum(1 for _, err in out if err)
+    logger.info("export_many: %d reports, %d failed, workers=%d", len(out), failed, workers)
+    return out
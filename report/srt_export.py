@@ -1,21 +1,166 @@
 # ------------------------------
 # file: meeting_assistant/report/srt_export.py
 # ------------------------------
-from pathlib import Path
-
-def export_srt(srt_path: str, segments: list[dict]):
-    """segments: [{"start": float, "end": float, "text": str}]"""
-    lines = []
-    def fmt(t):
-        h = int(t // 3600)
-        m = int((t % 3600) // 60)
-        s = int(t % 60)
-        ms = int((t - int(t)) * 1000)
-        return f"{h:02}:{m:02}:{s:02},{ms:03}"
-    for i, seg in enumerate(segments, start=1):
-        lines.append(str(i))
-        lines.append(f"{fmt(seg['start'])} --> {fmt(seg['end'])}")
-        lines.append(seg['text'])
-        lines.append("")
-    Path(srt_path).parent.mkdir(parents=True, exist_ok=True)
-    Path(srt_path).write_text(".join(lines)", encoding="utf-8")
\ No newline at end of file
+"""Streaming SRT / WebVTT export.
+
+Segments are consumed one at a time from any iterable — a list, a
+`SegmentStore`, or `WhisperWorker.transcribe_stream` (partials are skipped) —
+and written through a buffered text handle, so memory stays constant for
+multi-hour recordings:
+
+    from asr.segment_store import load_segments
+    export_srt("meeting.srt", load_segments(uuid), wrap=42, merge_min_sec=1.2)
+"""
+from __future__ import annotations
+import os
+import textwrap
+from typing import IO, Iterable, Iterator, Optional
+
+from core import metrics
+
+FORMATS = ("srt", "vtt")
+BUFFER_SIZE = 1 << 16
+
+
+def format_timestamp(t: float, fmt: str = "srt") -> str:
+    """Giây -> 'HH:MM:SS,mmm' (SRT) hoặc 'HH:MM:SS.mmm' (VTT); làm tròn tới ms."""
+    ms = max(0, int(round(float(t) * 1000)))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02}:{m:02}:{s:02}{',' if fmt == 'srt' else '.'}{ms:03}"
+
+
+def wrap_caption(text: str, width: int = 0, max_lines: int = 0) -> str:
+    """Ngắt dòng caption theo `width` ký tự (0 = không ngắt); max_lines > 0 thì dòng cuối gom phần dư."""
+    text = " ".join((text or "").split())
+    if width <= 0 or len(text) <= width:
+        return text
+    lines = textwrap.wrap(text, width=width, break_long_words=False, break_on_hyphens=False)
+    if max_lines > 0 and len(lines) > max_lines:
+        lines = lines[:max_lines - 1] + [" ".join(lines[max_lines - 1:])]
+    return "\n".join(lines)
+
+
+def final_segments(segments: Iterable[dict]) -> Iterator[dict]:
+    """Bỏ partial của transcribe_stream (final=False) và segment rỗng."""
+    for seg in segments:
+        if seg.get("final", True) and (seg.get("text") or "").strip():
+            yield seg
+
+
+def merge_short(
+    segments: Iterable[dict],
+    min_sec: float = 1.0,
+    max_chars: int = 84,
+    max_gap: float = 0.6,
+) -> Iterator[dict]:
+    """
+    Gộp segment quá ngắn (< min_sec) vào segment kế tiếp nếu khoảng lặng giữa hai
+    segment <= max_gap và tổng độ dài text <= max_chars. Chỉ giữ một segment chờ -> O(1) bộ nhớ.
+    """
+    pending: Optional[dict] = None
+    for seg in segments:
+        if pending is None:
+            pending = dict(seg)
+            continue
+        short = pending["end"] - pending["start"] < min_sec
+        text = f"{pending['text'].strip()} {seg['text'].strip()}"
+        if short and seg["start"] - pending["end"] <= max_gap and len(text) <= max_chars:
+            pending = {"start": pending["start"], "end": max(pending["end"], seg["end"]), "text": text}
+        else:
+            yield pending
+            pending = dict(seg)
+    if pending is not None:
+        yield pending
+
+
+class SubtitleWriter:
+    """
+    Ghi từng cue ra file (buffered). Dùng như context manager:
+
+        with SubtitleWriter("out.vtt") as w:
+            for seg in segments: w.write(seg)
+    """
+
+    def __init__(
+        self,
+        path_or_file,
+        fmt: Optional[str] = None,
+        wrap: int = 0,
+        max_lines: int = 2,
+        buffer_size: int = BUFFER_SIZE,
+    ):
+        if fmt is None:
+            name = path_or_file if isinstance(path_or_file, str) else getattr(path_or_file, "name", "")
+            fmt = "vtt" if str(name).lower().endswith(".vtt") else "srt"
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown subtitle format {fmt!r} (expected one of {FORMATS})")
+        self.fmt = fmt
+        self.wrap = wrap
+        self.max_lines = max_lines
+        self.count = 0
+        if isinstance(path_or_file, str):
+            os.makedirs(os.path.dirname(os.path.abspath(path_or_file)), exist_ok=True)
+            self._f: IO[str] = open(path_or_file, "w", encoding="utf-8", newline="\n", buffering=buffer_size)
+            self._owns = True
+        else:
+            self._f, self._owns = path_or_file, False
+        if fmt == "vtt":
+            self._f.write("WEBVTT\n\n")
+
+    def write(self, seg: dict) -> None:
+        text = wrap_caption(seg.get("text") or "", self.wrap, self.max_lines)
+        if not text:
+            return
+        start = max(float(seg["start"]), 0.0)
+        end = max(float(seg["end"]), start + 0.001)  # cue rỗng/ngược bị player bỏ qua
+        self.count += 1
+        head = f"{self.count}\n" if self.fmt == "srt" else ""
+        self._f.write(
+            f"{head}{format_timestamp(start, self.fmt)} --> {format_timestamp(end, self.fmt)}\n{text}\n\n"
+        )
+
+    def close(self) -> None:
+        if self._owns:
+            self._f.close()
+        else:
+            self._f.flush()
+
+    def __enter__(self) -> "SubtitleWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_subtitles(
+    path_or_file,
+    segments: Iterable[dict],
+    fmt: Optional[str] = None,
+    wrap: int = 0,
+    max_lines: int = 2,
+    merge_min_sec: float = 0.0,
+    merge_max_chars: int = 84,
+) -> int:
+    """
+    Ghi SRT/VTT từ iterable segment {"start","end","text"} (list, SegmentStore, generator
+    của transcribe_stream...). fmt None -> theo đuôi file. Trả về số cue đã ghi.
+    """
+    stream = final_segments(segments)
+    if merge_min_sec > 0:
+        stream = merge_short(stream, merge_min_sec, merge_max_chars)
+    with SubtitleWriter(path_or_file, fmt, wrap, max_lines) as w, \
+            metrics.timer("report_export_seconds", format=w.fmt):
+        for seg in stream:
+            w.write(seg)
+    return w.count
+
+
+def export_srt(srt_path: str, segments: Iterable[dict], **kwargs) -> int:
+    """segments: [{"start": float, "end": float, "text": str}] (hoặc generator)."""
+    return write_subtitles(srt_path, segments, fmt="srt", **kwargs)
+
+
+def export_vtt(vtt_path: str, segments: Iterable[dict], **kwargs) -> int:
+    return write_subtitles(vtt_path, segments, fmt="vtt", **kwargs)
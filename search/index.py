@@ -0,0 +1,306 @@
+# ------------------------------
+# file: meeting_assistant/search/index.py
+# ------------------------------
+"""Local full-text index over transcripts (SQLite FTS5).
+
+One FTS row per searchable unit (metadata in `units`, same rowid):
+  - 'segment'  : a Whisper segment (carries start/end seconds)
+  - 'text'     : a sentence of the transcript when no segments are known
+  - 'summary'  : the summary
+  - 'decision' : one decision
+  - 'title'    : session title + main topic
+
+Tokenizer is unicode61 with diacritics folded, so "quyet dinh" matches
+"quyết định". Results are ranked with bm25 and carry a highlighted snippet.
+The DAO keeps the index in sync best-effort after each commit; `rebuild()`
+re-creates it from MySQL (python -m search.index --rebuild).
+"""
+from __future__ import annotations
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from core.config import get_config
+from core.logger import logger
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+  body,
+  tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS units (
+  id INTEGER PRIMARY KEY,  -- = docs.rowid
+  session_uuid TEXT NOT NULL,
+  transcript_id INTEGER,
+  kind TEXT NOT NULL,
+  start_sec REAL,
+  end_sec REAL
+);
+CREATE INDEX IF NOT EXISTS idx_units_transcript ON units(transcript_id, kind);
+CREATE INDEX IF NOT EXISTS idx_units_session ON units(session_uuid, kind);
+CREATE TABLE IF NOT EXISTS sessions (
+  uuid TEXT PRIMARY KEY,
+  title TEXT,
+  start_time TEXT
+);
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class SearchHit:
+    session_uuid: str
+    transcript_id: Optional[int]
+    kind: str
+    start_sec: Optional[float]
+    end_sec: Optional[float]
+    snippet: str
+    score: float
+    title: str = ""
+    start_time: str = ""
+
+    def timestamp(self) -> str:
+        if self.start_sec is None:
+            return ""
+        s = int(self.start_sec)
+        return f"{s // 3600:02}:{s % 3600 // 60:02}:{s % 60:02}"
+
+
+def build_match(query: str) -> str:
+    """
+    Chuỗi người dùng -> biểu thức MATCH an toàn: mọi từ đều phải có (AND), từ cuối khớp tiền tố.
+    'đ' không phải dấu nên unicode61 không gộp với 'd'; vì 'đ' chỉ đứng đầu âm tiết,
+    từ gõ không dấu bắt đầu bằng 'd' được mở rộng thành (d... OR đ...).
+    """
+    words = _TOKEN_RE.findall(query or "")
+    terms = []
+    for i, w in enumerate(words):
+        star = "*" if i == len(words) - 1 else ""
+        if w[0] in "dD":
+            terms.append(f'("{w}"{star} OR "đ{w[1:]}"{star})')
+        else:
+            terms.append(f'"{w}"{star}')
+    return " AND ".join(terms)
+
+
+class SearchIndex:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    # ---------- write ----------
+    def _delete_units(self, where: str, params: tuple) -> None:
+        ids = [(r[0],) for r in self._db.execute(f"SELECT id FROM units WHERE {where}", params)]
+        if ids:
+            self._db.executemany("DELETE FROM docs WHERE rowid=?", ids)
+            self._db.executemany("DELETE FROM units WHERE id=?", ids)
+
+    def _insert_units(self, rows: list) -> None:
+        """rows: (session_uuid, transcript_id, kind, start_sec, end_sec, body)"""
+        for sid, tid, kind, a, b, body in rows:
+            cur = self._db.execute(
+                "INSERT INTO units(session_uuid, transcript_id, kind, start_sec, end_sec) VALUES (?,?,?,?,?)",
+                (sid, tid, kind, a, b),
+            )
+            self._db.execute("INSERT INTO docs(rowid, body) VALUES (?,?)", (cur.lastrowid, body))
+
+    def index_session(self, session_uuid: str, title: str = "", main_topic: str = "", start_time=None) -> None:
+        body = " — ".join(x for x in (title, main_topic) if x)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions(uuid, title, start_time) VALUES (?,?,?)",
+                (session_uuid, title or "", str(start_time or "")[:19]),
+            )
+            self._delete_units("session_uuid=? AND kind='title'", (session_uuid,))
+            if body:
+                self._insert_units([(session_uuid, None, "title", None, None, body)])
+
+    def index_transcript(
+        self,
+        transcript_id: int,
+        session_uuid: str,
+        full_text: Optional[str] = None,
+        summary: Optional[str] = None,
+        decisions: Optional[Iterable[str]] = None,
+        segments: Optional[list] = None,
+    ) -> None:
+        """
+        (Re)index các phần được truyền vào (không None) của một transcript.
+        full_text: dùng `segments` nếu còn khớp text (có timestamp), không thì tách câu.
+        """
+        from nlp.chunker import segments_match, split_units
+        rows: list = []
+        kinds: list = []
+        if full_text is not None:
+            kinds += ["segment", "text"]
+            if segments and segments_match(full_text, segments):
+                rows += [
+                    ("segment", float(s.get("start", 0.0)), float(s.get("end", 0.0)), (s.get("text") or "").strip())
+                    for s in segments if (s.get("text") or "").strip()
+                ]
+            else:
+                rows += [("text", None, None, u) for u in split_units(full_text)]
+        if summary is not None:
+            kinds.append("summary")
+            if summary.strip():
+                rows.append(("summary", None, None, summary.strip()))
+        if decisions is not None:
+            kinds.append("decision")
+            rows += [("decision", None, None, str(d)) for d in decisions if str(d or "").strip()]
+        if not kinds:
+            return
+        marks = ",".join("?" * len(kinds))
+        with self._lock, self._db:
+            self._delete_units(f"transcript_id=? AND kind IN ({marks})", (transcript_id, *kinds))
+            self._insert_units([(session_uuid, transcript_id, k, a, b, body) for k, a, b, body in rows])
+
+    def remove_session(self, session_uuid: str, keep_title: bool = False) -> None:
+        with self._lock, self._db:
+            if keep_title:
+                self._delete_units("session_uuid=? AND kind<>'title'", (session_uuid,))
+            else:
+                self._delete_units("session_uuid=?", (session_uuid,))
+                self._db.execute("DELETE FROM sessions WHERE uuid=?", (session_uuid,))
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM docs")
+            self._db.execute("DELETE FROM units")
+            self._db.execute("DELETE FROM sessions")
+
+    # ---------- read ----------
+    def search(self, query: str, limit: int = 50, per_session: int = 1) -> List[SearchHit]:
+        """
+        Kết quả xếp theo bm25 (tốt nhất trước), tối đa `per_session` hit mỗi session.
+        """
+        match = build_match(query)
+        if not match:
+            return []
+        # Top `per_session` hit mỗi session lọc ngay trong SQL (ROW_NUMBER) -> LIMIT không cắt mất session
+        # xếp sau; snippet chỉ tính cho các hit được trả về. bm25() không dùng được trong window nên
+        # tính ở subquery riêng (LIMIT -1 chặn SQLite flatten nó vào query ngoài)
+        sql = (
+            "SELECT h.id, h.session_uuid, h.transcript_id, h.kind, h.start_sec, h.end_sec, h.score, "
+            "s.title, s.start_time FROM ("
+            " SELECT u.id, u.session_uuid, u.transcript_id, u.kind, u.start_sec, u.end_sec, m.score,"
+            " ROW_NUMBER() OVER (PARTITION BY u.session_uuid ORDER BY m.score) AS rn"
+            " FROM (SELECT rowid AS id, bm25(docs) AS score FROM docs WHERE docs MATCH ? LIMIT -1) m"
+            " JOIN units u ON u.id = m.id"
+            ") h LEFT JOIN sessions s ON s.uuid = h.session_uuid "
+            "WHERE h.rn <= ? ORDER BY h.score LIMIT ?"
+        )
+        t0 = time.perf_counter()
+        with self._lock:
+            rows = self._db.execute(sql, (match, per_session, limit)).fetchall()
+            snips = {}
+            if rows:
+                marks = ",".join("?" * len(rows))
+                snips = dict(self._db.execute(
+                    f"SELECT rowid, snippet(docs, 0, '[', ']', '…', 16) FROM docs "
+                    f"WHERE docs MATCH ? AND rowid IN ({marks})",
+                    (match, *(r[0] for r in rows)),
+                ).fetchall())
+        hits = [
+            SearchHit(sid, tid, kind, a, b, snips.get(uid, ""), score, title or "", start_time or "")
+            for uid, sid, tid, kind, a, b, score, title, start_time in rows
+        ]
+        logger.debug("search %r -> %d hits in %.1f ms", query, len(hits), (time.perf_counter() - t0) * 1000)
+        return hits
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM units").fetchone()[0]
+
+    def optimize(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO docs(docs) VALUES ('optimize')")
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Index dùng chung, đặt tại BASE_DIR/.cache/search.sqlite3."""
+    global _index
+    path = os.path.join(get_config().base_dir, ".cache", "search.sqlite3")
+    with _index_lock:
+        if _index is None or _index.path != path:
+            _index = SearchIndex(path)
+        return _index
+
+
+def rebuild(batch_size: int = 500) -> int:
+    """
+    Dựng lại toàn bộ index từ MySQL: mọi session + transcript mới nhất của mỗi session
+    (segments lấy từ sidecar segments.seg nếu còn khớp text). Trả về số transcript.
+    """
+    import json
+    from asr.segment_store import load_segments
+    from db.mysql import connection
+    idx = get_search_index()
+    idx.clear()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT uuid, title, main_topic, start_time FROM sessions")
+        for uuid, title, topic, start in cur.fetchall() or []:
+            idx.index_session(uuid, title or "", topic or "", start)
+    last_id, n = 0, 0
+    while True:
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT t.id, t.session_uuid, t.full_text, t.summary, t.decisions FROM transcripts t "
+                "JOIN (SELECT MAX(id) AS id FROM transcripts GROUP BY session_uuid) latest ON latest.id = t.id "
+                "WHERE t.id > %s ORDER BY t.id LIMIT %s",
+                (last_id, batch_size),
+            )
+            batch = cur.fetchall() or []
+        if not batch:
+            break
+        for tid, sid, full_text, summary, decisions in batch:
+            try:
+                dec = json.loads(decisions) if decisions else []
+            except Exception:
+                dec = []
+            try:
+                store = load_segments(sid)
+                segments = store.to_dicts() if store is not None else None
+            except Exception as e:
+                logger.warning("rebuild: cannot read segments of %s: %s", sid, e)
+                segments = None
+            idx.index_transcript(
+                tid, sid, full_text or "", summary or "", dec if isinstance(dec, list) else [], segments,
+            )
+            n += 1
+        last_id = batch[-1][0]
+    idx.optimize()
+    logger.info("search index rebuilt: %d transcripts, %d rows", n, idx.count())
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Full-text search index over meeting transcripts")
+    ap.add_argument("--rebuild", action="store_true", help="dựng lại index từ MySQL")
+    ap.add_argument("query", nargs="*", help="truy vấn tìm kiếm")
+    args = ap.parse_args(argv)
+    if args.rebuild:
+        rebuild()
+    if args.query:
+        for h in get_search_index().search(" ".join(args.query), limit=20):
+            print(f"{h.score:8.2f}  {h.title[:40]:<40} {h.kind:<8} {h.timestamp():>8}  {h.snippet}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
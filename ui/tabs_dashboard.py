@@ -2,12 +2,13 @@
 # file: meeting_assistant/ui/tabs_dashboard.py
 # ------------------------------------
 from __future__ import annotations
-import json
 from datetime import datetime
 from tkinter import ttk, messagebox
 
 from core.logger import logger
-from db.mysql import get_conn
+from core.executor import EXECUTOR
+from db.mysql import connection
+from db.dao import dashboard_stats, list_latest_action_items
 from ui.styles import PANEL_BG, FG
 
 
@@ -111,15 +112,26 @@ class DashboardTab(ttk.Frame):
     # ------------- Data load -------------
     def refresh(self):
         logger.info("DashboardTab.refresh -> query DB")
-        try:
-            stats = self._fetch_stats()
-            recent = self._fetch_recent_sessions(limit=12)
-            ai_list = self._fetch_latest_action_items(limit=20)
-        except Exception as e:
-            logger.exception("DashboardTab.refresh error: %s", e)
-            messagebox.showerror("DB Error", str(e))
-            return
-
+        EXECUTOR.submit(
+            "db", self._fetch_all,
+            on_done=self._render_all, on_error=self._on_refresh_error,
+            key="dashboard-refresh", owner=self,
+        )
+
+    def _fetch_all(self) -> tuple:
+        # chạy ở luồng DB
+        return (
+            self._fetch_stats(),
+            self._fetch_recent_sessions(limit=12),
+            self._fetch_latest_action_items(limit=20),
+        )
+
+    def _on_refresh_error(self, e):
+        logger.error("DashboardTab.refresh error: %s", e)
+        messagebox.showerror("DB Error", str(e))
+
+    def _render_all(self, data: tuple):
+        stats, recent, ai_list = data
         # Update cards
         self.card_total_meetings.configure(text=str(stats["total_meetings"]))
         self.card_total_duration.configure(text=_fmt_duration(stats["total_duration_min"]))
@@ -135,38 +147,15 @@ class DashboardTab(ttk.Frame):
     # ---- Queries ----
     def _fetch_stats(self) -> dict:
         """
-        - total_meetings: COUNT(*) from sessions
-        - total_duration_min: SUM(duration_min)
-        - action items & completion rate: đọc transcripts, parse JSON tại Python
+        Đọc dòng 'all' của rollup meeting_stats (chi phí cố định, không phụ thuộc số session):
+        total_meetings, total_duration_min, action items & completion rate.
         """
-        conn = get_conn()
-        with conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*), COALESCE(SUM(duration_min),0) FROM sessions")
-            row = cur.fetchone() or (0, 0)
-            total_meetings, total_duration_min = int(row[0] or 0), int(row[1] or 0)
-
-            # Lấy tất cả action_items JSON (có thể giới hạn nếu data lớn)
-            cur.execute("SELECT action_items FROM transcripts ORDER BY created_at DESC LIMIT 500")
-            action_rows = cur.fetchall() or []
-
-        total_ai = 0
-        done_ai = 0
-        for (blob,) in action_rows:
-            if not blob:
-                continue
-            try:
-                items = json.loads(blob)
-                for it in items or []:
-                    total_ai += 1
-                    if str(it.get("done", "")).lower() in ("1", "true", "yes", "y"):
-                        done_ai += 1
-            except Exception:
-                continue
-
+        st = dashboard_stats()
+        total_ai, done_ai = st["total_action_items"], st["done_action_items"]
         completion_rate = (done_ai / total_ai * 100) if total_ai else 0.0
         return {
-            "total_meetings": total_meetings,
-            "total_duration_min": total_duration_min,
+            "total_meetings": st["total_meetings"],
+            "total_duration_min": st["total_duration_min"],
             "total_action_items": total_ai,
             "completion_rate": completion_rate,
         }
@@ -176,8 +165,7 @@ class DashboardTab(ttk.Frame):
         Trả về list tuples: (title, start_time_txt, duration_txt)
         MySQL không hỗ trợ NULLS LAST -> dùng (start_time IS NULL) để đẩy NULL xuống cuối.
         """
-        conn = get_conn()
-        with conn.cursor() as cur:
+        with connection() as conn, conn.cursor() as cur:
             # dùng ORDER BY (start_time IS NULL) ASC để NULL xuống sau
             sql = (
                 "SELECT title, start_time, duration_min "
@@ -198,35 +186,10 @@ class DashboardTab(ttk.Frame):
 
     def _fetch_latest_action_items(self, limit=20) -> list[dict]:
         """
-        Gom các action_items từ transcripts mới nhất (giới hạn).
+        Action items của các transcript mới nhất (bảng action_items).
         Mỗi item: {"item": str, "assignee": str, "due": str, "done": bool}
         """
-        conn = get_conn()
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT action_items FROM transcripts "
-                "ORDER BY created_at DESC LIMIT 100"
-            )
-            rows = cur.fetchall() or []
-
-        acc: list[dict] = []
-        for (blob,) in rows:
-            if not blob:
-                continue
-            try:
-                items = json.loads(blob) or []
-                for it in items:
-                    acc.append({
-                        "item": it.get("item", ""),
-                        "assignee": it.get("assignee", ""),
-                        "due": it.get("due", ""),
-                        "done": bool(it.get("done", False)),
-                    })
-            except Exception:
-                continue
-            if len(acc) >= limit:
-                break
-        return acc[:limit]
+        return list_latest_action_items(limit)
 
     # ---- Render helpers ----
     def _render_recent(self, rows: list[tuple]):
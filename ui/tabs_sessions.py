@@ -5,19 +5,28 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 import os
+import re
 import json
+from typing import Optional
 
 from core.logger import logger
 from db.dao import (
-    list_sessions,
+    list_sessions_page,
+    export_page,
     get_session,
     list_transcripts,
     get_transcript,
     update_session_title_topic,
     delete_session,
     insert_transcript,
+    update_latest_transcript,
 )
-from report.docx_export import export_meeting_report
+from core.executor import EXECUTOR, CancelToken
+from report.docx_export import export_meeting_report, export_many
+from report.srt_export import write_subtitles
+from report.bulk_export import export_zip
+from asr.segment_store import load_segments
+from search.index import get_search_index, rebuild as search_rebuild
 from ui.styles import PRIMARY_BG, PANEL_BG, FG, BORDER
 
 
@@ -69,6 +78,8 @@ class SessionDetailWindow(tk.Toplevel):
         self.geometry("1000x890")
         self._uuid = session_uuid
         self._current_transcript_id = None
+        self._row = None  # tuple get_session() đã tải
+        self._full_text = ""
 
         # NỀN ĐEN cho toplevel
         self.configure(bg=PRIMARY_BG)
@@ -178,7 +189,9 @@ class SessionDetailWindow(tk.Toplevel):
         actions.grid(row=4, column=0, sticky="e", padx=10, pady=(12,0))
         ttk.Button(actions, text="💾 Save Changes", command=self._save_changes).grid(row=0, column=0, padx=(0,8))
         ttk.Button(actions, text="🗑 Delete Session", command=self._delete_session).grid(row=0, column=1, padx=(0,8))
-        ttk.Button(actions, text="📄 Export DOCX", command=self._export_docx).grid(row=0, column=2)
+        ttk.Button(actions, text="📄 Export DOCX", command=self._export_docx).grid(row=0, column=2, padx=(0,8))
+        ttk.Button(actions, text="🎞 Export SRT/VTT", command=self._export_subtitles).grid(row=0, column=3, padx=(0,8))
+        ttk.Button(actions, text="📝 Transcript…", command=self._edit_transcript).grid(row=0, column=4)
 
         # filler
         ttk.Frame(self, style="Detail.TFrame").grid(row=5, column=0, pady=6)
@@ -186,11 +199,31 @@ class SessionDetailWindow(tk.Toplevel):
 
     # ---- load + helpers ----
     def _load(self):
+        self.title("Session Detail — loading…")
+        EXECUTOR.submit("db", self._fetch, self._uuid, on_done=self._fill, on_error=self._on_load_error, owner=self)
+
+    @staticmethod
+    def _fetch(session_uuid: str) -> Optional[dict]:
+        # chạy ở luồng DB
+        row = get_session(session_uuid)
+        if not row:
+            return None
+        items = list_transcripts(session_uuid, limit=1)
+        tid = items[0][0] if items else None
+        return {"row": row, "transcript_id": tid, "transcript": get_transcript(tid) if tid else None}
+
+    def _on_load_error(self, e):
+        logger.error("SessionDetailWindow._load error: %s", e)
+        messagebox.showerror("Error", str(e))
+        self.destroy()
+
+    def _fill(self, data: Optional[dict]):
         try:
-            row = get_session(self._uuid)
-            if not row:
+            if not data:
                 messagebox.showwarning("Not found", "Session không tồn tại."); self.destroy(); return
-            _uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path = row
+            self.title("Session Detail")
+            self._row = data["row"]
+            _uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path = self._row
             self.e_title.delete(0,"end"); self.e_title.insert(0, title or "")
             self.e_topic.delete(0,"end"); self.e_topic.insert(0, main_topic or "")
             self.l_start.configure(text=_fmt_dt(start_time))
@@ -198,20 +231,19 @@ class SessionDetailWindow(tk.Toplevel):
             self.l_dur.configure(text=_fmt_dur(duration_min))
             self.l_audio.configure(text=os.path.basename(audio_path or "") or "")
 
-            items = list_transcripts(self._uuid, limit=1)
-            self._current_transcript_id = items[0][0] if items else None
+            self._current_transcript_id = data["transcript_id"]
+            self._full_text = (data["transcript"][2] if data["transcript"] else "") or ""
 
             full_text = ""; summary = ""; goal=[]; agenda=[]; attendance=[]; decisions=[]; action_items=[]
-            if self._current_transcript_id:
-                t = get_transcript(self._current_transcript_id)
-                if t:
-                    full_text = t[2] or ""
-                    summary = t[3] or ""
-                    goal = json.loads(t[4] or "[]")
-                    agenda = json.loads(t[5] or "[]")
-                    attendance = json.loads(t[6] or "[]")
-                    decisions = json.loads(t[7] or "[]")
-                    action_items = json.loads(t[8] or "[]")
+            t = data["transcript"]
+            if t:
+                full_text = t[2] or ""
+                summary = t[3] or ""
+                goal = json.loads(t[4] or "[]")
+                agenda = json.loads(t[5] or "[]")
+                attendance = json.loads(t[6] or "[]")
+                decisions = json.loads(t[7] or "[]")
+                action_items = json.loads(t[8] or "[]")
 
             self.t_summary.delete("1.0","end"); self.t_summary.insert("end", summary or "")
             for w, data in (
@@ -242,28 +274,21 @@ class SessionDetailWindow(tk.Toplevel):
             self.ai_tree.delete(iid)
 
     def _save_changes(self):
-        try:
-            title = self.e_title.get().strip()
-            topic = self.e_topic.get().strip()
+        title = self.e_title.get().strip()
+        topic = self.e_topic.get().strip()
+        summary = self.t_summary.get("1.0","end").strip()
+        extracted = {
+            "goal": _lines_to_list(self.t_goal.get("1.0","end")),
+            "agenda": _lines_to_list(self.t_agenda.get("1.0","end")),
+            "attendance": _lines_to_list(self.t_att.get("1.0","end")),
+            "decisions": _lines_to_list(self.t_dec.get("1.0","end")),
+            "action_items": _ai_rows_to_list(self.ai_tree),
+        }
+
+        def task():
+            # chạy ở luồng DB
             update_session_title_topic(self._uuid, title=title, main_topic=topic)
-
-            summary = self.t_summary.get("1.0","end").strip()
-            goal = _lines_to_list(self.t_goal.get("1.0","end"))
-            agenda = _lines_to_list(self.t_agenda.get("1.0","end"))
-            attendance = _lines_to_list(self.t_att.get("1.0","end"))
-            decisions = _lines_to_list(self.t_dec.get("1.0","end"))
-            action_items = _ai_rows_to_list(self.ai_tree)
-
-            extracted = {
-                "goal": goal,
-                "agenda": agenda,
-                "attendance": attendance,
-                "decisions": decisions,
-                "action_items": action_items,
-            }
-
             # ⚠️ ƯU TIÊN UPDATE transcript mới nhất. Nếu chưa có -> INSERT.
-            from db.dao import update_latest_transcript
             rows = update_latest_transcript(
                 session_uuid=self._uuid,
                 summary=summary,
@@ -274,63 +299,235 @@ class SessionDetailWindow(tk.Toplevel):
                 # chưa có transcript nào -> tạo mới
                 insert_transcript(self._uuid, full_text="", summary=summary, extracted=extracted)
 
+        def done(_):
+            if self._row:
+                self._row = (self._row[0], title, topic, *self._row[3:])
             messagebox.showinfo("Saved", "Đã lưu thay đổi.")
-        except Exception as e:
-            logger.exception("Save changes error: %s", e)
+
+        def failed(e):
+            logger.error("Save changes error: %s", e)
             messagebox.showerror("Error", str(e))
+        EXECUTOR.submit("db", task, on_done=done, on_error=failed, owner=self)
 
     def _delete_session(self):
         if messagebox.askyesno("Confirm", "Xoá phiên họp này? Mọi transcript liên quan sẽ bị xoá."):
-            try:
-                delete_session(self._uuid)
+            def done(_):
                 messagebox.showinfo("Deleted", "Đã xoá phiên họp.")
                 self.destroy()
-            except Exception as e:
-                logger.exception("Delete session error: %s", e)
+
+            def failed(e):
+                logger.error("Delete session error: %s", e)
                 messagebox.showerror("Error", str(e))
+            EXECUTOR.submit("db", delete_session, self._uuid, on_done=done, on_error=failed, owner=self)
 
     def _export_docx(self):
-        try:
-            row = get_session(self._uuid)
-            if not row:
-                messagebox.showwarning("Not found", "Session không tồn tại."); return
-            _uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path = row
-
-            summary = self.t_summary.get("1.0","end").strip()
-            goal = _lines_to_list(self.t_goal.get("1.0","end"))
-            agenda = _lines_to_list(self.t_agenda.get("1.0","end"))
-            attendance = _lines_to_list(self.t_att.get("1.0","end"))
-            decisions = _lines_to_list(self.t_dec.get("1.0","end"))
-            action_items = _ai_rows_to_list(self.ai_tree)
-
-            save_path = filedialog.asksaveasfilename(
-                title="Lưu báo cáo DOCX",
-                defaultextension=".docx",
-                filetypes=[("Word Document","*.docx")],
-                initialfile=f"{(title or 'meeting').strip().replace(' ','_')}.docx"
-            )
-            if not save_path: return
-
-            meta = {
-                "title": title or "Meeting Report",
-                "datetime": f"{_fmt_dt(start_time)} → {_fmt_dt(end_time)}  ({_fmt_dur(duration_min)})",
-            }
-            export_meeting_report(save_path, meta, summary, {
+        if not self._row:
+            messagebox.showwarning("Not found", "Session không tồn tại."); return
+        _uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path = self._row
+
+        summary = self.t_summary.get("1.0","end").strip()
+        goal = _lines_to_list(self.t_goal.get("1.0","end"))
+        agenda = _lines_to_list(self.t_agenda.get("1.0","end"))
+        attendance = _lines_to_list(self.t_att.get("1.0","end"))
+        decisions = _lines_to_list(self.t_dec.get("1.0","end"))
+        action_items = _ai_rows_to_list(self.ai_tree)
+
+        save_path = filedialog.asksaveasfilename(
+            title="Lưu báo cáo DOCX",
+            defaultextension=".docx",
+            filetypes=[("Word Document","*.docx")],
+            initialfile=f"{(title or 'meeting').strip().replace(' ','_')}.docx"
+        )
+        if not save_path: return
+
+        meta = {
+            "title": title or "Meeting Report",
+            "datetime": f"{_fmt_dt(start_time)} → {_fmt_dt(end_time)}  ({_fmt_dur(duration_min)})",
+        }
+
+        def failed(e):
+            logger.error("Export DOCX error: %s", e)
+            messagebox.showerror("Error", str(e))
+        EXECUTOR.submit(
+            "io", export_meeting_report, save_path, meta, summary, {
                 "goal": goal, "agenda": agenda, "attendance": attendance,
                 "decisions": decisions, "action_items": action_items
-            })
-            messagebox.showinfo("Exported", f"Đã xuất báo cáo:\n{save_path}")
-        except Exception as e:
-            logger.exception("Export DOCX error: %s", e)
+            },
+            on_done=lambda _: messagebox.showinfo("Exported", f"Đã xuất báo cáo:\n{save_path}"),
+            on_error=failed, owner=self,
+        )
+
+    def _export_subtitles(self):
+        title = (self._row[1] if self._row else "") or "meeting"
+        save_path = filedialog.asksaveasfilename(
+            title="Xuất phụ đề",
+            defaultextension=".srt",
+            filetypes=[("SubRip","*.srt"),("WebVTT","*.vtt")],
+            initialfile=f"{title.strip().replace(' ','_')}.srt"
+        )
+        if not save_path: return
+
+        def task():
+            # Segment store memmap -> ghi từng cue, không dựng list segment
+            store = load_segments(self._uuid)
+            if store is None:
+                return None
+            return write_subtitles(save_path, store, wrap=42, merge_min_sec=1.0)
+
+        def done(n):
+            if n is None:
+                messagebox.showwarning("No timestamps", "Phiên họp này không có segment ASR (segments.seg)."); return
+            messagebox.showinfo("Exported", f"Đã xuất {n} phụ đề:\n{save_path}")
+
+        def failed(e):
+            logger.error("Export subtitles error: %s", e)
             messagebox.showerror("Error", str(e))
+        EXECUTOR.submit("io", task, on_done=done, on_error=failed, owner=self)
+
+
+    def _edit_transcript(self):
+        """Sửa transcript rồi phân tích lại; chỉ chunk bị sửa (+ bước reduce) gọi lại GPT."""
+        if not self._row:
+            messagebox.showwarning("Not found", "Session không tồn tại."); return
+        win = tk.Toplevel(self)
+        win.title("Transcript")
+        win.geometry("900x640")
+        win.configure(bg=PRIMARY_BG)
+        win.columnconfigure(0, weight=1)
+        win.rowconfigure(0, weight=1)
+        txt = tk.Text(win, wrap="word", bd=0, undo=True)
+        txt.configure(bg=PANEL_BG, fg=FG, insertbackground=FG)
+        txt.grid(row=0, column=0, sticky="nsew", padx=10, pady=(10,0))
+        txt.insert("end", self._full_text)
+        bar = ttk.Frame(win, style="Detail.TFrame")
+        bar.grid(row=1, column=0, sticky="ew", padx=10, pady=10)
+        bar.columnconfigure(0, weight=1)
+        status = ttk.Label(bar, text="")
+        status.grid(row=0, column=0, sticky="w")
+        btn = ttk.Button(bar, text="💾 Save & Re-analyze")
+        btn.grid(row=0, column=1, padx=(0,8))
+        ttk.Button(bar, text="Close", command=win.destroy).grid(row=0, column=2)
+
+        def save():
+            full_text = txt.get("1.0", "end").strip()
+            if not full_text:
+                messagebox.showwarning("Empty", "Transcript trống.", parent=win); return
+            btn.config(state="disabled")
+            status.configure(text="Analyzing with GPT and saving...")
+
+            def on_stage(name, sec):
+                EXECUTOR.call_soon(lambda: status.configure(text=f"Saving... {name} done ({sec:.1f}s)"), owner=win)
+
+            def done(res):
+                self._load()
+                if hasattr(self.master, "refresh"):
+                    self.master.refresh()  # danh sách SessionsTab (title/match có thể đổi)
+                status.configure(text=f"Saved ({res.timing_text()})")
+                btn.config(state="normal")
+
+            def failed(e):
+                logger.error("Re-analyze error: %s", e)
+                status.configure(text=f"Save failed: {e}")
+                btn.config(state="normal")
+            # Bấm Save lần nữa -> task mới thay task cũ (key), token cũ bị huỷ nên chunk GPT còn lại dừng
+            EXECUTOR.submit("gpt", _reanalyze, self._row, full_text, on_stage, on_done=done, on_error=failed,
+                            key=f"reanalyze-{self._uuid}", owner=win, pass_token=True)
+        btn.config(command=save)
+
+
+def _dt_text(val) -> str:
+    return val.strftime("%Y-%m-%d %H:%M:%S") if isinstance(val, datetime) else str(val or "")
+
+
+def _reanalyze(tok, row: tuple, full_text: str, on_stage=None):
+    """
+    Chạy lại save_meeting cho transcript đã sửa (luồng nền), dùng MeetingJob của session
+    (base_dir/<uuid>): chunk không đổi lấy từ memo của lần lưu trước.
+    tok: CancelToken của task EXECUTOR (pass_token).
+    """
+    from core.jobs import MeetingJob
+    from core.save_pipeline import SaveRequest, save_meeting
+    uuid, title, main_topic, start_time, end_time, duration_min, _status, audio_path = row
+    job = MeetingJob.create(uuid, audio_path=audio_path or "")
+    # segments=None: job tự giữ segments.seg nếu còn khớp text; không khớp thì chỉ dùng làm ranh giới chunk
+    job.set_transcript(full_text, None)
+    _text, segments = job.transcript()
+    req = SaveRequest(
+        session_uuid=uuid, title=title or "", main_topic=main_topic or "",
+        start_time=_dt_text(start_time), end_time=_dt_text(end_time),
+        duration_min=int(duration_min or 0), audio_path=audio_path or "", full_text=full_text,
+        segments=segments,
+    )
+    job.submit(title=req.title, main_topic=req.main_topic, start_time=req.start_time,
+               end_time=req.end_time, duration_min=req.duration_min)
+    return save_meeting(req, on_stage=on_stage, job=job, cancel=tok)
+
+
+PAGE_SIZE = 200  # số session mỗi lần tải (keyset page)
+
+
+def _safe_name(text: str, limit: int = 60) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", text or "").strip("_.")[:limit] or "meeting"
+
+
+def _export_items(uuids: list):
+    """Session + transcript mới nhất của `uuids`, mỗi trang một truy vấn (dao.export_page)."""
+    after = 0
+    while after is not None:
+        items, after = export_page(after, PAGE_SIZE, uuids=uuids)
+        yield from items
+
+
+def _report_jobs(uuids: list, folder: str) -> list:
+    """Chạy ở luồng DB: session + transcript mới nhất (truy vấn theo trang keyset) -> tham số export_many."""
+    jobs = []
+    for item in _export_items(uuids):
+        uuid, title, main_topic, start_time, end_time, duration_min, status, audio_path = item["session"]
+        t = item["transcript"]
+        keys = ("goal", "agenda", "attendance", "decisions", "action_items")
+        extracted = {k: json.loads((t[4 + i] if t else None) or "[]") for i, k in enumerate(keys)}
+        day = _fmt_dt(start_time)[:10]
+        jobs.append({
+            "path": os.path.join(folder, f"{day + '_' if day else ''}{_safe_name(title)}_{uuid[:8]}.docx"),
+            "meta": {
+                "title": title or "Meeting Report",
+                "datetime": f"{_fmt_dt(start_time)} → {_fmt_dt(end_time)}  ({_fmt_dur(duration_min)})",
+            },
+            "summary": (t[3] if t else "") or "",
+            "extracted": extracted,
+        })
+    return jobs
+
+
+def _fulltext_search(query: str):
+    """Chạy ở luồng nền. None = index còn trống (cần rebuild)."""
+    idx = get_search_index()
+    if idx.count() == 0:
+        return None
+    return idx.search(query, limit=200)
 
 
 class SessionsTab(ttk.Frame):
-    """Danh sách phiên họp (list-only). Chọn một hàng sẽ mở cửa sổ chi tiết."""
+    """
+    Danh sách phiên họp (list-only). Chọn một hàng sẽ mở cửa sổ chi tiết.
+
+    Danh sách ảo: dữ liệu tải dần theo trang (keyset) khi cuộn gần cuối, còn Treeview
+    chỉ giữ một nhóm hàng cố định bằng số hàng nhìn thấy — cuộn chỉ đổi values của
+    các hàng đó, không insert/delete, nên vẫn mượt với 100k+ session.
+    """
     def __init__(self, master):
         logger.debug("SessionsTab.__init__")
         super().__init__(master, padding=16)
-        self._rows = []  # [(uuid, title, start_time, duration_min, status)]
+        self._view = []        # [(uuid, title, start, dur, match)] — các hàng đã tải/đang hiển thị
+        self._cursor = None    # cursor trang kế tiếp (None = hết)
+        self._more = False
+        self._loading = False
+        self._gen = 0          # tăng mỗi lần refresh/đổi bộ lọc; bỏ kết quả tải cũ
+        self._paged = False    # False = đang hiện danh sách cố định (full-text / thông báo)
+        self._filter = ""
+        self._top = 0          # chỉ số hàng đầu tiên đang hiển thị
+        self._slots = []       # iid các hàng Treeview cố định
+        self._search_job = None
         self._build()
 
     def _build(self):
@@ -345,64 +542,347 @@ class SessionsTab(ttk.Frame):
         e = ttk.Entry(bar, textvariable=self.search_var, width=38)
         e.grid(row=0, column=1)
         self.search_var.trace_add("write", lambda *_: self._apply_filter())
-
-        ttk.Button(bar, text="Refresh", command=self.refresh).grid(row=0, column=2, padx=(12,0))
-        ttk.Button(bar, text="Open", command=self._open_selected).grid(row=0, column=3, padx=(8,0))
+        # Title: lọc theo tiêu đề (SQL, có phân trang); Full text: tìm trong transcript/summary/decisions
+        self.mode_var = tk.StringVar(value="Title")
+        mode = ttk.Combobox(bar, textvariable=self.mode_var, values=["Title", "Full text"], width=10, state="readonly")
+        mode.grid(row=0, column=2, padx=(8,0))
+        mode.bind("<<ComboboxSelected>>", lambda *_: self._apply_filter())
+
+        ttk.Button(bar, text="Refresh", command=self.refresh).grid(row=0, column=3, padx=(12,0))
+        ttk.Button(bar, text="Open", command=self._open_selected).grid(row=0, column=4, padx=(8,0))
+        ttk.Button(bar, text="Export DOCX…", command=self._export_reports).grid(row=0, column=5, padx=(8,0))
+        self.zip_btn = ttk.Button(bar, text="Export ZIP…", command=self._export_zip)
+        self.zip_btn.grid(row=0, column=6, padx=(8,0))
+        self._zip_task = None
+        self.count_var = tk.StringVar(value="")
+        ttk.Label(bar, textvariable=self.count_var).grid(row=0, column=7, padx=(12,0))
 
         # Table only
         table_frame = ttk.Frame(self, style="Panel.TFrame", padding=8)
         table_frame.grid(row=1, column=0, sticky="nsew", pady=(12,0))
         self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(0, weight=1)
+        table_frame.grid_rowconfigure(0, weight=1)
+        table_frame.grid_columnconfigure(0, weight=1)
 
-        self.cols = ("title","start","duration")
+        self.cols = ("title","start","duration","match")
         self.tree = ttk.Treeview(table_frame, columns=self.cols, show="headings", height=18)
         self.tree.heading("title", text="Title")
         self.tree.heading("start", text="Start Time")
         self.tree.heading("duration", text="Duration")
-        self.tree.column("title", width=420, anchor="w")
-        self.tree.column("start", width=200, anchor="w")
-        self.tree.column("duration", width=120, anchor="w")
-        self.tree.pack(fill="both", expand=True)
+        self.tree.heading("match", text="Match")
+        self.tree.column("title", width=320, anchor="w")
+        self.tree.column("start", width=150, anchor="w")
+        self.tree.column("duration", width=90, anchor="w")
+        self.tree.column("match", width=420, anchor="w")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self._on_scrollbar)
+        self.vsb.grid(row=0, column=1, sticky="ns")
 
+        try:
+            self._row_h = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        except Exception:
+            self._row_h = 20
+        self._resize_slots(18)
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self._on_key(-1))
+        self.tree.bind("<Down>", lambda e: self._on_key(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_by(-len(self._slots)))
+        self.tree.bind("<Next>", lambda e: self._scroll_by(len(self._slots)))
         # double click to open detail
         self.tree.bind("<Double-1>", self._on_double_click)
 
         self.refresh()
         logger.debug("SessionsTab UI built")
 
+    # ---------- dữ liệu ----------
     def refresh(self):
         logger.info("SessionsTab.refresh -> DB")
-        try:
-            self._rows = list_sessions(limit=300) or []
-            self._apply_filter()
-        except Exception as e:
-            logger.exception("SessionsTab.refresh DB error: %s", e)
-            self._rows = []
-            self._render_rows([])
+        if self.mode_var.get() == "Full text" and (self.search_var.get() or "").strip():
+            self._run_fulltext()
+            return
+        self._reset_paged((self.search_var.get() or "").strip())
+
+    def _reset_paged(self, text: str):
+        self._gen += 1
+        self._filter, self._paged = text, True
+        self._view, self._top = [], 0
+        self._cursor, self._more, self._loading = None, True, False
+        self._render()
+        self._load_more()
+
+    def _load_more(self):
+        """Tải trang kế tiếp ở luồng DB; kết quả được gắn vào _view trên luồng Tk."""
+        if self._loading or not self._more:
+            return
+        self._loading = True
+        gen = self._gen
+        EXECUTOR.submit(
+            "db", list_sessions_page, after=self._cursor, limit=PAGE_SIZE, search=self._filter or None,
+            on_done=lambda res: self._on_page(gen, res[0], res[1], None),
+            on_error=lambda e: self._on_page(gen, [], None, e),
+            key="sessions-page", owner=self,
+        )
+
+    def _on_page(self, gen, rows, nxt, err):
+        if gen != self._gen:
+            return  # bộ lọc đã đổi trong lúc tải
+        self._loading = False
+        self._cursor, self._more = nxt, nxt is not None
+        if err is not None:
+            self._view.append(("", f"DB error: {err}", "", "", ""))
+        self._view += [
+            (uuid, title or "", _fmt_dt(start_time), _fmt_dur(duration_min), "")
+            for (uuid, title, start_time, duration_min, _status) in rows
+        ]
+        self._render()
+
+    def _set_static(self, rows):
+        """Hiển thị danh sách cố định (kết quả full-text / thông báo), không phân trang."""
+        self._gen += 1
+        self._paged = False
+        self._view, self._top = list(rows), 0
+        self._cursor, self._more, self._loading = None, False, False
+        self._render()
 
     def _apply_filter(self):
-        text = (self.search_var.get() or "").strip().lower()
+        # debounce: chỉ truy vấn khi người dùng ngừng gõ 250ms
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(250, self._run_filter)
+
+    def _run_filter(self):
+        self._search_job = None
+        text = (self.search_var.get() or "").strip()
+        if self.mode_var.get() == "Full text" and text:
+            self._run_fulltext()
+        elif not self._paged or text != self._filter:
+            self._reset_paged(text)
+
+    def _run_fulltext(self):
+        self._search_job = None
+        query = (self.search_var.get() or "").strip()
+        if not query or self.mode_var.get() != "Full text":
+            return
+        self._gen += 1  # bỏ trang đang tải dở của chế độ Title
+        EXECUTOR.submit(
+            "io", _fulltext_search, query,
+            on_done=self._on_fulltext, on_error=self._on_fulltext_error,
+            key="sessions-fts", owner=self,
+        )
+
+    def _on_fulltext(self, hits):
+        if hits is None:
+            self._rebuild_index()
+            return
         out = []
-        for (uuid, title, start_time, duration_min, _status) in self._rows:
-            if text and text not in (title or "").lower():
-                continue
-            out.append((uuid, title or "", _fmt_dt(start_time), _fmt_dur(duration_min)))
-        self._render_rows(out)
-
-    def _render_rows(self, rows):
-        # rows: [(uuid, title, start, dur)]
-        self.tree.delete(*self.tree.get_children())
-        for uuid, title, start, dur in rows:
-            self.tree.insert("", "end", iid=uuid, values=(title, start, dur))
+        for h in hits:
+            where = f"{h.timestamp()} " if h.timestamp() else f"[{h.kind}] "
+            out.append((h.session_uuid, h.title, _fmt_dt(h.start_time), "", where + h.snippet))
+        self._set_static(out)
+
+    def _on_fulltext_error(self, e):
+        logger.error("Full-text search error: %s", e)
+        self._set_static([("", "", "", "", f"Search error: {e}")])
+
+    def _rebuild_index(self):
+        """Index trống (DB cũ) -> dựng lại từ MySQL ở luồng nền rồi chạy lại truy vấn."""
+        self._set_static([("", "", "", "", "Building search index…")])
+
+        def done(n):
+            if n:
+                self._run_fulltext()
+            else:
+                self._set_static([("", "", "", "", "No transcripts indexed.")])
+
+        def failed(e):
+            logger.error("Search index rebuild failed: %s", e)
+            self._set_static([("", "", "", "", f"Search index rebuild failed: {e}")])
+        EXECUTOR.submit("io", search_rebuild, on_done=done, on_error=failed, key="sessions-fts-rebuild", owner=self)
+
+    # ---------- danh sách ảo ----------
+    def _resize_slots(self, n: int):
+        n = max(1, n)
+        while len(self._slots) < n:
+            self._slots.append(self.tree.insert("", "end", values=("", "", "", "")))
+        if len(self._slots) > n:
+            self.tree.delete(*self._slots[n:])
+            del self._slots[n:]
+
+    def _on_resize(self, event):
+        header = self._row_h + 4
+        n = max(1, (event.height - header) // self._row_h)
+        if n != len(self._slots):
+            self._resize_slots(n)
+            self._render()
+
+    def _render(self):
+        total, n = len(self._view), len(self._slots)
+        self._top = max(0, min(self._top, total - n))
+        for i, iid in enumerate(self._slots):
+            k = self._top + i
+            row = self._view[k] if k < total else ("", "", "", "", "")
+            self.tree.item(iid, values=row[1:])
+        if total > n:
+            self.vsb.set(self._top / total, (self._top + n) / total)
+        else:
+            self.vsb.set(0.0, 1.0)
+        self.count_var.set(f"{total}{'+' if self._more else ''} sessions" if self._more or total else "")
+        # gần cuối phần đã tải -> tải trước trang kế
+        if self._more and self._top + 2 * n >= total:
+            self._load_more()
+
+    def _scroll_by(self, rows: int):
+        self._scroll_to(self._top + rows)
+        return "break"
+
+    def _scroll_to(self, top: int):
+        top = max(0, min(int(top), len(self._view) - len(self._slots)))
+        if top != self._top:
+            self.tree.selection_remove(*self.tree.selection())
+            self._top = top
+        self._render()
+
+    def _on_scrollbar(self, *args):
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * len(self._view))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self._scroll_by(step * len(self._slots) if args[2] == "pages" else step)
+
+    def _on_wheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_key(self, step: int):
+        sel = self.tree.selection()
+        if not sel or sel[0] not in self._slots:
+            return None
+        pos = self._slots.index(sel[0]) + step
+        if 0 <= pos < len(self._slots):
+            return None  # để Treeview tự di chuyển trong cửa sổ
+        self._scroll_by(step)
+        self.tree.selection_set(self._slots[max(0, min(pos, len(self._slots) - 1))])
+        return "break"
+
+    def _uuid_at(self, iid):
+        if iid not in self._slots:
+            return None
+        k = self._top + self._slots.index(iid)
+        return self._view[k][0] if k < len(self._view) and self._view[k][0] else None
 
     def _on_double_click(self, event):
-        sel = self.tree.identify_row(event.y)
-        if sel:
-            SessionDetailWindow(self, sel)
+        uuid = self._uuid_at(self.tree.identify_row(event.y))
+        if uuid:
+            SessionDetailWindow(self, uuid)
+
+    def _export_reports(self):
+        """Xuất DOCX cho các hàng đang chọn (không chọn -> mọi hàng đã tải), song song nhiều tiến trình."""
+        uuids = [u for u in (self._uuid_at(iid) for iid in self.tree.selection()) if u]
+        if not uuids:
+            uuids = [r[0] for r in self._view if r[0]]
+            if not uuids:
+                messagebox.showinfo("Info", "Không có phiên họp để xuất."); return
+            if not messagebox.askyesno("Export", f"Xuất DOCX cho {len(uuids)} phiên họp trong danh sách?"):
+                return
+        folder = filedialog.askdirectory(title="Thư mục lưu báo cáo DOCX")
+        if not folder: return
+        self.count_var.set(f"Exporting {len(uuids)} reports…")
+
+        def progress(done, total):
+            EXECUTOR.call_soon(lambda: self.count_var.set(f"Exported {done}/{total}"), owner=self)
+
+        def render(jobs):
+            EXECUTOR.submit("io", export_many, jobs, on_progress=progress, on_done=finished, on_error=failed,
+                            key="sessions-export", owner=self)
+
+        def finished(results):
+            errors = [(path, err) for path, err in results if err]
+            self._render()
+            if errors:
+                logger.error("Batch export: %d failed, first: %s", len(errors), errors[0])
+                messagebox.showwarning("Exported", f"Đã xuất {len(results) - len(errors)}/{len(results)} báo cáo.\n"
+                                                  f"Lỗi đầu tiên: {errors[0][1]}")
+            else:
+                messagebox.showinfo("Exported", f"Đã xuất {len(results)} báo cáo vào:\n{folder}")
+
+        def failed(e):
+            logger.error("Batch export error: %s", e)
+            self._render()
+            messagebox.showerror("Error", str(e))
+        EXECUTOR.submit("db", _report_jobs, uuids, folder, on_done=render, on_error=failed, owner=self)
+
+    def _export_zip(self):
+        """
+        Xuất ZIP (DOCX + SRT + JSON) cho các hàng đang chọn; không chọn -> mọi session khớp bộ lọc
+        (Title: toàn bộ trong DB, không chỉ trang đã tải; Full text: các kết quả đang hiển thị).
+        Bấm lại khi đang chạy -> huỷ.
+        """
+        if self._zip_task is not None:
+            # Chỉ báo export_zip dừng (token riêng, không huỷ task của EXECUTOR -> finished vẫn được gọi)
+            self._zip_task.cancel()
+            self._zip_task = None
+            self.zip_btn.config(text="Export ZIP…", state="normal")
+            self.count_var.set("Cancelling export…")
+            return
+        uuids = [u for u in (self._uuid_at(iid) for iid in self.tree.selection()) if u] or None
+        search = None
+        if uuids is None:
+            if self.mode_var.get() == "Full text":
+                uuids = [r[0] for r in self._view if r[0]]
+                if not uuids:
+                    messagebox.showinfo("Info", "Không có phiên họp để xuất."); return
+            else:
+                search = self._filter or None
+            scope = f"{len(uuids)} phiên họp" if uuids else (f"mọi phiên họp khớp '{search}'" if search else "mọi phiên họp")
+            if not messagebox.askyesno("Export", f"Xuất ZIP cho {scope}?"):
+                return
+        path = filedialog.asksaveasfilename(
+            defaultextension=".zip", filetypes=[("ZIP archive", "*.zip")],
+            initialfile=f"meetings_{datetime.now():%Y%m%d_%H%M}.zip",
+        )
+        if not path: return
+        self.count_var.set("Exporting…")
+        self.zip_btn.config(text="Cancel export")
+        stop = self._zip_task = CancelToken()
+
+        def progress(done, total):
+            msg = f"Exported {done}/{total}" if total else f"Exported {done} sessions"
+            EXECUTOR.call_soon(lambda: self.count_var.set(msg), owner=self)
+
+        def reset():
+            if self._zip_task is stop:
+                self._zip_task = None
+                self.zip_btn.config(text="Export ZIP…", state="normal")
+            self._render()
+
+        def finished(res):
+            reset()
+            if res.cancelled:
+                messagebox.showinfo("Export", "Đã huỷ xuất ZIP."); return
+            if res.errors:
+                logger.error("ZIP export: %d errors, first: %s", len(res.errors), res.errors[0])
+                messagebox.showwarning("Exported", f"{res.line()}\nLỗi đầu tiên: {res.errors[0][0]} "
+                                                  f"({res.errors[0][1]}): {res.errors[0][2]}")
+            else:
+                messagebox.showinfo("Exported", f"Đã xuất {res.sessions} phiên họp vào:\n{path}")
+
+        def failed(e):
+            logger.error("ZIP export error: %s", e)
+            reset()
+            messagebox.showerror("Error", str(e))
+        EXECUTOR.submit(
+            "io", export_zip, path, search=search, uuids=uuids, on_progress=progress, cancel=stop,
+            on_done=finished, on_error=failed, owner=self,
+        )
 
     def _open_selected(self):
         sel = self.tree.selection()
-        if not sel:
+        uuid = self._uuid_at(sel[0]) if sel else None
+        if not uuid:
             messagebox.showinfo("Info", "Hãy chọn một phiên họp."); return
-        SessionDetailWindow(self, sel[0])
+        SessionDetailWindow(self, uuid)
@@ -3,10 +3,12 @@
 # -----------------------------------
 from __future__ import annotations
 import os
+from dataclasses import replace
 from tkinter import ttk, filedialog, messagebox
 from core.logger import logger
-from core.config import AppConfig, CONFIG, save_config, set_config
-from db.mysql import reset_connection
+from core.config import get_config, save_config, set_config
+from db.mysql import reset_connection, connection
+from core.executor import EXECUTOR
 
 class SettingsTab(ttk.Frame):
     def __init__(self, master):
@@ -69,6 +71,7 @@ class SettingsTab(ttk.Frame):
 
     def _load_from_config(self):
         logger.debug("SettingsTab._load_from_config")
+        CONFIG = get_config()
         self.cb_asr.set(CONFIG.asr_model)
         self.e_gpt.delete(0, "end"); self.e_gpt.insert(0, CONFIG.gpt_model)
         self.e_openai.delete(0, "end"); self.e_openai.insert(0, CONFIG.openai_api_key or "")
@@ -94,7 +97,9 @@ class SettingsTab(ttk.Frame):
             if autosave_sec < 1:
                 raise ValueError("Autosave phải >= 1 giây")
 
-            new_cfg = AppConfig(
+            # replace() giữ nguyên các trường không có trên form (ASR_VAD, ...)
+            new_cfg = replace(
+                get_config(),
                 mysql_host=self.e_host.get().strip() or "localhost",
                 mysql_user=self.e_user.get().strip() or "root",
                 mysql_password=self.e_pass.get().strip(),
@@ -123,14 +128,17 @@ class SettingsTab(ttk.Frame):
 
     def _test_db(self):
         logger.info("SettingsTab._test_db")
-        # tạm thời mở / đóng kết nối để kiểm tra credential
-        try:
-            from db.mysql import get_conn
-            conn = get_conn()
-            with conn.cursor() as cur:
+        # tạm thời mượn một kết nối để kiểm tra credential (ở luồng DB, không chặn UI)
+        def task():
+            with connection(timeout=5) as conn, conn.cursor() as cur:
                 cur.execute("SELECT 1")
                 cur.fetchone()
-            messagebox.showinfo("DB OK", f"Kết nối MySQL thành công tới {CONFIG.mysql_host}/{CONFIG.mysql_db}")
-        except Exception as e:
-            logger.exception("Test DB failed: %s", e)
+            return get_config()
+
+        def done(cfg):
+            messagebox.showinfo("DB OK", f"Kết nối MySQL thành công tới {cfg.mysql_host}/{cfg.mysql_db}")
+
+        def failed(e):
+            logger.error("Test DB failed: %s", e)
             messagebox.showerror("DB Error", str(e))
+        EXECUTOR.submit("db", task, on_done=done, on_error=failed, key="settings-test-db", owner=self)
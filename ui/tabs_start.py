@@ -1,18 +1,23 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext
-import os, time, threading, uuid, wave
+import os, time
 from dataclasses import dataclass
 from datetime import datetime
 
-from core.config import CONFIG
+from core.config import CONFIG, add_config_listener, get_config
 from core.logger import logger
+from core.executor import EXECUTOR
+from core.jobs import MeetingJob, run_job, unfinished_jobs
+from core.session_manager import SESSION_MANAGER
 from ui.styles import PANEL_BG, FG
 
 from audio.recorder import Recorder
+from audio.probe import probe_duration_sec
 from asr.whisper_worker import WhisperWorker
-from nlp.summarizer import Summarizer
-from nlp.extractor import Extractor
-from db.dao import upsert_session, insert_transcript
+from asr.model_registry import MODEL_REGISTRY
+from asr.parallel import PARALLEL_MIN_SEC, default_workers
+from nlp.chunker import segments_match
+from core.save_pipeline import SaveRequest, save_meeting
 
 
 @dataclass
@@ -24,6 +29,9 @@ class StartState:
     current_audio_path: str | None = None
     last_audio_path: str | None = None
     last_segments: list | None = None
+    live_segments: list | None = None
+    live_asr: bool = False
+    job: MeetingJob | None = None  # checkpoint của cuộc họp hiện tại (base_dir/<uuid>)
 
 
 class SaveDialog(tk.Toplevel):
@@ -61,13 +69,19 @@ class StartTab(ttk.Frame):
     - Start/Pause/Continue/Stop + timer
     - Add Recording → ASR → Transcript editable
     - Save Meeting → GPT summarize & extract → save sessions + transcripts
+    Mỗi cuộc họp là một MeetingJob: ASR/GPT checkpoint vào folder session,
+    mở lại app thì job dở dang được khôi phục / chạy tiếp.
     """
     def __init__(self, master):
         super().__init__(master, padding=16)
         self.state = StartState()
         self.recorder: Recorder | None = None
+        # Không load model ở đây: MODEL_REGISTRY load nền, app hiện cửa sổ ngay
         self.worker = WhisperWorker(CONFIG.asr_model, language="vi")
         self._build()
+        self._preload_asr()
+        add_config_listener(self._on_config_change)
+        EXECUTOR.submit("io", unfinished_jobs, on_done=self._on_unfinished_jobs, owner=self)
 
     def _build(self):
         controls = ttk.Frame(self, style="Panel.TFrame", padding=14)
@@ -110,6 +124,29 @@ class StartTab(ttk.Frame):
 
         self.status = ttk.Label(self, text="Ready", style="Muted.TLabel"); self.status.grid(row=3, column=0, sticky="w", pady=(8,0))
 
+    # ---------- ASR model ----------
+    def _preload_asr(self):
+        worker = self.worker
+        self.status.configure(text=f"Loading ASR model '{worker.model_size}'...")
+        worker.preload(on_ready=lambda key, err: EXECUTOR.call_soon(lambda: self._on_asr_ready(key, err), owner=self))
+
+    def _on_asr_ready(self, key, err):
+        if key != self.worker.key or self.state.recording:
+            return
+        if err:
+            self.status.configure(text=f"ASR model error: {err}")
+        else:
+            self.status.configure(text=f"ASR model '{key[0]}' ready")
+
+    def _on_config_change(self, old_cfg, new_cfg):
+        """Hot-swap model khi Settings đổi ASR model; model cũ được giải phóng khi rảnh."""
+        if old_cfg.asr_model == new_cfg.asr_model:
+            return
+        old_key = self.worker.key
+        self.worker = WhisperWorker(new_cfg.asr_model, language="vi")
+        MODEL_REGISTRY.evict(old_key)
+        self._preload_asr()
+
     # ---------- Timer ----------
     def _tick(self):
         if not self.state.recording: return
@@ -122,10 +159,15 @@ class StartTab(ttk.Frame):
     def on_start(self):
         try:
             self.state.recording=True; self.state.paused=False; self.state.start_ts=time.time(); self._tick()
-            os.makedirs(CONFIG.base_dir, exist_ok=True)
-            outfile = os.path.join(CONFIG.base_dir, f"record_{int(self.state.start_ts)}.wav")
-            self.recorder = Recorder(); self.recorder.start(outfile)
+            # Ghi thẳng vào folder session (base_dir/<uuid>/raw.wav) cùng các checkpoint của job
+            session = SESSION_MANAGER.create(); SESSION_MANAGER.start()
+            outfile = session.audio_path
+            self.state.job = MeetingJob.create(session.uuid, os.path.dirname(outfile), audio_path=outfile)
+            self.recorder = Recorder()
+            self.recorder.start(outfile, on_error=lambda e: EXECUTOR.call_soon(
+                lambda: self._on_recorder_error(e), owner=self))
             self.state.current_audio_path=None
+            self._start_live_asr(self.recorder, outfile)
             self.btn_start.configure(state="disabled"); self.btn_pause.configure(state="normal")
             self.btn_cont.configure(state="disabled"); self.btn_stop.configure(state="normal")
             self.btn_cont.grid_remove(); self.btn_pause.grid()
@@ -139,6 +181,13 @@ class StartTab(ttk.Frame):
                 self.state.timer_job=None
             self.timer_lbl.configure(text="00:00:00")
 
+    def _on_recorder_error(self, e):
+        """Writer thread lỗi: file ghi âm không còn được ghi -> dừng hẳn, báo người dùng."""
+        if not self.state.recording:
+            return
+        self.on_stop()
+        self.status.configure(text=f"Recorder error: {e} (recording stopped, audio file is incomplete)")
+
     def on_pause(self):
         if not self.recorder: return
         try:
@@ -168,9 +217,15 @@ class StartTab(ttk.Frame):
             try: rec_path=self.recorder.stop()
             except Exception as e: self.status.configure(text=f"Stop error: {e}")
             finally: self.recorder=None
+        SESSION_MANAGER.stop()
+        if rec_path and self.state.job:
+            EXECUTOR.submit("io", self.state.job.finish_recording, rec_path)
         self.btn_start.configure(state="normal"); self.btn_pause.configure(state="disabled")
         self.btn_cont.configure(state="disabled"); self.btn_stop.configure(state="disabled")
         self.btn_cont.grid_remove(); self.btn_pause.grid()
+        if self.state.live_asr:
+            # ASR streaming đang chốt phần cuối; done() sẽ cập nhật transcript
+            self.status.configure(text="Finishing live transcript..."); return
         audio_path = rec_path or self.state.current_audio_path
         if not audio_path:
             self.status.configure(text="No audio to process"); return
@@ -181,16 +236,39 @@ class StartTab(ttk.Frame):
             filetypes=[("Audio","*.wav *.mp3 *.m4a *.flac"),("All","*.*")])
         if not path: return
         self.state.current_audio_path = path
+        session = SESSION_MANAGER.create()
+        self.state.job = job = MeetingJob.create(session.uuid, os.path.dirname(session.audio_path), audio_path=path)
+        EXECUTOR.submit("io", job.finish_recording)
         self.file_lbl.configure(text=os.path.basename(path))
-        self._run_asr_async(path)
+        self._run_asr_async(path, allow_parallel=True)
 
     # ---------- ASR ----------
-    def _run_asr_async(self, audio_path: str):
+    def _run_asr_async(self, audio_path: str, allow_parallel: bool = False):
         self.status.configure(text="ASR running...")
         self.txt.delete("1.0","end"); self.txt.insert("end", f"[Đang nhận dạng: {os.path.basename(audio_path)}]\n")
+        worker = self.worker
+        job = self.state.job
         def task():
             try:
-                full_text, segments = self.worker.transcribe_file(audio_path)
+                if job is not None and job.is_done("asr"):
+                    # Đã nhận dạng ở lần chạy trước -> đọc checkpoint, không chạy lại Whisper
+                    full_text, segments = job.transcript()
+                    return (full_text, segments, None)
+                t0 = time.perf_counter()
+                # File dài + không có GPU -> chia chunk, nhận dạng song song nhiều tiến trình
+                # (probe ffprobe cũng ở luồng nền)
+                cfg = get_config()
+                parallel = (
+                    allow_parallel and worker.key[1] == "cpu"
+                    and (cfg.asr_workers or default_workers(cfg.asr_cpu_threads)) > 1
+                    and self._probe_duration_minutes(audio_path) * 60 >= PARALLEL_MIN_SEC
+                )
+                if parallel:
+                    full_text, segments = worker.transcribe_file_parallel(audio_path)
+                else:
+                    full_text, segments = worker.transcribe_file(audio_path)
+                if job is not None:
+                    job.set_transcript(full_text, segments, time.perf_counter() - t0)
                 return (full_text, segments, None)
             except Exception as e:
                 return (None, None, str(e))
@@ -201,46 +279,57 @@ class StartTab(ttk.Frame):
             self.txt.delete("1.0","end"); self.txt.insert("end", full_text or "")
             self.state.last_audio_path = audio_path; self.state.last_segments = segments or []
             self.status.configure(text="ASR done")
-        threading.Thread(target=lambda: self._thread(task, done), daemon=True).start()
-
-    def _thread(self, task, cb):
-        res = task(); self.after(0, lambda: cb(res))
+        EXECUTOR.submit("asr", task, on_done=done, owner=self)
+
+    def _start_live_asr(self, recorder: Recorder, audio_path: str):
+        """Chạy transcribe_stream trên các khối audio của Recorder, cập nhật pane live."""
+        self.txt.delete("1.0","end")
+        self.txt.mark_set("partial", "end-1c"); self.txt.mark_gravity("partial", "left")
+        self.txt.tag_configure("partial", foreground="#b9beca")
+        self.state.live_segments = []
+        self.state.live_asr = True
+        def task():
+            try:
+                for seg in self.worker.transcribe_stream(recorder.chunks(), samplerate=recorder.samplerate):
+                    EXECUTOR.call_soon(lambda s=seg: self._on_live_segment(s), owner=self)
+                return None
+            except Exception as e:
+                logger.exception("Live ASR error: %s", e)
+                return str(e)
+        def done(err):
+            self.state.live_asr = False
+            lost = recorder.dropped.get("live", 0)
+            if lost and not err:
+                # Live ASR tụt quá ring -> transcript live thiếu đoạn: nhận dạng lại cả file
+                err = f"live ASR lost {lost / recorder.samplerate:.1f}s of audio"
+            if err:
+                # Streaming lỗi -> fallback nhận dạng cả file sau khi Stop
+                self.status.configure(text=f"Live ASR error: {err}")
+                if not self.state.recording:
+                    self._run_asr_async(audio_path)
+                return
+            segments = self.state.live_segments or []
+            self.txt.delete("1.0","end"); self.txt.insert("end", " ".join(s["text"] for s in segments))
+            self.state.last_audio_path = audio_path; self.state.last_segments = segments
+            if self.state.job is not None:
+                EXECUTOR.submit("io", self.state.job.set_transcript, " ".join(s["text"] for s in segments), segments)
+            self.status.configure(text="ASR done")
+        EXECUTOR.submit("asr", task, on_done=done, owner=self)
+
+    def _on_live_segment(self, seg: dict):
+        self.txt.delete("partial", "end-1c")
+        if seg["final"]:
+            self.state.live_segments.append({"start": seg["start"], "end": seg["end"], "text": seg["text"]})
+            self.txt.insert("end-1c", seg["text"] + " ")
+            self.txt.mark_set("partial", "end-1c")
+        elif seg["text"]:
+            self.txt.insert("end-1c", seg["text"], "partial")
+        self.txt.see("end")
 
     # ---------- Duration helpers ----------
     def _probe_duration_minutes(self, path: str) -> int:
-        """Get duration (minutes, rounded) from audio file.
-        Prefer mutagen (mp3/m4a/flac), fallback to soundfile/wave."""
-        # 1) mutagen (mp3/m4a/flac/…)
-        try:
-            from mutagen import File as MFile  # pip install mutagen
-            mf = MFile(path)
-            length = getattr(getattr(mf, "info", None), "length", None)
-            if length:
-                return int(round(float(length) / 60.0))
-        except Exception as e:
-            logger.debug("mutagen probe failed: %s", e)
-
-        # 2) soundfile (wav/flac/ogg…)
-        try:
-            import soundfile as sf
-            with sf.SoundFile(path) as f:
-                seconds = len(f) / float(f.samplerate)
-                return int(round(seconds / 60.0))
-        except Exception as e:
-            logger.debug("soundfile probe failed: %s", e)
-
-        # 3) wave (wav only)
-        try:
-            with wave.open(path, 'rb') as wf:
-                frames = wf.getnframes()
-                rate = wf.getframerate()
-                seconds = frames / float(rate)
-                return int(round(seconds / 60.0))
-        except Exception as e:
-            logger.debug("wave probe failed: %s", e)
-
-        # Fallback to 0
-        return 0
+        """Get duration (minutes, rounded) from audio file (see audio.probe)."""
+        return int(round(probe_duration_sec(path) / 60.0))
 
     # ---------- SAVE (GPT + DB) ----------
     def on_save_meeting(self):
@@ -257,35 +346,84 @@ class StartTab(ttk.Frame):
 
         start_dt = datetime.fromtimestamp(self.state.start_ts) if self.state.start_ts else datetime.now()
         end_dt = datetime.now()
-        # LẤY DURATION THEO FILE AUDIO (ưu tiên file, fallback đồng hồ)
         audio_path = self.state.last_audio_path or self.state.current_audio_path or ""
-        if audio_path and os.path.exists(audio_path):
-            duration_min = self._probe_duration_minutes(audio_path)
-        else:
-            duration_min = int((end_dt - start_dt).total_seconds() // 60)
 
-        session_uuid = str(uuid.uuid4())
+        job = self.state.job
+        if job is None:
+            # Transcript gõ/dán tay, không có bản ghi âm
+            session = SESSION_MANAGER.create()
+            self.state.job = job = MeetingJob.create(session.uuid, os.path.dirname(session.audio_path))
+        # Segment Whisper chỉ dùng để chia chunk nếu transcript chưa bị sửa tay
+        segments = self.state.last_segments if segments_match(full_text, self.state.last_segments) else None
         self.status.configure(text="Analyzing with GPT and saving...")
 
-        def task():
+        req = SaveRequest(
+            session_uuid=job.uuid, title=title, main_topic=main_topic,
+            start_time=start_dt.strftime("%Y-%m-%d %H:%M:%S"),
+            end_time=end_dt.strftime("%Y-%m-%d %H:%M:%S"),
+            duration_min=int((end_dt - start_dt).total_seconds() // 60), audio_path=audio_path,
+            full_text=full_text, segments=segments,
+        )
+
+        def on_stage(name, sec):
+            EXECUTOR.call_soon(lambda: self.status.configure(text=f"Saving... {name} done ({sec:.1f}s)"), owner=self)
+
+        def task(tok):
             try:
-                summary = Summarizer().summarize(full_text)
-                extracted = Extractor().extract_fields(full_text)
-                from db.dao import upsert_session, insert_transcript
-                upsert_session(
-                    uuid=session_uuid, title=title, main_topic=main_topic,
-                    start_time=start_dt.strftime("%Y-%m-%d %H:%M:%S"),
-                    end_time=end_dt.strftime("%Y-%m-%d %H:%M:%S"),
-                    duration_min=duration_min, status="completed",
-                    audio_path=audio_path,
-                )
-                insert_transcript(session_uuid, full_text, summary, extracted)
-                return (session_uuid, None)
+                # LẤY DURATION THEO FILE AUDIO (ưu tiên file, fallback đồng hồ); probe ở luồng nền
+                if audio_path and os.path.exists(audio_path):
+                    req.duration_min = self._probe_duration_minutes(audio_path)
+                # Checkpoint transcript (đã sửa tay) + meta trước khi gọi GPT -> crash/mất mạng vẫn resume được
+                job.set_transcript(full_text, segments)
+                job.submit(title=title, main_topic=main_topic, start_time=req.start_time,
+                           end_time=req.end_time, duration_min=req.duration_min)
+                return (save_meeting(req, on_stage=on_stage, job=job, cancel=tok), None)
             except Exception as e:
                 return (None, str(e))
 
         def done(res):
-            sid, err = res
-            if err: self.status.configure(text=f"Save failed: {err}")
-            else:   self.status.configure(text=f"Saved session {sid}")
-        threading.Thread(target=lambda: self._thread(task, done), daemon=True).start()
+            result, err = res
+            if err: self.status.configure(text=f"Save failed: {err} (progress kept, Save again to resume)")
+            else:   self.status.configure(text=f"Saved session {result.session_uuid} ({result.timing_text()})")
+        # save_meeting tự chạy GPT + DB song song bên trong; ở đây chỉ giữ nó khỏi luồng Tk.
+        # Token của task đi vào save_meeting -> huỷ task thì dừng giữa các chunk GPT
+        EXECUTOR.submit("gpt", task, on_done=done, owner=self, pass_token=True)
+
+    # ---------- Resume ----------
+    def _on_unfinished_jobs(self, jobs):
+        """
+        Khởi động: job đã bấm Save nhưng chưa xong -> chạy tiếp nền từ stage dở.
+        Job mới nhất chưa Save -> khôi phục transcript (hoặc nhận dạng lại file ghi âm) vào ô soạn.
+        """
+        submitted = [j for j in jobs if j.submitted]
+        for job in submitted:
+            logger.info("Resuming job %s", job.describe())
+            EXECUTOR.submit("gpt", run_job, job, self.worker, on_done=self._on_resumed,
+                            on_error=lambda e, j=job: self._on_resume_error(j, e), owner=self)
+        if submitted:
+            self.status.configure(text=f"Resuming {len(submitted)} unfinished save(s)...")
+        draft = next((j for j in jobs if not j.submitted and j.is_done("record")), None)
+        if draft is None or self.state.job is not None or self.txt.get("1.0", "end").strip():
+            return
+        self.state.job = draft
+        self.state.last_audio_path = draft.audio_path or None
+        if draft.is_done("asr"):
+            EXECUTOR.submit("io", draft.transcript, on_done=self._restore_transcript, owner=self)
+        elif draft.audio_path and os.path.exists(draft.audio_path):
+            self.file_lbl.configure(text=os.path.basename(draft.audio_path))
+            self._run_asr_async(draft.audio_path, allow_parallel=True)
+
+    def _restore_transcript(self, res):
+        full_text, segments = res
+        if self.txt.get("1.0", "end").strip():
+            return
+        self.txt.insert("end", full_text or "")
+        self.state.last_segments = segments or []
+        self.status.configure(text="Restored unsaved transcript from last session")
+
+    def _on_resumed(self, result):
+        self.status.configure(text=f"Resumed and saved session {result.session_uuid} ({result.timing_text()})")
+
+    def _on_resume_error(self, job, err):
+        logger.error("Resume job %s failed: %s", job.uuid, err)
+        self.status.configure(text=f"Resume of {job.uuid} failed: {err}")